@@ -3,9 +3,18 @@ Email utilities for monitoring and extracting authentication codes.
 """
 
 import re
+import json
+import time
 import email
+import asyncio
+import functools
+import email.utils
+import select
+import ssl
 import logging
-from typing import Optional, List, Dict, Any
+import threading
+from typing import Optional, List, Dict, Any, Tuple, Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import imaplib
 import email.mime.text
@@ -13,103 +22,347 @@ import email.mime.text
 logger = logging.getLogger(__name__)
 
 
+class ImapConnection:
+    """A long-lived IMAP session that is health-checked and reopened as needed.
+    
+    A connection used within the last ``keepalive_interval`` seconds is
+    reused as is. Up to ``max_idle`` a NOOP first confirms it is still alive;
+    beyond that the server has probably dropped it, so it is reopened. Failed
+    connects back off exponentially (up to ``max_backoff``) instead of
+    hammering the server, and every command runs with a ``timeout`` second
+    socket timeout.
+    """
+    
+    def __init__(self, server: str, port: int, username: str, password: str, use_ssl: bool = True,
+                 timeout: float = 30, keepalive_interval: float = 60, max_idle: float = 900,
+                 max_backoff: float = 60):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.keepalive_interval = keepalive_interval
+        self.max_idle = max_idle
+        self.max_backoff = max_backoff
+        self.connection = None
+        self.last_used = 0.0
+        self._failures = 0
+        self._retry_at = 0.0
+        self.metrics = {"connects": 0, "reuses": 0, "keepalives": 0, "reconnects": 0, "failures": 0}
+    
+    def acquire(self):
+        """Return a usable connection, reusing the open one when it is healthy."""
+        if self.connection is not None:
+            idle = time.monotonic() - self.last_used
+            if idle >= self.max_idle:
+                logger.info(f"Email connection idle for {idle:.0f}s, reconnecting")
+            elif idle < self.keepalive_interval or self._noop():
+                self.metrics["reuses"] += 1
+                self.touch()
+                return self.connection
+            
+            self.discard()
+            self.metrics["reconnects"] += 1
+        
+        return self._open()
+    
+    def touch(self):
+        """Mark the connection as just used and reset its per-operation timeout."""
+        self.last_used = time.monotonic()
+        sock = getattr(self.connection, "sock", None)
+        if sock is not None:
+            sock.settimeout(self.timeout)
+    
+    def discard(self):
+        """Drop the connection without waiting on a possibly dead server."""
+        if self.connection is not None:
+            try:
+                self.connection.shutdown()
+            except Exception:
+                pass
+            finally:
+                self.connection = None
+    
+    def close(self):
+        """Log out and report how often the connection was reused."""
+        if self.connection is not None:
+            try:
+                self.connection.logout()
+            except Exception:
+                pass
+            finally:
+                self.connection = None
+        logger.info(f"Email connection stats: {self.stats()}")
+    
+    def stats(self) -> Dict[str, Any]:
+        uses = self.metrics["connects"] + self.metrics["reuses"]
+        return {**self.metrics, "reuse_ratio": round(self.metrics["reuses"] / uses, 3) if uses else 0.0}
+    
+    def _noop(self) -> bool:
+        try:
+            self.connection.noop()
+            self.metrics["keepalives"] += 1
+            return True
+        except Exception as e:
+            logger.info(f"Email connection keepalive failed: {e}")
+            return False
+    
+    def _open(self):
+        now = time.monotonic()
+        if now < self._retry_at:
+            raise ConnectionError(f"Backing off; next connection attempt in {self._retry_at - now:.0f}s")
+        
+        try:
+            imap_class = imaplib.IMAP4_SSL if self.use_ssl else imaplib.IMAP4
+            connection = imap_class(self.server, self.port, timeout=self.timeout)
+            connection.login(self.username, self.password)
+        except Exception:
+            self._failures += 1
+            self.metrics["failures"] += 1
+            self._retry_at = time.monotonic() + min(self.max_backoff, 2 ** (self._failures - 1))
+            raise
+        
+        self._failures = 0
+        self._retry_at = 0.0
+        self.connection = connection
+        self.metrics["connects"] += 1
+        self.touch()
+        logger.info(f"Connected to email server: {self.server}")
+        return connection
+
+
+def _imap_operation(default: Callable[[], Any]):
+    """Run an EmailMonitor method on a healthy connection.
+    
+    A dropped connection (abort or socket error) is reopened and the method
+    retried once; any other failure is logged and ``default()`` returned.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            for attempt in range(2):
+                if not self.connect():
+                    return default()
+                try:
+                    return method(self, *args, **kwargs)
+                except (imaplib.IMAP4.abort, OSError) as e:
+                    self.imap.discard()
+                    if attempt:
+                        logger.error(f"Email connection lost in {method.__name__}: {e}")
+                    else:
+                        logger.info(f"Email connection lost in {method.__name__}, reconnecting: {e}")
+                except Exception as e:
+                    logger.error(f"Error in {method.__name__}: {e}")
+                    break
+                finally:
+                    self.imap.touch()
+            return default()
+        return wrapper
+    return decorator
+
+
 class EmailMonitor:
     """Monitor email for authentication codes and notifications."""
     
-    def __init__(self, server: str, port: int, username: str, password: str, use_ssl: bool = True):
+    # Content-Type and Content-Transfer-Encoding let a partial body be decoded
+    HEADER_FIELDS = "SUBJECT FROM TO DATE CONTENT-TYPE CONTENT-TRANSFER-ENCODING"
+    MAX_BODY_BYTES = 16384
+    FETCH_BATCH_SIZE = 200
+    
+    def __init__(self, server: str, port: int, username: str, password: str, use_ssl: bool = True,
+                 timeout: float = 30, keepalive_interval: float = 60, max_idle: float = 900):
         self.server = server
         self.port = port
         self.username = username
         self.password = password
         self.use_ssl = use_ssl
-        self.connection = None
+        # One connection shared by every operation of this monitor
+        self.imap = ImapConnection(server, port, username, password, use_ssl, timeout=timeout,
+                                   keepalive_interval=keepalive_interval, max_idle=max_idle)
+        # Per folder: UIDVALIDITY and the highest UID already synced
+        self.folder_state: Dict[str, Dict[str, int]] = {}
+    
+    @property
+    def connection(self):
+        return self.imap.connection
+    
+    @connection.setter
+    def connection(self, value):
+        self.imap.connection = value
+        self.imap.touch()
     
     def connect(self) -> bool:
-        """Connect to email server."""
+        """Make sure a usable connection is open, reusing the current one when healthy."""
         try:
-            if self.use_ssl:
-                self.connection = imaplib.IMAP4_SSL(self.server, self.port)
-            else:
-                self.connection = imaplib.IMAP4(self.server, self.port)
-            
-            self.connection.login(self.username, self.password)
-            logger.info(f"Connected to email server: {self.server}")
+            self.imap.acquire()
             return True
-            
+        
         except Exception as e:
             logger.error(f"Failed to connect to email server: {e}")
             return False
     
     def disconnect(self):
         """Disconnect from email server."""
-        if self.connection:
-            try:
-                self.connection.close()
-                self.connection.logout()
-                logger.info("Disconnected from email server")
-            except:
-                pass
-            finally:
-                self.connection = None
+        self.imap.close()
     
+    def connection_stats(self) -> Dict[str, Any]:
+        """Connects, reuses, keepalives and reconnects of the shared connection."""
+        return self.imap.stats()
+    
+    @_imap_operation(list)
     def search_emails(self, folder: str = "INBOX", subject_filter: str = None, 
-                     from_filter: str = None, since_hours: int = 24) -> List[Dict[str, Any]]:
-        """Search for emails matching criteria."""
-        if not self.connection:
-            if not self.connect():
-                return []
+                     from_filter: str = None, since_hours: int = 24,
+                     to_filter: str = None, body_subject_pattern: str = None,
+                     max_body_bytes: int = None) -> List[Dict[str, Any]]:
+        """Search for emails matching criteria.
+        
+        Only headers are downloaded for every hit. Bodies (at most
+        ``max_body_bytes``, 0 for none) are fetched for messages whose subject
+        matches the ``body_subject_pattern`` regex, or for all hits without one.
+        """
+        self.connection.select(folder)
+        
+        # Build search criteria
+        criteria = []
+        
+        if since_hours:
+            since_date = (datetime.now() - timedelta(hours=since_hours)).strftime("%d-%b-%Y")
+            criteria.append(f'SINCE "{since_date}"')
+        
+        if subject_filter:
+            criteria.append(f'SUBJECT "{subject_filter}"')
+        
+        if from_filter:
+            criteria.append(f'FROM "{from_filter}"')
         
+        if to_filter:
+            criteria.append(f'TO "{to_filter}"')
+        
+        search_string = " ".join(criteria) if criteria else "ALL"
+        
+        typ, msg_ids = self.connection.search(None, search_string)
+        
+        return self._fetch_messages(self.connection, msg_ids[0].split(),
+                                    body_subject_pattern=body_subject_pattern,
+                                    max_body_bytes=max_body_bytes)
+    
+    @_imap_operation(lambda: ([], False))
+    def sync_folder(self, folder: str = "INBOX", subject_filter: str = None, since_hours: int = 24,
+                    body_subject_pattern: str = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """Fetch only the messages that arrived since the last sync of ``folder``.
+        
+        Returns ``(messages, reset)``. ``reset`` is True on the first sync and
+        whenever the folder's UIDVALIDITY changed, when UIDs remembered from
+        earlier syncs no longer apply; only then is the last ``since_hours``
+        searched. An unchanged mailbox costs a single SELECT. Use one
+        ``subject_filter`` per folder, as the high-water mark covers it.
+        """
+        self.connection.select(folder)
+        uidvalidity = self._response_int("UIDVALIDITY")
+        uidnext = self._response_int("UIDNEXT")
+        
+        state = self.folder_state.get(folder)
+        reset = state is None or uidvalidity is None or state["uidvalidity"] != uidvalidity
+        last_uid = 0 if reset else state["last_uid"]
+        
+        if not reset and uidnext is not None and uidnext <= last_uid + 1:
+            return [], False
+        
+        criteria = ["UID", f"{last_uid + 1}:*"]
+        if reset and since_hours:
+            since_date = (datetime.now() - timedelta(hours=since_hours)).strftime("%d-%b-%Y")
+            criteria.append(f'SINCE "{since_date}"')
+        if subject_filter:
+            criteria.append(f'SUBJECT "{subject_filter}"')
+        
+        typ, data = self.connection.uid("SEARCH", None, *criteria)
+        # "n:*" always matches the newest message, even below n
+        uids = [uid for uid in (data[0] or b"").split() if int(uid) > last_uid]
+        
+        messages = self._fetch_messages(self.connection, uids, use_uid=True,
+                                        body_subject_pattern=body_subject_pattern)
+        
+        high = max([last_uid, (uidnext or 1) - 1] + [int(uid) for uid in uids])
+        self.folder_state[folder] = {"uidvalidity": uidvalidity or 0, "last_uid": high}
+        if reset:
+            logger.info(f"Full sync of {folder}: UIDVALIDITY {uidvalidity}, {len(messages)} messages")
+        return messages, reset
+    
+    def _response_int(self, name: str) -> Optional[int]:
+        """Integer from a response code (e.g. UIDNEXT) of the last SELECT."""
+        typ, data = self.connection.response(name)
         try:
-            self.connection.select(folder)
-            
-            # Build search criteria
-            criteria = []
-            
-            if since_hours:
-                since_date = (datetime.now() - timedelta(hours=since_hours)).strftime("%d-%b-%Y")
-                criteria.append(f'SINCE "{since_date}"')
-            
-            if subject_filter:
-                criteria.append(f'SUBJECT "{subject_filter}"')
-            
-            if from_filter:
-                criteria.append(f'FROM "{from_filter}"')
-            
-            search_string = " ".join(criteria) if criteria else "ALL"
-            
-            typ, msg_ids = self.connection.search(None, search_string)
-            
-            emails = []
-            for msg_id in msg_ids[0].split():
-                try:
-                    typ, msg_data = self.connection.fetch(msg_id, "(RFC822)")
-                    email_body = msg_data[0][1]
-                    email_message = email.message_from_bytes(email_body)
-                    
-                    emails.append({
-                        "id": msg_id.decode(),
-                        "subject": email_message["Subject"],
-                        "from": email_message["From"],
-                        "date": email_message["Date"],
-                        "body": self._get_email_body(email_message)
-                    })
-                except Exception as e:
-                    logger.error(f"Error processing email {msg_id}: {e}")
-            
-            return emails
+            return int(data[0]) if data and data[0] else None
+        except ValueError:
+            return None
+    
+    def _fetch_messages(self, connection, msg_ids: List[bytes], use_uid: bool = False,
+                        body_subject_pattern: str = None, max_body_bytes: int = None) -> List[Dict[str, Any]]:
+        """Fetch headers for all ``msg_ids`` in batches, then bounded bodies for the candidates."""
+        if max_body_bytes is None:
+            max_body_bytes = self.MAX_BODY_BYTES
+        subject_regex = re.compile(body_subject_pattern, re.IGNORECASE) if body_subject_pattern else None
+        
+        headers = self._fetch_parts(connection, msg_ids, f"(BODY.PEEK[HEADER.FIELDS ({self.HEADER_FIELDS})])", use_uid)
+        
+        candidates = []
+        if max_body_bytes > 0:
+            for msg_id, header in headers.items():
+                subject = email.message_from_bytes(header)["Subject"] or ""
+                if subject_regex is None or subject_regex.search(subject):
+                    candidates.append(msg_id)
+        
+        bodies = self._fetch_parts(connection, candidates, f"(BODY.PEEK[TEXT]<0.{max_body_bytes}>)", use_uid)
+        
+        emails = []
+        for msg_id, header in headers.items():
+            try:
+                raw = header.rstrip(b"\r\n") + b"\r\n\r\n" + bodies.get(msg_id, b"")
+                emails.append(self._parse_message(msg_id.decode(), raw))
+            except Exception as e:
+                logger.error(f"Error processing email {msg_id}: {e}")
+        return emails
+    
+    def _fetch_parts(self, connection, msg_ids: List[bytes], spec: str, use_uid: bool) -> Dict[bytes, bytes]:
+        """One FETCH per batch of message ids; returns ``{id: literal}``."""
+        parts = {}
+        for start in range(0, len(msg_ids), self.FETCH_BATCH_SIZE):
+            message_set = b",".join(msg_ids[start:start + self.FETCH_BATCH_SIZE]).decode()
+            if use_uid:
+                typ, data = connection.uid("FETCH", message_set, spec)
+            else:
+                typ, data = connection.fetch(message_set, spec)
             
-        except Exception as e:
-            logger.error(f"Error searching emails: {e}")
-            return []
+            for item in data or []:
+                if not isinstance(item, tuple):
+                    continue
+                match = re.search(rb"UID (\d+)", item[0]) if use_uid else re.match(rb"(\d+)", item[0])
+                if match:
+                    parts[match.group(1)] = item[1]
+        return parts
+    
+    def _parse_message(self, msg_id: str, raw: bytes) -> Dict[str, Any]:
+        """Turn fetched header fields (plus any partial body) into the dict search_emails returns."""
+        email_message = email.message_from_bytes(raw)
+        return {
+            "id": msg_id,
+            "subject": email_message["Subject"],
+            "from": email_message["From"],
+            "to": email_message["To"],
+            "date": email_message["Date"],
+            "body": self._get_email_body(email_message)
+        }
     
     def _get_email_body(self, email_message) -> str:
         """Extract text body from email message."""
+        # Bodies are truncated at MAX_BODY_BYTES, so decode leniently
         if email_message.is_multipart():
             for part in email_message.walk():
                 if part.get_content_type() == "text/plain":
-                    return part.get_payload(decode=True).decode()
+                    return (part.get_payload(decode=True) or b"").decode(errors="replace")
         else:
-            return email_message.get_payload(decode=True).decode()
+            return (email_message.get_payload(decode=True) or b"").decode(errors="replace")
         return ""
     
     def extract_synthesis_code(self, emails: List[Dict[str, Any]]) -> Optional[str]:
@@ -125,8 +378,8 @@ class EmailMonitor:
         sorted_emails = sorted(emails, key=lambda x: x["date"], reverse=True)
         
         for email_data in sorted_emails:
-            subject = email_data.get("subject", "").lower()
-            body = email_data.get("body", "")
+            subject = (email_data.get("subject") or "").lower()
+            body = email_data.get("body") or ""
             
             # Check if this looks like a Synthesis email
             if any(keyword in subject for keyword in ["synthesis", "verification", "login"]):
@@ -139,48 +392,427 @@ class EmailMonitor:
         
         return None
     
+    @_imap_operation(lambda: False)
     def delete_email(self, email_id: str, folder: str = "INBOX"):
         """Delete email by ID (for cleanup after using code)."""
-        if not self.connection:
-            return False
-        
-        try:
-            self.connection.select(folder)
-            self.connection.store(email_id, "+FLAGS", "\\Deleted")
-            self.connection.expunge()
-            logger.info(f"Deleted email {email_id}")
+        self.connection.select(folder)
+        self.connection.store(email_id, "+FLAGS", "\\Deleted")
+        self.connection.expunge()
+        logger.info(f"Deleted email {email_id}")
+        return True
+    
+    
+    @_imap_operation(lambda: False)
+    def delete_emails_by_uid(self, uids: List[int], folder: str = "INBOX") -> bool:
+        """Delete several emails by UID with a single STORE and EXPUNGE."""
+        if not uids:
             return True
-        except Exception as e:
-            logger.error(f"Error deleting email {email_id}: {e}")
-            return False
+        
+        self.connection.select(folder)
+        self.connection.uid("STORE", ",".join(str(uid) for uid in uids), "+FLAGS", "(\\Deleted)")
+        self.connection.expunge()
+        logger.info(f"Deleted {len(uids)} emails from {folder}")
+        return True
 
 
 class SynthesisEmailMonitor(EmailMonitor):
     """Specialized email monitor for Synthesis.com authentication."""
     
-    def get_latest_login_code(self) -> Optional[str]:
-        """Get the latest Synthesis login code from email."""
-        emails = self.search_emails(
-            subject_filter="verification",
-            since_hours=1  # Only check last hour
-        )
+    # Subjects worth downloading a body for (see extract_synthesis_code)
+    CODE_SUBJECT_PATTERN = r"synthesis|verification|login"
+    # Persisted in user settings: folder high-water marks and the UIDs of synced
+    # verification emails; the codes and recipients stay in memory
+    SETTINGS_KEY = "email_sync_state"
+    PERSISTED_CODE_FIELDS = ("uid", "folder", "timestamp")
+    CODE_CACHE_HOURS = 24
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Verification emails already synced: uid, folder, timestamp, to, code
+        self.code_cache: List[Dict[str, Any]] = []
+        self.state_changed = False
+    
+    def load_state(self, raw: Optional[str]):
+        """Restore sync state from the JSON stored in user settings."""
+        try:
+            state = json.loads(raw) if raw else {}
+            self.folder_state = dict(state.get("folders", {}))
+            codes = list(state.get("codes", []))
+            self.code_cache = [dict({field: entry[field] for field in self.PERSISTED_CODE_FIELDS}, to="", code=None)
+                               for entry in codes]
+            # Rewrite state saved before codes were kept out of it
+            self.state_changed = any("code" in entry or "to" in entry for entry in codes)
+        except (ValueError, AttributeError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring invalid saved email sync state: {e}")
+            self.folder_state, self.code_cache = {}, []
+    
+    def dump_state(self) -> str:
+        codes = [{field: entry[field] for field in self.PERSISTED_CODE_FIELDS} for entry in self.code_cache]
+        return json.dumps({"folders": self.folder_state, "codes": codes})
+    
+    def sync_codes(self, folder: str = "INBOX"):
+        """Add newly arrived verification emails to the code cache."""
+        before = self.dump_state()
+        messages, reset = self.sync_folder(folder, subject_filter="verification",
+                                           since_hours=self.CODE_CACHE_HOURS,
+                                           body_subject_pattern=self.CODE_SUBJECT_PATTERN)
+        if reset:
+            self.code_cache = [entry for entry in self.code_cache if entry["folder"] != folder]
+        
+        for message in messages:
+            self.code_cache.append({
+                "uid": int(message["id"]),
+                "folder": folder,
+                "timestamp": self._timestamp(message.get("date")),
+                "to": message.get("to") or "",
+                "code": self.extract_synthesis_code([message])
+            })
+        
+        cutoff = time.time() - self.CODE_CACHE_HOURS * 3600
+        self.code_cache = sorted((entry for entry in self.code_cache if entry["timestamp"] >= cutoff),
+                                 key=lambda entry: entry["timestamp"])
+        self.state_changed = self.state_changed or self.dump_state() != before
+    
+    @staticmethod
+    def _timestamp(date_header: Optional[str]) -> float:
+        try:
+            return email.utils.parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError):
+            return time.time()
+    
+    def get_latest_login_code(self, recipient: str = None) -> Optional[str]:
+        """Get the latest Synthesis login code from email.
         
-        return self.extract_synthesis_code(emails)
+        Pass the account's address as ``recipient`` when several accounts'
+        codes arrive in the same mailbox. Only emails that arrived since the
+        previous check are downloaded.
+        """
+        self.sync_codes()
+        
+        one_hour_ago = time.time() - 3600  # Only codes from the last hour
+        for entry in reversed(self.code_cache):
+            if entry["timestamp"] < one_hour_ago:
+                break
+            if entry["code"] and (not recipient or recipient.lower() in entry["to"].lower()):
+                return entry["code"]
+        
+        return None
+    
+    def watch_login_code(self, recipient: str = None, timeout: float = 120,
+                         use_idle: bool = True) -> "LoginCodeWatcher":
+        """Watcher for a code that has not been sent yet; see LoginCodeWatcher."""
+        return LoginCodeWatcher(self, recipient=recipient, timeout=timeout, use_idle=use_idle)
     
     def cleanup_old_codes(self):
         """Clean up old verification emails to prevent clutter."""
-        emails = self.search_emails(
-            subject_filter="verification",
-            since_hours=24
-        )
+        self.sync_codes()
         
         # Delete emails older than 1 hour
-        one_hour_ago = datetime.now() - timedelta(hours=1)
+        one_hour_ago = time.time() - 3600
+        
+        for folder in {entry["folder"] for entry in self.code_cache}:
+            old = [entry for entry in self.code_cache if entry["folder"] == folder and entry["timestamp"] < one_hour_ago]
+            if old and self.delete_emails_by_uid([entry["uid"] for entry in old], folder):
+                self.code_cache = [entry for entry in self.code_cache if entry not in old]
+                self.state_changed = True
+
+
+class LoginCodeWatcher:
+    """Wait on the mailbox for a login code sent after ``start()``.
+    
+    ``start()`` opens a dedicated connection and records the mailbox's
+    UIDNEXT, so only messages that arrive afterwards are considered. Call it
+    before the login form asks Synthesis to send the code, then ``wait()``
+    blocks until the code arrives or ``timeout`` passes. Servers that
+    support IDLE push new mail to us; otherwise the mailbox is polled,
+    quickly at first and backing off towards ``max_poll``.
+    """
+    
+    # RFC 2177 asks clients to re-issue IDLE at least every 29 minutes; we
+    # refresh far more often so a missed notification costs little
+    IDLE_REFRESH = 30
+    
+    def __init__(self, monitor: "SynthesisEmailMonitor", recipient: str = None, timeout: float = 120,
+                 use_idle: bool = True, folder: str = "INBOX",
+                 min_poll: float = 1.0, max_poll: float = 15.0):
+        self.monitor = monitor
+        self.recipient = recipient
+        self.timeout = timeout
+        self.use_idle = use_idle
+        self.folder = folder
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.connection = None
+        self.first_uid = None
+        self.mode = None
+        self.checks = 0
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._waiting = False
+    
+    def start(self) -> bool:
+        """Connect and note where new mail will start; False when the mailbox is unreachable."""
+        try:
+            watcher_monitor = SynthesisEmailMonitor(self.monitor.server, self.monitor.port, self.monitor.username,
+                                                    self.monitor.password, self.monitor.use_ssl)
+            if not watcher_monitor.connect():
+                return False
+            
+            self.connection = watcher_monitor.connection
+            self.connection.select(self.folder)
+            self.first_uid = self._uidnext()
+            self.mode = "idle" if self.use_idle and "IDLE" in self.connection.capabilities else "poll"
+            logger.info(f"Watching {self.folder} for a login code from UID {self.first_uid} ({self.mode})")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to start login code watcher: {e}")
+            self._close()
+            return False
+    
+    def wait(self) -> Optional[str]:
+        """Block until a new login code arrives; None on timeout, stop() or error."""
+        if self.connection is None:
+            return None
+        
+        with self._lock:
+            self._waiting = True
+        
+        deadline = time.monotonic() + self.timeout
+        interval = self.min_poll
+        
+        try:
+            while not self._stopped.is_set():
+                code = self._check()
+                if code:
+                    return code
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"No login code arrived within {self.timeout}s")
+                    return None
+                
+                if self.mode == "idle":
+                    self._idle(min(remaining, self.IDLE_REFRESH))
+                else:
+                    self._stopped.wait(min(remaining, interval))
+                    interval = min(interval * 1.5, self.max_poll)
+            return None
+        
+        except Exception as e:
+            logger.error(f"Error waiting for login code: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._waiting = False
+                self._close()
+    
+    def stop(self):
+        """Stop waiting and release the connection."""
+        self._stopped.set()
+        with self._lock:
+            # A running wait() closes the connection itself once it notices
+            if not self._waiting:
+                self._close()
+    
+    def _uidnext(self) -> int:
+        typ, data = self.connection.response("UIDNEXT")
+        if not data or data[0] is None:
+            typ, data = self.connection.status(self.folder, "(UIDNEXT)")
+            match = re.search(rb"UIDNEXT (\d+)", data[0] or b"")
+            return int(match.group(1)) if match else 1
+        return int(data[0])
+    
+    def _check(self) -> Optional[str]:
+        """Look for a code in messages that arrived since start()."""
+        self.checks += 1
+        criteria = ["UID", f"{self.first_uid}:*", 'SUBJECT "verification"']
+        if self.recipient:
+            criteria.append(f'TO "{self.recipient}"')
+        
+        typ, data = self.connection.uid("SEARCH", None, *criteria)
+        # "n:*" always matches the newest message, even below n
+        uids = [uid for uid in (data[0] or b"").split() if int(uid) >= self.first_uid]
+        
+        emails = self.monitor._fetch_messages(self.connection, uids, use_uid=True,
+                                              body_subject_pattern=self.monitor.CODE_SUBJECT_PATTERN)
+        return self.monitor.extract_synthesis_code(emails) if emails else None
+    
+    def _idle(self, timeout: float) -> bool:
+        """IDLE until the server reports new mail or ``timeout``; True when mail arrived.
+        
+        imaplib has no IDLE command before Python 3.14, so the exchange is
+        written directly on the connection.
+        """
+        conn = self.connection
+        tag = conn._new_tag()
+        conn.tagged_commands.pop(tag, None)
+        conn.send(tag + b" IDLE\r\n")
+        
+        line = conn.readline()
+        if not line.startswith(b"+"):
+            raise imaplib.IMAP4.error(f"IDLE rejected: {line!r}")
         
-        for email_data in emails:
+        arrived = False
+        deadline = time.monotonic() + timeout
+        while not arrived and not self._stopped.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if self._readable(min(remaining, 1.0)):
+                line = conn.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("Connection closed during IDLE")
+                arrived = line.rstrip().endswith((b"EXISTS", b"RECENT"))
+        
+        conn.send(b"DONE\r\n")
+        while True:
+            line = conn.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed ending IDLE")
+            if line.startswith(tag):
+                break
+        return arrived
+    
+    def _readable(self, timeout: float) -> bool:
+        """True when a response can be read without waiting longer than ``timeout``.
+        
+        Bytes already pulled into imaplib's buffered reader (e.g. an EXISTS
+        sent in the same packet as "+ idling") or decrypted by the TLS layer
+        never wake select(), so both are checked first.
+        """
+        sock = self.connection.sock
+        if getattr(sock, "pending", None) and sock.pending():
+            return True
+        if self._buffered():
+            return True
+        return bool(select.select([sock], [], [], timeout)[0])
+    
+    def _buffered(self) -> bool:
+        """Whether the connection's reader holds unread bytes, without blocking."""
+        reader = getattr(self.connection, "file", None)
+        if reader is None or not hasattr(reader, "peek"):
+            return False
+        
+        sock = self.connection.sock
+        timeout = sock.gettimeout()
+        sock.settimeout(0)
+        try:
+            # Returns buffered bytes as is; otherwise one non-blocking read
+            return bool(reader.peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            sock.settimeout(timeout)
+    
+    def _close(self):
+        if self.connection:
             try:
-                email_date = datetime.strptime(email_data["date"], "%a, %d %b %Y %H:%M:%S %z")
-                if email_date.replace(tzinfo=None) < one_hour_ago:
-                    self.delete_email(email_data["id"])
-            except Exception as e:
-                logger.error(f"Error processing email date: {e}")
\ No newline at end of file
+                self.connection.logout()
+            except Exception:
+                pass
+            finally:
+                self.connection = None
+
+
+class AsyncEmailMonitor:
+    """Asyncio facade over :class:`EmailMonitor` for the MCP event loop.
+    
+    Every mailbox operation runs on one dedicated thread, which keeps the
+    shared IMAP connection to a single command at a time while the event
+    loop carries on serving other requests.
+    """
+    
+    def __init__(self, monitor: EmailMonitor):
+        self.sync = monitor
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="imap")
+    
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._worker, functools.partial(func, *args, **kwargs))
+    
+    async def connect(self) -> bool:
+        return await self._run(self.sync.connect)
+    
+    async def disconnect(self):
+        """Finish pending operations and log out."""
+        await self._run(self.sync.disconnect)
+        # Work queued behind the logout still drains, but off the event loop
+        await asyncio.to_thread(self._worker.shutdown, wait=True)
+    
+    def connection_stats(self) -> Dict[str, Any]:
+        return self.sync.connection_stats()
+    
+    async def search_emails(self, folder: str = "INBOX", subject_filter: str = None,
+                            from_filter: str = None, since_hours: int = 24,
+                            to_filter: str = None, body_subject_pattern: str = None,
+                            max_body_bytes: int = None) -> List[Dict[str, Any]]:
+        return await self._run(self.sync.search_emails, folder, subject_filter, from_filter, since_hours,
+                               to_filter, body_subject_pattern, max_body_bytes)
+    
+    async def sync_folder(self, folder: str = "INBOX", subject_filter: str = None, since_hours: int = 24,
+                          body_subject_pattern: str = None) -> Tuple[List[Dict[str, Any]], bool]:
+        return await self._run(self.sync.sync_folder, folder, subject_filter, since_hours, body_subject_pattern)
+    
+    async def delete_email(self, email_id: str, folder: str = "INBOX") -> bool:
+        return await self._run(self.sync.delete_email, email_id, folder)
+    
+    async def delete_emails_by_uid(self, uids: List[int], folder: str = "INBOX") -> bool:
+        return await self._run(self.sync.delete_emails_by_uid, uids, folder)
+    
+    async def extract_synthesis_code(self, emails: List[Dict[str, Any]]) -> Optional[str]:
+        # Pure parsing, cheap enough to run on the event loop
+        return self.sync.extract_synthesis_code(emails)
+
+
+class AsyncSynthesisEmailMonitor(AsyncEmailMonitor):
+    """Asyncio facade over :class:`SynthesisEmailMonitor`."""
+    
+    SETTINGS_KEY = SynthesisEmailMonitor.SETTINGS_KEY
+    
+    @property
+    def state_changed(self) -> bool:
+        return self.sync.state_changed
+    
+    @state_changed.setter
+    def state_changed(self, value: bool):
+        self.sync.state_changed = value
+    
+    def load_state(self, raw: Optional[str]):
+        self.sync.load_state(raw)
+    
+    def dump_state(self) -> str:
+        return self.sync.dump_state()
+    
+    async def sync_codes(self, folder: str = "INBOX"):
+        await self._run(self.sync.sync_codes, folder)
+    
+    async def get_latest_login_code(self, recipient: str = None) -> Optional[str]:
+        return await self._run(self.sync.get_latest_login_code, recipient)
+    
+    async def cleanup_old_codes(self):
+        await self._run(self.sync.cleanup_old_codes)
+    
+    def watch_login_code(self, recipient: str = None, timeout: float = 120,
+                         use_idle: bool = True) -> "AsyncLoginCodeWatcher":
+        return AsyncLoginCodeWatcher(self.sync.watch_login_code(recipient, timeout=timeout, use_idle=use_idle))
+
+
+class AsyncLoginCodeWatcher:
+    """Awaitable :class:`LoginCodeWatcher`.
+    
+    The watcher has its own connection, so its long wait runs on the default
+    executor instead of holding up the shared mailbox thread.
+    """
+    
+    def __init__(self, watcher: LoginCodeWatcher):
+        self.sync = watcher
+    
+    async def start(self) -> bool:
+        return await asyncio.to_thread(self.sync.start)
+    
+    async def wait(self) -> Optional[str]:
+        return await asyncio.to_thread(self.sync.wait)
+    
+    def stop(self):
+        self.sync.stop()
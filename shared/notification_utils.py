@@ -5,7 +5,7 @@ Notification utilities for sending push notifications and reminders.
 import asyncio
 import logging
 from typing import Dict, Any, Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import httpx
 
@@ -218,10 +218,13 @@ class ScheduledNotifications:
     """Handle scheduled notifications and reminders."""
     
     def __init__(self, notification_manager: NotificationManager, 
-                 db_manager, notification_times: List[str] = None):
+                 db_manager, notification_times: List[str] = None,
+                 retention_days: int = 90):
         self.notification_manager = notification_manager
         self.db_manager = db_manager
         self.notification_times = notification_times or ["09:00", "15:00", "19:00"]
+        self.retention_days = retention_days
+        self.last_pruned = None
         self.running = False
     
     async def start_scheduler(self):
@@ -232,6 +235,7 @@ class ScheduledNotifications:
         while self.running:
             try:
                 await self._check_and_send_notifications()
+                await self._prune_old_notifications()
                 await asyncio.sleep(300)  # Check every 5 minutes
             except Exception as e:
                 logger.error(f"Error in notification scheduler: {e}")
@@ -242,6 +246,17 @@ class ScheduledNotifications:
         self.running = False
         logger.info("Stopping notification scheduler")
     
+    async def _prune_old_notifications(self):
+        """Archive old notifications once per day to keep the reminder checks cheap."""
+        today = datetime.now().strftime("%Y-%m-%d")
+        if self.last_pruned == today:
+            return
+        
+        # The database is synchronous; keep the archive query off the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.db_manager.prune_notifications, self.retention_days)
+        self.last_pruned = today
+    
     async def _check_and_send_notifications(self):
         """Check if notifications should be sent."""
         try:
@@ -259,16 +274,14 @@ class ScheduledNotifications:
                 return
             
             # Check if we've already sent a notification at this time today
-            today_notifications = self.db_manager.get_todays_notifications()
-            current_hour = datetime.now().hour
-            
-            hourly_notifications = [
-                n for n in today_notifications 
-                if n["notification_type"] == "reminder" and 
-                datetime.fromisoformat(n["sent_at"]).hour == current_hour
-            ]
+            hour_start = datetime.now().replace(minute=0, second=0, microsecond=0)
+            already_sent = self.db_manager.has_notification(
+                "reminder",
+                since=hour_start.isoformat(),
+                until=(hour_start + timedelta(hours=1)).isoformat()
+            )
             
-            if hourly_notifications:
+            if already_sent:
                 logger.debug("Already sent notification this hour")
                 return
             
@@ -2,20 +2,226 @@
 Database storage utilities for tracking study progress and user data.
 """
 
+import asyncio
+import copy
 import sqlite3
 import logging
 import json
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+import hashlib
+import queue
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice
+from typing import Dict, Any, List, Optional, Iterator, Iterable
+from datetime import datetime, timedelta, date as date_cls
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 
+def encode_snapshot(payload: str) -> tuple:
+    """Return the content hash and zlib-compressed bytes for a text snapshot."""
+    data = payload.encode("utf-8")
+    return hashlib.sha256(data).hexdigest(), zlib.compress(data, 6)
+
+
+def decode_snapshot(blob: bytes) -> str:
+    """Decompress a snapshot produced by :func:`encode_snapshot`."""
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class ConnectionPool:
+    """Thread-safe pool of long-lived SQLite connections.
+    
+    Connections are opened lazily (up to ``max_connections``), configured once
+    with WAL journaling and tuned pragmas, and then reused for the life of the
+    process instead of being opened and closed on every query.
+    """
+    
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-8000",  # ~8 MB page cache per connection
+        "PRAGMA mmap_size=67108864",
+        "PRAGMA foreign_keys=ON",
+    )
+    
+    def __init__(self, db_path, max_connections: int = 4, cached_statements: int = 128,
+                 busy_timeout: float = 5.0):
+        self.db_path = str(db_path)
+        self.max_connections = max_connections
+        self.cached_statements = cached_statements
+        self.busy_timeout = busy_timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def _open(self) -> sqlite3.Connection:
+        """Open and configure a new connection."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Take a connection from the pool, opening one if the pool is not full."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            if len(self._all) < self.max_connections:
+                conn = self._open()
+                self._all.append(conn)
+                return conn
+        
+        # Pool exhausted - wait for another thread to release a connection
+        try:
+            return self._idle.get(timeout=self.busy_timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a pooled connection")
+    
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool."""
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put(conn)
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; commits on success and rolls back on error."""
+        conn = self.acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+    
+    def close(self):
+        """Close every connection owned by the pool."""
+        with self._lock:
+            self._closed = True
+            for conn in self._all:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._all.clear()
+        
+        while not self._idle.empty():
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+
+class SessionRow:
+    """Read-only, dict-like view of a ``study_sessions`` row.
+    
+    JSON columns are kept as text until first accessed, so callers that only
+    read scalar columns never pay for decoding ``raw_data``.
+    """
+    
+    __slots__ = ("_index", "_values", "_decoded")
+    
+    JSON_FIELDS = frozenset(("lessons_completed", "raw_data"))
+    BOOL_FIELDS = frozenset(("logged_in",))
+    
+    def __init__(self, index: Dict[str, int], values: tuple):
+        self._index = index  # Shared column -> position map for the whole result set
+        self._values = values
+        self._decoded: Optional[Dict[str, Any]] = None
+    
+    def __getitem__(self, key: str) -> Any:
+        value = self._values[self._index[key]]
+        
+        if key in self.JSON_FIELDS and value:
+            if self._decoded is None:
+                self._decoded = {}
+            if key not in self._decoded:
+                if isinstance(value, bytes):
+                    value = decode_snapshot(value)  # raw_data stored in raw_snapshots
+                self._decoded[key] = json.loads(value)
+            return self._decoded[key]
+        
+        if key in self.BOOL_FIELDS and value is not None:
+            return bool(value)
+        
+        return value
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self._index else default
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def keys(self) -> List[str]:
+        return list(self._index)
+    
+    def items(self) -> List[tuple]:
+        return [(key, self[key]) for key in self._index]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the row as a plain dict, decoding JSON columns."""
+        return dict(self.items())
+    
+    def copy(self) -> "SessionRow":
+        """Return a row sharing the raw values but with its own decoded JSON."""
+        row = SessionRow(self._index, self._values)
+        if self._decoded is not None:
+            row._decoded = copy.deepcopy(self._decoded)
+        return row
+    
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SessionRow):
+            other = other.to_dict()
+        return isinstance(other, dict) and self.to_dict() == other
+    
+    def __repr__(self) -> str:
+        return f"SessionRow({self.to_dict()!r})"
+
+
 class StudyProgressDB:
     """SQLite database for tracking study progress."""
     
-    def __init__(self, db_path: str):
+    # Tables each cached value is derived from, keyed by the cache key's first element
+    CACHE_DEPENDENCIES = {
+        "session": ("study_sessions",),
+        "weekly_stats": ("study_rollups",),
+        "has_studied_today": ("study_sessions",),
+        "streak_info": ("study_sessions", "study_streaks")
+    }
+    VERSIONED_TABLES = ("study_sessions", "study_streaks", "study_rollups")
+    
+    def __init__(self, db_path: str, pool_size: int = 4):
         if db_path == ":memory:":
             # For testing, use a temporary file instead of memory
             import tempfile
@@ -25,12 +231,100 @@ class StudyProgressDB:
             self.db_path = Path(db_path)
             self.db_path.parent.mkdir(parents=True, exist_ok=True)
             self._is_temp = False
+        self._pool = ConnectionPool(self.db_path, max_connections=pool_size)
         self._init_database()
+        
+        # Derived-value cache, invalidated per table when PRAGMA data_version moves
+        self._cache: Dict[tuple, Any] = {}
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+        self._cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._data_version = self._read_data_version()
+        self._table_versions = self._read_table_versions()
+    
+    def close(self):
+        """Close pooled connections."""
+        self._pool.close()
+        with self._cache_lock:
+            self._watch_conn.close()
+    
+    def _read_data_version(self) -> int:
+        return self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def _read_table_versions(self) -> Dict[str, int]:
+        return dict(self._watch_conn.execute("SELECT name, version FROM table_versions"))
+    
+    def invalidate_cache(self):
+        """Drop every cached derived value."""
+        with self._cache_lock:
+            self._invalidate_locked()
+    
+    def _invalidate_locked(self, tables: Iterable[str] = None):
+        if tables is None:
+            self._cache.clear()
+        else:
+            tables = set(tables)
+            for key in [key for key in self._cache if tables.intersection(self.CACHE_DEPENDENCIES[key[0]])]:
+                del self._cache[key]
+        self._cache_generation += 1
+        self._cache_stats["invalidations"] += 1
+    
+    @staticmethod
+    def _copy_cached(value: Any) -> Any:
+        if isinstance(value, dict):
+            return copy.deepcopy(value)
+        if isinstance(value, SessionRow):
+            return value.copy()
+        return value
+    
+    def _cached(self, key: tuple, compute):
+        """Return a cached value for ``key``, computing and storing it on a miss.
+        
+        The watch connection's data_version changes whenever any other
+        connection - ours or another process's - commits. Triggers bump a
+        per-table counter in ``table_versions``, so only values derived from
+        the tables that changed are dropped; settings writes keep the cache.
+        """
+        with self._cache_lock:
+            data_version = self._read_data_version()
+            if data_version != self._data_version:
+                self._data_version = data_version
+                table_versions = self._read_table_versions()
+                changed = [name for name, version in table_versions.items()
+                           if self._table_versions.get(name) != version]
+                self._table_versions = table_versions
+                if changed:
+                    self._invalidate_locked(changed)
+            
+            if key in self._cache:
+                self._cache_stats["hits"] += 1
+                return self._copy_cached(self._cache[key])
+            
+            self._cache_stats["misses"] += 1
+            generation = self._cache_generation
+        
+        value = compute()
+        
+        with self._cache_lock:
+            # Skip storing if a write invalidated the cache while we computed
+            if generation == self._cache_generation:
+                self._cache[key] = value
+        return self._copy_cached(value)
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Return cache hit/miss counters."""
+        with self._cache_lock:
+            stats = dict(self._cache_stats)
+            stats["entries"] = len(self._cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
     
     def _init_database(self):
         """Initialize database tables."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 # Main study tracking table
@@ -51,12 +345,32 @@ class StudyProgressDB:
                     )
                 """)
                 
+                # Older databases predate snapshot references
+                cursor.execute("PRAGMA table_info(study_sessions)")
+                if "raw_data_hash" not in [column[1] for column in cursor.fetchall()]:
+                    cursor.execute("ALTER TABLE study_sessions ADD COLUMN raw_data_hash TEXT")
+                
+                # Content-addressed, compressed raw_data snapshots shared across sessions
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS raw_snapshots (
+                        hash TEXT PRIMARY KEY,  -- sha256 of the JSON text
+                        data BLOB NOT NULL,  -- zlib-compressed JSON
+                        size INTEGER NOT NULL,  -- uncompressed size in bytes
+                        created_at TEXT NOT NULL
+                    )
+                """)
+                
                 # Create unique index on date
                 cursor.execute("""
                     CREATE UNIQUE INDEX IF NOT EXISTS idx_study_sessions_date 
                     ON study_sessions(date)
                 """)
                 
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_study_sessions_raw_data_hash 
+                    ON study_sessions(raw_data_hash)
+                """)
+                
                 # Notification tracking table
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS notifications (
@@ -69,6 +383,23 @@ class StudyProgressDB:
                     )
                 """)
                 
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_notifications_date_type_sent 
+                    ON notifications(date, notification_type, sent_at)
+                """)
+                
+                # Notifications moved out of the hot table by the retention job
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS notifications_archive (
+                        id INTEGER PRIMARY KEY,
+                        date TEXT NOT NULL,
+                        notification_type TEXT NOT NULL,
+                        message TEXT NOT NULL,
+                        sent_at TEXT NOT NULL,
+                        response TEXT
+                    )
+                """)
+                
                 # User goals and settings table
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS user_settings (
@@ -78,46 +409,201 @@ class StudyProgressDB:
                     )
                 """)
                 
+                # Materialized runs of consecutive study days, maintained on write
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS study_streaks (
+                        start_date TEXT PRIMARY KEY,
+                        end_date TEXT NOT NULL,
+                        length INTEGER NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_study_streaks_end 
+                    ON study_streaks(end_date)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_study_streaks_length 
+                    ON study_streaks(length)
+                """)
+                
+                # Day/week/month/year aggregates, maintained on write
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS study_rollups (
+                        granularity TEXT NOT NULL,  -- 'day', 'week', 'month', 'year'
+                        period_start TEXT NOT NULL,  -- YYYY-MM-DD (weeks start on Monday)
+                        sessions INTEGER NOT NULL DEFAULT 0,
+                        days_logged_in INTEGER NOT NULL DEFAULT 0,
+                        days_studied INTEGER NOT NULL DEFAULT 0,
+                        total_minutes INTEGER NOT NULL DEFAULT 0,
+                        total_points INTEGER NOT NULL DEFAULT 0,
+                        max_streak INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (granularity, period_start)
+                    ) WITHOUT ROWID
+                """)
+                
+                # Archived dashboard HTML, content-addressed, for re-extraction
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS page_snapshots (
+                        hash TEXT PRIMARY KEY,  -- sha256 of the HTML
+                        html BLOB NOT NULL,  -- zlib-compressed HTML
+                        size INTEGER NOT NULL,  -- uncompressed size in bytes
+                        created_at TEXT NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS page_captures (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT NOT NULL,  -- YYYY-MM-DD of the scrape
+                        url TEXT,
+                        snapshot_hash TEXT NOT NULL REFERENCES page_snapshots(hash),
+                        captured_at TEXT NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_page_captures_date 
+                    ON page_captures(date, captured_at)
+                """)
+                
+                # Latest sync result per account and day (multi-account households)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS account_sessions (
+                        account TEXT NOT NULL,
+                        date TEXT NOT NULL,  -- YYYY-MM-DD
+                        success BOOLEAN NOT NULL,
+                        logged_in BOOLEAN NOT NULL DEFAULT FALSE,
+                        study_minutes INTEGER NOT NULL DEFAULT 0,
+                        lessons_completed TEXT,  -- JSON array
+                        last_activity TEXT,
+                        streak_days INTEGER NOT NULL DEFAULT 0,
+                        total_points INTEGER NOT NULL DEFAULT 0,
+                        source TEXT,
+                        error TEXT,
+                        duration_seconds REAL,
+                        synced_at TEXT NOT NULL,
+                        PRIMARY KEY (account, date)
+                    ) WITHOUT ROWID
+                """)
+                
+                # Write counters for the cache: any insert, update or delete bumps the table's version
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS table_versions (
+                        name TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+                for table in self.VERSIONED_TABLES:
+                    cursor.execute("INSERT OR IGNORE INTO table_versions (name) VALUES (?)", (table,))
+                    for operation in ("INSERT", "UPDATE", "DELETE"):
+                        cursor.execute(f"""
+                            CREATE TRIGGER IF NOT EXISTS {table}_{operation.lower()}_version 
+                            AFTER {operation} ON {table} 
+                            BEGIN
+                                UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                            END
+                        """)
+                
                 conn.commit()
+                
+                # Databases created before streaks/rollups need a one-off backfill
+                cursor.execute("SELECT EXISTS(SELECT 1 FROM study_sessions)")
+                has_sessions = cursor.fetchone()[0]
+                cursor.execute("SELECT EXISTS(SELECT 1 FROM study_streaks)")
+                if has_sessions and not cursor.fetchone()[0]:
+                    self._rebuild_streaks(cursor)
+                    conn.commit()
+                cursor.execute("SELECT EXISTS(SELECT 1 FROM study_rollups)")
+                if has_sessions and not cursor.fetchone()[0]:
+                    self._rebuild_rollups(cursor)
+                    conn.commit()
+                
                 logger.info(f"Database initialized: {self.db_path}")
                 
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
             raise
     
+    UPSERT_SESSION_SQL = """
+        INSERT INTO study_sessions 
+        (date, logged_in, login_time, study_minutes, lessons_completed, 
+         last_activity, streak_days, total_points, raw_data_hash, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(date) DO UPDATE SET
+            logged_in = excluded.logged_in,
+            login_time = excluded.login_time,
+            study_minutes = excluded.study_minutes,
+            lessons_completed = excluded.lessons_completed,
+            last_activity = excluded.last_activity,
+            streak_days = excluded.streak_days,
+            total_points = excluded.total_points,
+            raw_data = NULL,
+            raw_data_hash = excluded.raw_data_hash,
+            updated_at = excluded.updated_at
+    """
+    
+    INSERT_SNAPSHOT_SQL = """
+        INSERT OR IGNORE INTO raw_snapshots (hash, data, size, created_at)
+        VALUES (?, ?, ?, ?)
+    """
+    
+    # Per-scrape timestamps; left out of snapshots so identical content shares one blob
+    SNAPSHOT_VOLATILE_FIELDS = frozenset(("date", "scraped_at"))
+    
+    @classmethod
+    def _session_row(cls, progress_data: Dict[str, Any], now: str) -> tuple:
+        """Build the study_sessions and raw_snapshots parameter tuples for a progress dict.
+        
+        The session day goes in the ``date`` column; the snapshot holds the
+        rest of the payload, so two scrapes with the same content share it.
+        """
+        date = progress_data.get("date", now)[:10]  # YYYY-MM-DD
+        
+        snapshot = {key: value for key, value in progress_data.items() if key not in cls.SNAPSHOT_VOLATILE_FIELDS}
+        raw_data_json = json.dumps(snapshot, sort_keys=True, separators=(",", ":"))
+        snapshot_hash, blob = encode_snapshot(raw_data_json)
+        
+        row = (
+            date,
+            progress_data.get("logged_in", False),
+            progress_data.get("login_time"),
+            progress_data.get("study_time_minutes", 0),
+            json.dumps(progress_data.get("lessons_completed", [])),
+            progress_data.get("last_activity"),
+            progress_data.get("streak_days", 0),
+            progress_data.get("total_points", 0),
+            snapshot_hash,
+            now,
+            now
+        )
+        return row, (snapshot_hash, blob, len(raw_data_json), now)
+    
     def save_study_session(self, progress_data: Dict[str, Any]) -> bool:
         """Save or update study session data."""
         try:
-            date = progress_data.get("date", datetime.now().isoformat())[:10]  # YYYY-MM-DD
+            now = datetime.now().isoformat()
+            row, snapshot = self._session_row(progress_data, now)
+            date = row[0]
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 
-                # Convert lessons list to JSON
-                lessons_json = json.dumps(progress_data.get("lessons_completed", []))
-                raw_data_json = json.dumps(progress_data)
+                cursor.execute("SELECT raw_data_hash FROM study_sessions WHERE date = ?", (date,))
+                previous = cursor.fetchone()
                 
-                now = datetime.now().isoformat()
+                # Insert or update session data, keeping the original created_at
+                cursor.execute(self.INSERT_SNAPSHOT_SQL, snapshot)
+                cursor.execute(self.UPSERT_SESSION_SQL, row)
                 
-                # Insert or update session data
-                cursor.execute("""
-                    INSERT OR REPLACE INTO study_sessions 
-                    (date, logged_in, login_time, study_minutes, lessons_completed, 
-                     last_activity, streak_days, total_points, raw_data, created_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 
-                            COALESCE((SELECT created_at FROM study_sessions WHERE date = ?), ?), ?)
-                """, (
-                    date,
-                    progress_data.get("logged_in", False),
-                    progress_data.get("login_time"),
-                    progress_data.get("study_time_minutes", 0),
-                    lessons_json,
-                    progress_data.get("last_activity"),
-                    progress_data.get("streak_days", 0),
-                    progress_data.get("total_points", 0),
-                    raw_data_json,
-                    date, now, now
-                ))
+                if previous and previous[0] and previous[0] != snapshot[0]:
+                    cursor.execute("""
+                        DELETE FROM raw_snapshots WHERE hash = ? AND NOT EXISTS (
+                            SELECT 1 FROM study_sessions WHERE raw_data_hash = ?
+                        )
+                    """, (previous[0], previous[0]))
+                
+                studied = bool(progress_data.get("logged_in", False)) and \
+                    (progress_data.get("study_time_minutes") or 0) > 0
+                self._update_streaks(cursor, date, studied)
+                self._update_rollups(cursor, date)
                 
                 conn.commit()
                 logger.info(f"Saved study session for {date}")
@@ -127,118 +613,508 @@ class StudyProgressDB:
             logger.error(f"Error saving study session: {e}")
             return False
     
-    def get_study_session(self, date: str = None) -> Optional[Dict[str, Any]]:
-        """Get study session data for a specific date."""
+    def save_study_sessions_bulk(self, sessions: Iterable[Dict[str, Any]],
+                                 chunk_size: int = 1000) -> Dict[str, Any]:
+        """Stream many study sessions into the database.
+        
+        Rows are upserted with ``executemany`` in one transaction per chunk, so
+        backfills never hold more than ``chunk_size`` rows in memory. The streak
+        table is rebuilt once at the end rather than updated row by row.
+        
+        If a row fails, the chunks committed before it stay imported and the
+        streaks and rollups are still rebuilt over them; the result's
+        ``error`` then describes the failure (it is None on success).
+        """
+        started = time.perf_counter()
+        total = 0
+        error = None
+        
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                try:
+                    iterator = iter(sessions)
+                    while True:
+                        now = datetime.now().isoformat()
+                        chunk = [self._session_row(data, now) for data in islice(iterator, chunk_size)]
+                        if not chunk:
+                            break
+                        
+                        cursor.executemany(self.INSERT_SNAPSHOT_SQL, [snapshot for _, snapshot in chunk])
+                        cursor.executemany(self.UPSERT_SESSION_SQL, [row for row, _ in chunk])
+                        conn.commit()
+                        total += len(chunk)
+                        logger.debug(f"Imported {total} study sessions so far")
+                
+                except Exception as e:
+                    conn.rollback()
+                    error = f"{type(e).__name__}: {e}"
+                    logger.error(f"Error bulk saving study sessions after {total} rows: {e}")
+                
+                # Derived tables must cover whatever was committed, even after an error
+                if total:
+                    self._prune_snapshots(cursor)
+                    self._rebuild_streaks(cursor)
+                    self._rebuild_rollups(cursor)
+                    conn.commit()
+                
+        except Exception as e:
+            error = error or f"{type(e).__name__}: {e}"
+            logger.error(f"Error rebuilding derived tables after bulk save: {e}")
+        
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Bulk saved {total} study sessions in {elapsed:.2f}s ({rate:.0f} rows/s)")
+        
+        return {
+            "rows": total,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rate, 1),
+            "error": error
+        }
+    
+    SESSION_COLUMNS = (
+        "id", "date", "logged_in", "login_time", "study_minutes", "lessons_completed",
+        "last_activity", "streak_days", "total_points", "raw_data", "created_at", "updated_at"
+    )
+    
+    RAW_DATA_SQL = """COALESCE(raw_data, (
+        SELECT data FROM raw_snapshots WHERE hash = study_sessions.raw_data_hash
+    )) AS raw_data"""
+    
+    def _session_select(self, columns: Optional[Iterable[str]]) -> tuple:
+        """Build a validated projection and the shared column index for SessionRow."""
+        if columns is None:
+            columns = self.SESSION_COLUMNS
+        else:
+            columns = tuple(columns)
+            unknown = set(columns) - set(self.SESSION_COLUMNS)
+            if unknown:
+                raise ValueError(f"Unknown study_sessions columns: {sorted(unknown)}")
+        
+        # raw_data is either legacy inline JSON or a compressed snapshot reference
+        expressions = [
+            self.RAW_DATA_SQL if name == "raw_data" else name for name in columns
+        ]
+        return ", ".join(expressions), {name: i for i, name in enumerate(columns)}
+    
+    def get_study_session(self, date: str = None,
+                          columns: Optional[Iterable[str]] = None) -> Optional[SessionRow]:
+        """Get study session data for a specific date.
+        
+        Pass ``columns`` to fetch only the fields the caller needs.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
         if not date:
-            date = datetime.now().strftime("%Y-%m-%d")
+            date = today
+        
+        if date == today:
+            key = ("session", date, tuple(columns) if columns is not None else None)
+            return self._cached(key, lambda: self._load_study_session(date, columns))
+        return self._load_study_session(date, columns)
+    
+    def _load_study_session(self, date: str,
+                            columns: Optional[Iterable[str]]) -> Optional[SessionRow]:
+        projection, index = self._session_select(columns)
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    SELECT * FROM study_sessions WHERE date = ?
+                cursor.execute(f"""
+                    SELECT {projection} FROM study_sessions WHERE date = ?
                 """, (date,))
                 
                 row = cursor.fetchone()
-                if row:
-                    columns = [desc[0] for desc in cursor.description]
-                    session_data = dict(zip(columns, row))
-                    
-                    # Parse JSON fields
-                    if session_data.get("lessons_completed"):
-                        session_data["lessons_completed"] = json.loads(session_data["lessons_completed"])
-                    if session_data.get("raw_data"):
-                        session_data["raw_data"] = json.loads(session_data["raw_data"])
-                    
-                    return session_data
-                
-                return None
+                return SessionRow(index, row) if row else None
                 
         except Exception as e:
             logger.error(f"Error getting study session for {date}: {e}")
             return None
     
-    def get_recent_sessions(self, days: int = 7) -> List[Dict[str, Any]]:
-        """Get study sessions for the last N days."""
+    def get_recent_sessions(self, days: int = 7,
+                            columns: Optional[Iterable[str]] = None) -> List[SessionRow]:
+        """Get study sessions for the last N days.
+        
+        Pass ``columns`` to fetch only the fields the caller needs.
+        """
+        projection, index = self._session_select(columns)
+        
         try:
             start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    SELECT * FROM study_sessions 
+                cursor.execute(f"""
+                    SELECT {projection} FROM study_sessions 
                     WHERE date >= ? 
                     ORDER BY date DESC
                 """, (start_date,))
                 
-                sessions = []
-                columns = [desc[0] for desc in cursor.description]
-                
-                for row in cursor.fetchall():
-                    session_data = dict(zip(columns, row))
-                    
-                    # Parse JSON fields
-                    if session_data.get("lessons_completed"):
-                        session_data["lessons_completed"] = json.loads(session_data["lessons_completed"])
-                    if session_data.get("raw_data"):
-                        session_data["raw_data"] = json.loads(session_data["raw_data"])
-                    
-                    sessions.append(session_data)
-                
-                return sessions
+                return [SessionRow(index, row) for row in cursor.fetchall()]
                 
         except Exception as e:
             logger.error(f"Error getting recent sessions: {e}")
             return []
     
-    def get_weekly_stats(self) -> Dict[str, Any]:
-        """Get weekly study statistics."""
+    def save_page_snapshot(self, html: str, date: str = None, url: str = None) -> Optional[str]:
+        """Archive the HTML a scrape was extracted from; returns its content hash.
+        
+        Identical pages are stored once and referenced by each capture.
+        """
         try:
-            week_start = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+            now = datetime.now().isoformat()
+            date = (date or now)[:10]
+            snapshot_hash, blob = encode_snapshot(html)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 
-                # Get basic stats
                 cursor.execute("""
-                    SELECT 
-                        COUNT(*) as days_logged_in,
-                        SUM(study_minutes) as total_minutes,
-                        AVG(study_minutes) as avg_minutes,
-                        MAX(streak_days) as max_streak,
-                        SUM(total_points) as total_points
-                    FROM study_sessions 
-                    WHERE date >= ? AND logged_in = 1
-                """, (week_start,))
-                
-                stats = dict(zip([desc[0] for desc in cursor.description], cursor.fetchone()))
-                
-                # Get daily breakdown
+                    INSERT OR IGNORE INTO page_snapshots (hash, html, size, created_at)
+                    VALUES (?, ?, ?, ?)
+                """, (snapshot_hash, blob, len(html), now))
                 cursor.execute("""
-                    SELECT date, study_minutes, logged_in 
-                    FROM study_sessions 
-                    WHERE date >= ? 
-                    ORDER BY date DESC
-                """, (week_start,))
+                    INSERT INTO page_captures (date, url, snapshot_hash, captured_at)
+                    VALUES (?, ?, ?, ?)
+                """, (date, url, snapshot_hash, now))
                 
-                daily_data = []
-                for row in cursor.fetchall():
-                    daily_data.append({
-                        "date": row[0],
-                        "study_minutes": row[1],
-                        "logged_in": bool(row[2])
-                    })
+                conn.commit()
+                return snapshot_hash
+                
+        except Exception as e:
+            logger.error(f"Error archiving page snapshot: {e}")
+            return None
+    
+    def get_page_snapshots(self, start: str = None, end: str = None) -> List[tuple]:
+        """Latest archived page per date as ``(date, compressed_html)`` pairs.
+        
+        The HTML stays compressed (see :func:`decode_snapshot`) so it can be
+        shipped cheaply to worker processes.
+        """
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    SELECT c.date, s.html
+                    FROM page_captures c
+                    JOIN page_snapshots s ON s.hash = c.snapshot_hash
+                    WHERE c.id = (
+                        SELECT id FROM page_captures latest
+                        WHERE latest.date = c.date
+                        ORDER BY latest.captured_at DESC, latest.id DESC
+                        LIMIT 1
+                    )
+                    AND c.date >= ? AND c.date <= ?
+                    ORDER BY c.date
+                """, (start or "0000-00-00", end or "9999-99-99"))
+                
+                return cursor.fetchall()
+                
+        except Exception as e:
+            logger.error(f"Error getting page snapshots: {e}")
+            return []
+    
+    def migrate_raw_snapshots(self, chunk_size: int = 500) -> Dict[str, int]:
+        """Move inline raw_data JSON into the deduplicated snapshot store.
+        
+        Safe to re-run; only rows that still carry inline JSON are touched.
+        """
+        result = {"sessions": 0, "bytes_before": 0, "bytes_after": 0}
+        
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
                 
-                stats["daily_breakdown"] = daily_data
-                stats["week_start"] = week_start
+                while True:
+                    cursor.execute("""
+                        SELECT id, raw_data FROM study_sessions 
+                        WHERE raw_data IS NOT NULL LIMIT ?
+                    """, (chunk_size,))
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    
+                    now = datetime.now().isoformat()
+                    snapshots, updates = [], []
+                    for session_id, raw_data in rows:
+                        snapshot_hash, blob = encode_snapshot(raw_data)
+                        snapshots.append((snapshot_hash, blob, len(raw_data), now))
+                        updates.append((snapshot_hash, session_id))
+                        result["bytes_before"] += len(raw_data)
+                    
+                    cursor.executemany(self.INSERT_SNAPSHOT_SQL, snapshots)
+                    cursor.executemany("""
+                        UPDATE study_sessions SET raw_data = NULL, raw_data_hash = ? WHERE id = ?
+                    """, updates)
+                    conn.commit()
+                    result["sessions"] += len(rows)
+                
+                self._prune_snapshots(cursor)
+                conn.commit()
                 
+                cursor.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM raw_snapshots")
+                result["bytes_after"] = cursor.fetchone()[0]
+                
+            logger.info(f"Migrated raw_data for {result['sessions']} sessions")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error migrating raw_data snapshots: {e}")
+            return result
+    
+    def vacuum(self):
+        """Rebuild the database file to reclaim free pages."""
+        with self._pool.connection() as conn:
+            conn.execute("VACUUM")
+    
+    def _prune_snapshots(self, cursor) -> int:
+        """Delete snapshots no longer referenced by any session."""
+        cursor.execute("""
+            DELETE FROM raw_snapshots WHERE hash NOT IN (
+                SELECT raw_data_hash FROM study_sessions WHERE raw_data_hash IS NOT NULL
+            )
+        """)
+        return cursor.rowcount
+    
+    GRANULARITIES = ("day", "week", "month", "year")
+    
+    ROLLUP_METRICS = (
+        "sessions", "days_logged_in", "days_studied", "total_minutes", "total_points", "max_streak"
+    )
+    
+    # SQL expressions mapping a day (YYYY-MM-DD) to the start of its period
+    PERIOD_START_SQL = {
+        "week": "date({col}, '-' || ((CAST(strftime('%w', {col}) AS INTEGER) + 6) % 7) || ' days')",
+        "month": "strftime('%Y-%m-01', {col})",
+        "year": "strftime('%Y-01-01', {col})"
+    }
+    
+    ROLLUP_AGGREGATE_SQL = """
+        SUM(sessions), SUM(days_logged_in), SUM(days_studied),
+        SUM(total_minutes), SUM(total_points), MAX(max_streak)
+    """
+    
+    @staticmethod
+    def _period_start(day: date_cls, granularity: str) -> date_cls:
+        """Return the first day of the period containing ``day``."""
+        if granularity == "week":
+            return day - timedelta(days=day.weekday())
+        if granularity == "month":
+            return day.replace(day=1)
+        if granularity == "year":
+            return day.replace(month=1, day=1)
+        return day
+    
+    @staticmethod
+    def _next_period(start: date_cls, granularity: str) -> date_cls:
+        """Return the first day of the period following the one starting at ``start``."""
+        if granularity == "week":
+            return start + timedelta(days=7)
+        if granularity == "month":
+            return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        if granularity == "year":
+            return start.replace(year=start.year + 1)
+        return start + timedelta(days=1)
+    
+    def _update_rollups(self, cursor, day: str):
+        """Recompute the day, week, month and year rollups touched by one saved day.
+        
+        Each level is re-aggregated from the level below it, so a write costs at
+        most 7 + 31 + 12 indexed rollup rows regardless of history length.
+        """
+        cursor.execute("""
+            INSERT OR REPLACE INTO study_rollups 
+            (granularity, period_start, sessions, days_logged_in, days_studied,
+             total_minutes, total_points, max_streak)
+            SELECT 'day', date, 1, logged_in = 1, logged_in = 1 AND COALESCE(study_minutes, 0) > 0,
+                   CASE WHEN logged_in = 1 THEN COALESCE(study_minutes, 0) ELSE 0 END,
+                   CASE WHEN logged_in = 1 THEN COALESCE(total_points, 0) ELSE 0 END,
+                   CASE WHEN logged_in = 1 THEN COALESCE(streak_days, 0) ELSE 0 END
+            FROM study_sessions WHERE date = ?
+        """, (day,))
+        
+        current = date_cls.fromisoformat(day)
+        for granularity, child in (("week", "day"), ("month", "day"), ("year", "month")):
+            start = self._period_start(current, granularity)
+            end = self._next_period(start, granularity)
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO study_rollups 
+                (granularity, period_start, sessions, days_logged_in, days_studied,
+                 total_minutes, total_points, max_streak)
+                SELECT ?, ?, {self.ROLLUP_AGGREGATE_SQL}
+                FROM study_rollups 
+                WHERE granularity = ? AND period_start >= ? AND period_start < ?
+                HAVING COUNT(*) > 0
+            """, (granularity, start.isoformat(), child, start.isoformat(), end.isoformat()))
+    
+    def _rebuild_rollups(self, cursor):
+        """Recompute every rollup level from study_sessions."""
+        cursor.execute("DELETE FROM study_rollups")
+        cursor.execute("""
+            INSERT INTO study_rollups 
+            (granularity, period_start, sessions, days_logged_in, days_studied,
+             total_minutes, total_points, max_streak)
+            SELECT 'day', date, 1, logged_in = 1, logged_in = 1 AND COALESCE(study_minutes, 0) > 0,
+                   CASE WHEN logged_in = 1 THEN COALESCE(study_minutes, 0) ELSE 0 END,
+                   CASE WHEN logged_in = 1 THEN COALESCE(total_points, 0) ELSE 0 END,
+                   CASE WHEN logged_in = 1 THEN COALESCE(streak_days, 0) ELSE 0 END
+            FROM study_sessions
+        """)
+        for granularity, expression in self.PERIOD_START_SQL.items():
+            period = expression.format(col="period_start")
+            cursor.execute(f"""
+                INSERT INTO study_rollups 
+                (granularity, period_start, sessions, days_logged_in, days_studied,
+                 total_minutes, total_points, max_streak)
+                SELECT ?, {period}, {self.ROLLUP_AGGREGATE_SQL}
+                FROM study_rollups WHERE granularity = 'day'
+                GROUP BY {period}
+            """, (granularity,))
+    
+    def rebuild_rollups(self) -> bool:
+        """Recompute the rollup tables from all study sessions."""
+        try:
+            with self._pool.connection() as conn:
+                self._rebuild_rollups(conn.cursor())
+                conn.commit()
+                return True
+                
+        except Exception as e:
+            logger.error(f"Error rebuilding rollups: {e}")
+            return False
+    
+    def _summarize(self, cursor, granularity: str, start: str, end: str) -> Optional[Dict[str, Any]]:
+        """Aggregate rollup rows of one granularity between two period starts (inclusive)."""
+        cursor.execute(f"""
+            SELECT {self.ROLLUP_AGGREGATE_SQL}, COUNT(*)
+            FROM study_rollups 
+            WHERE granularity = ? AND period_start >= ? AND period_start <= ?
+        """, (granularity, start, end))
+        row = cursor.fetchone()
+        if not row or not row[-1]:
+            return None
+        return dict(zip(self.ROLLUP_METRICS, row[:-1]))
+    
+    @staticmethod
+    def _finish_stats(metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Add derived averages to a rollup metrics dict."""
+        days = metrics.get("days_logged_in") or 0
+        metrics["avg_minutes"] = round(metrics["total_minutes"] / days, 1) if days else 0
+        return metrics
+    
+    def get_stats(self, start: str, end: str = None, granularity: str = "day") -> Dict[str, Any]:
+        """Get study statistics for an arbitrary date range from the rollup tables.
+        
+        ``start`` and ``end`` are inclusive YYYY-MM-DD dates. Periods entirely
+        inside the range are read straight from their rollup rows; only the
+        partial periods at either edge are aggregated from day rollups.
+        """
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        
+        end = end or datetime.now().strftime("%Y-%m-%d")
+        first_day = date_cls.fromisoformat(start)
+        last_day = date_cls.fromisoformat(end)
+        
+        stats = {
+            "start": first_day.isoformat(),
+            "end": last_day.isoformat(),
+            "granularity": granularity,
+            "totals": self._finish_stats({metric: 0 for metric in self.ROLLUP_METRICS}),
+            "periods": []
+        }
+        if last_day < first_day:
+            return stats
+        
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                periods = []
+                
+                first_period = self._period_start(first_day, granularity)
+                last_period = self._period_start(last_day, granularity)
+                last_period_end = self._next_period(last_period, granularity) - timedelta(days=1)
+                
+                # Leading partial period
+                full_start = first_period
+                if first_period < first_day:
+                    clipped_end = min(self._next_period(first_period, granularity) - timedelta(days=1), last_day)
+                    metrics = self._summarize(cursor, "day", first_day.isoformat(), clipped_end.isoformat())
+                    if metrics:
+                        periods.append((first_period.isoformat(), metrics))
+                    full_start = self._next_period(first_period, granularity)
+                
+                # Trailing partial period
+                trailing = None
+                full_end = last_period
+                if last_period_end > last_day and last_period >= full_start:
+                    metrics = self._summarize(cursor, "day", last_period.isoformat(), last_day.isoformat())
+                    if metrics:
+                        trailing = (last_period.isoformat(), metrics)
+                    full_end = last_period - timedelta(days=1)
+                
+                # Whole periods straight from their rollups
+                if full_start <= full_end:
+                    cursor.execute(f"""
+                        SELECT period_start, {", ".join(self.ROLLUP_METRICS)}
+                        FROM study_rollups 
+                        WHERE granularity = ? AND period_start >= ? AND period_start <= ?
+                        ORDER BY period_start
+                    """, (granularity, full_start.isoformat(), full_end.isoformat()))
+                    for row in cursor.fetchall():
+                        periods.append((row[0], dict(zip(self.ROLLUP_METRICS, row[1:]))))
+                
+                if trailing:
+                    periods.append(trailing)
+                
+                totals = stats["totals"]
+                for period_start, metrics in periods:
+                    for metric in self.ROLLUP_METRICS:
+                        if metric == "max_streak":
+                            totals[metric] = max(totals[metric], metrics[metric] or 0)
+                        else:
+                            totals[metric] += metrics[metric] or 0
+                    stats["periods"].append(self._finish_stats({"period_start": period_start, **metrics}))
+                
+                self._finish_stats(totals)
                 return stats
                 
         except Exception as e:
-            logger.error(f"Error getting weekly stats: {e}")
-            return {}
+            logger.error(f"Error getting stats for {start}..{end}: {e}")
+            return stats
+    
+    def get_weekly_stats(self) -> Dict[str, Any]:
+        """Get weekly study statistics."""
+        today = datetime.now().strftime("%Y-%m-%d")
+        return self._cached(("weekly_stats", today), self._load_weekly_stats)
+    
+    def _load_weekly_stats(self) -> Dict[str, Any]:
+        week_start = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+        
+        result = self.get_stats(week_start, granularity="day")
+        totals = result["totals"]
+        
+        stats = {
+            "days_logged_in": totals["days_logged_in"],
+            "total_minutes": totals["total_minutes"],
+            "avg_minutes": totals["avg_minutes"],
+            "max_streak": totals["max_streak"],
+            "total_points": totals["total_points"],
+            "daily_breakdown": [
+                {
+                    "date": period["period_start"],
+                    "study_minutes": period["total_minutes"],
+                    "logged_in": bool(period["days_logged_in"])
+                }
+                for period in reversed(result["periods"])
+            ],
+            "week_start": week_start
+        }
+        return stats
     
     def save_notification(self, notification_type: str, message: str, date: str = None) -> bool:
         """Save notification record."""
@@ -246,7 +1122,7 @@ class StudyProgressDB:
             if not date:
                 date = datetime.now().strftime("%Y-%m-%d")
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -261,12 +1137,106 @@ class StudyProgressDB:
             logger.error(f"Error saving notification: {e}")
             return False
     
+    def save_account_session(self, account: str, progress_data: Dict[str, Any] = None,
+                             duration: float = None, error: str = None) -> bool:
+        """Record one account's sync result for the day.
+        
+        A failed sync only updates the status columns, so the values from an
+        earlier successful sync that day are kept.
+        """
+        try:
+            now = datetime.now().isoformat()
+            
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                if progress_data is not None and not error:
+                    cursor.execute("""
+                        INSERT INTO account_sessions 
+                        (account, date, success, logged_in, study_minutes, lessons_completed,
+                         last_activity, streak_days, total_points, source, error, duration_seconds, synced_at)
+                        VALUES (?, ?, TRUE, ?, ?, ?, ?, ?, ?, ?, NULL, ?, ?)
+                        ON CONFLICT(account, date) DO UPDATE SET
+                            success = TRUE,
+                            logged_in = excluded.logged_in,
+                            study_minutes = excluded.study_minutes,
+                            lessons_completed = excluded.lessons_completed,
+                            last_activity = excluded.last_activity,
+                            streak_days = excluded.streak_days,
+                            total_points = excluded.total_points,
+                            source = excluded.source,
+                            error = NULL,
+                            duration_seconds = excluded.duration_seconds,
+                            synced_at = excluded.synced_at
+                    """, (
+                        account,
+                        progress_data.get("date", now)[:10],
+                        progress_data.get("logged_in", False),
+                        progress_data.get("study_time_minutes", 0),
+                        json.dumps(progress_data.get("lessons_completed", [])),
+                        progress_data.get("last_activity"),
+                        progress_data.get("streak_days", 0),
+                        progress_data.get("total_points", 0),
+                        progress_data.get("source"),
+                        duration,
+                        now
+                    ))
+                else:
+                    cursor.execute("""
+                        INSERT INTO account_sessions 
+                        (account, date, success, error, duration_seconds, synced_at)
+                        VALUES (?, ?, FALSE, ?, ?, ?)
+                        ON CONFLICT(account, date) DO UPDATE SET
+                            success = FALSE,
+                            error = excluded.error,
+                            duration_seconds = excluded.duration_seconds,
+                            synced_at = excluded.synced_at
+                    """, (account, now[:10], error or "No progress data", duration, now))
+                
+                conn.commit()
+                return True
+                
+        except Exception as e:
+            logger.error(f"Error saving sync result for account {account}: {e}")
+            return False
+    
+    def get_account_sessions(self, date: str = None) -> List[Dict[str, Any]]:
+        """Get every account's sync result for a date (defaults to today)."""
+        try:
+            if not date:
+                date = datetime.now().strftime("%Y-%m-%d")
+            
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    SELECT * FROM account_sessions 
+                    WHERE date = ? 
+                    ORDER BY account
+                """, (date,))
+                
+                columns = [desc[0] for desc in cursor.description]
+                results = []
+                
+                for row in cursor.fetchall():
+                    result = dict(zip(columns, row))
+                    result["success"] = bool(result["success"])
+                    result["logged_in"] = bool(result["logged_in"])
+                    result["lessons_completed"] = json.loads(result["lessons_completed"] or "[]")
+                    results.append(result)
+                
+                return results
+                
+        except Exception as e:
+            logger.error(f"Error getting account sessions: {e}")
+            return []
+    
     def get_todays_notifications(self) -> List[Dict[str, Any]]:
         """Get notifications sent today."""
         try:
             today = datetime.now().strftime("%Y-%m-%d")
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -287,10 +1257,91 @@ class StudyProgressDB:
             logger.error(f"Error getting today's notifications: {e}")
             return []
     
+    def count_notifications(self, notification_type: str, date: str = None,
+                            since: str = None, until: str = None) -> int:
+        """Count notifications of a type for a day, optionally within a sent_at window.
+        
+        ``since`` is inclusive and ``until`` exclusive; both are ISO timestamps.
+        Answered entirely from the (date, notification_type, sent_at) index.
+        """
+        try:
+            if not date:
+                date = datetime.now().strftime("%Y-%m-%d")
+            
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    SELECT COUNT(*) FROM notifications 
+                    WHERE date = ? AND notification_type = ? 
+                      AND sent_at >= COALESCE(?, '') AND sent_at < COALESCE(?, '9999')
+                """, (date, notification_type, since, until))
+                
+                return cursor.fetchone()[0]
+                
+        except Exception as e:
+            logger.error(f"Error counting {notification_type} notifications: {e}")
+            return 0
+    
+    def has_notification(self, notification_type: str, date: str = None,
+                         since: str = None, until: str = None) -> bool:
+        """Check whether a matching notification exists (see count_notifications)."""
+        try:
+            if not date:
+                date = datetime.now().strftime("%Y-%m-%d")
+            
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    SELECT EXISTS(
+                        SELECT 1 FROM notifications 
+                        WHERE date = ? AND notification_type = ? 
+                          AND sent_at >= COALESCE(?, '') AND sent_at < COALESCE(?, '9999')
+                    )
+                """, (date, notification_type, since, until))
+                
+                return bool(cursor.fetchone()[0])
+                
+        except Exception as e:
+            logger.error(f"Error checking {notification_type} notifications: {e}")
+            return False
+    
+    def prune_notifications(self, keep_days: int = 90, archive: bool = True) -> int:
+        """Remove notifications older than ``keep_days``, archiving them by default.
+        
+        Returns the number of notifications moved out of the notifications table.
+        """
+        try:
+            cutoff = (datetime.now() - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+            
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                if archive:
+                    cursor.execute("""
+                        INSERT OR REPLACE INTO notifications_archive 
+                        (id, date, notification_type, message, sent_at, response)
+                        SELECT id, date, notification_type, message, sent_at, response 
+                        FROM notifications WHERE date < ?
+                    """, (cutoff,))
+                
+                cursor.execute("DELETE FROM notifications WHERE date < ?", (cutoff,))
+                pruned = cursor.rowcount
+                
+                conn.commit()
+                if pruned:
+                    logger.info(f"Pruned {pruned} notifications older than {cutoff}")
+                return pruned
+                
+        except Exception as e:
+            logger.error(f"Error pruning notifications: {e}")
+            return 0
+    
     def set_user_setting(self, key: str, value: str) -> bool:
         """Set user setting."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -308,7 +1359,7 @@ class StudyProgressDB:
     def get_user_setting(self, key: str, default: str = None) -> Optional[str]:
         """Get user setting."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -325,7 +1376,10 @@ class StudyProgressDB:
     def has_studied_today(self) -> bool:
         """Check if user has studied today."""
         today = datetime.now().strftime("%Y-%m-%d")
-        session = self.get_study_session(today)
+        return self._cached(("has_studied_today", today), lambda: self._load_has_studied(today))
+    
+    def _load_has_studied(self, today: str) -> bool:
+        session = self.get_study_session(today, columns=("logged_in", "study_minutes"))
         
         if not session:
             return False
@@ -333,26 +1387,406 @@ class StudyProgressDB:
         return session.get("logged_in", False) and session.get("study_minutes", 0) > 0
     
     def get_current_streak(self) -> int:
-        """Calculate current study streak."""
+        """Get current study streak in days."""
+        return self.get_streak_info().get("current_streak", 0)
+    
+    def get_streak_info(self) -> Dict[str, Any]:
+        """Get current and longest streaks from the materialized streak table.
+        
+        The current streak is the run of consecutive study days ending at the
+        most recently recorded session; it is 0 if that session was not a
+        study day or the run ended before yesterday.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        return self._cached(("streak_info", today), lambda: self._load_streak_info(today))
+    
+    def _load_streak_info(self, today: str) -> Dict[str, Any]:
+        info = {
+            "current_streak": 0,
+            "current_streak_start": None,
+            "longest_streak": 0,
+            "longest_streak_start": None
+        }
+        
+        yesterday = (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+        
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("SELECT MAX(date) FROM study_sessions")
+                latest_date = cursor.fetchone()[0]
+                
+                cursor.execute("""
+                    SELECT start_date, end_date, length FROM study_streaks 
+                    ORDER BY end_date DESC LIMIT 1
+                """)
+                row = cursor.fetchone()
+                if row and latest_date and row[1] >= latest_date and row[1] >= yesterday:
+                    info["current_streak_start"] = row[0]
+                    info["current_streak"] = row[2]
+                
+                cursor.execute("""
+                    SELECT start_date, length FROM study_streaks 
+                    ORDER BY length DESC, start_date DESC LIMIT 1
+                """)
+                row = cursor.fetchone()
+                if row:
+                    info["longest_streak_start"] = row[0]
+                    info["longest_streak"] = row[1]
+                
+                return info
+                
+        except Exception as e:
+            logger.error(f"Error getting streak info: {e}")
+            return info
+    
+    def get_longest_streak(self, start: str, end: str) -> int:
+        """Longest run of consecutive study days within ``start``..``end`` (inclusive).
+        
+        Runs that cross either edge only count the days inside the range.
+        """
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT MAX(julianday(MIN(end_date, ?)) - julianday(MAX(start_date, ?)) + 1) 
+                    FROM study_streaks 
+                    WHERE end_date >= ? AND start_date <= ?
+                """, (end, start, start, end))
+                longest = cursor.fetchone()[0]
+                return int(longest) if longest else 0
+                
+        except Exception as e:
+            logger.error(f"Error getting longest streak: {e}")
+            return 0
+    
+    def rebuild_streaks(self) -> int:
+        """Recompute the streak table from all study sessions.
+        
+        Returns the number of streak runs written.
+        """
         try:
-            # Get recent sessions to calculate streak
-            sessions = self.get_recent_sessions(30)  # Look back 30 days
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                runs = self._rebuild_streaks(cursor)
+                conn.commit()
+                logger.info(f"Rebuilt {runs} study streaks")
+                return runs
+                
+        except Exception as e:
+            logger.error(f"Error rebuilding streaks: {e}")
+            return 0
+    
+    def _rebuild_streaks(self, cursor) -> int:
+        """Recompute study_streaks in a single ordered pass over study_sessions."""
+        cursor.execute("DELETE FROM study_streaks")
+        cursor.execute("""
+            SELECT date FROM study_sessions 
+            WHERE logged_in = 1 AND study_minutes > 0 
+            ORDER BY date
+        """)
+        
+        runs = []
+        for (day,) in cursor.fetchall():
+            current = date_cls.fromisoformat(day)
+            if runs and current - runs[-1][1] == timedelta(days=1):
+                runs[-1][1] = current
+            elif not runs or current != runs[-1][1]:
+                runs.append([current, current])
+        
+        cursor.executemany(
+            "INSERT INTO study_streaks (start_date, end_date, length) VALUES (?, ?, ?)",
+            [(start.isoformat(), end.isoformat(), (end - start).days + 1) for start, end in runs]
+        )
+        return len(runs)
+    
+    def _update_streaks(self, cursor, day: str, studied: bool):
+        """Incrementally merge or split streak runs for a single saved day."""
+        current = date_cls.fromisoformat(day)
+        
+        cursor.execute("""
+            SELECT start_date, end_date FROM study_streaks 
+            WHERE start_date <= ? AND end_date >= ?
+        """, (day, day))
+        containing = cursor.fetchone()
+        
+        if studied:
+            if containing:
+                return  # Already part of a run
             
-            if not sessions:
-                return 0
+            start, end = current, current
+            previous = (current - timedelta(days=1)).isoformat()
+            following = (current + timedelta(days=1)).isoformat()
             
-            # Sort by date (newest first)
-            sessions.sort(key=lambda x: x["date"], reverse=True)
+            cursor.execute("SELECT start_date FROM study_streaks WHERE end_date = ?", (previous,))
+            row = cursor.fetchone()
+            if row:
+                start = date_cls.fromisoformat(row[0])
+                cursor.execute("DELETE FROM study_streaks WHERE start_date = ?", (row[0],))
             
-            streak = 0
-            for session in sessions:
-                if session.get("logged_in") and session.get("study_minutes", 0) > 0:
-                    streak += 1
-                else:
-                    break  # Streak broken
+            cursor.execute("SELECT end_date FROM study_streaks WHERE start_date = ?", (following,))
+            row = cursor.fetchone()
+            if row:
+                end = date_cls.fromisoformat(row[0])
+                cursor.execute("DELETE FROM study_streaks WHERE start_date = ?", (following,))
             
-            return streak
+            cursor.execute(
+                "INSERT INTO study_streaks (start_date, end_date, length) VALUES (?, ?, ?)",
+                (start.isoformat(), end.isoformat(), (end - start).days + 1)
+            )
+        
+        elif containing:
+            # Day no longer counts - split the run around it
+            start = date_cls.fromisoformat(containing[0])
+            end = date_cls.fromisoformat(containing[1])
+            cursor.execute("DELETE FROM study_streaks WHERE start_date = ?", (containing[0],))
             
-        except Exception as e:
-            logger.error(f"Error calculating streak: {e}")
-            return 0
\ No newline at end of file
+            pieces = [
+                (start, current - timedelta(days=1)),
+                (current + timedelta(days=1), end)
+            ]
+            cursor.executemany(
+                "INSERT INTO study_streaks (start_date, end_date, length) VALUES (?, ?, ?)",
+                [(a.isoformat(), b.isoformat(), (b - a).days + 1) for a, b in pieces if a <= b]
+            )
+
+
+class AsyncStudyProgressDB:
+    """Asyncio facade over :class:`StudyProgressDB` for the MCP event loop.
+    
+    Reads run concurrently on a small thread pool (one thread per pooled
+    connection); writes are serialized on a dedicated writer thread so they
+    never contend with each other for SQLite's write lock.
+    """
+    
+    def __init__(self, db, read_workers: int = 4):
+        if not isinstance(db, StudyProgressDB):
+            db = StudyProgressDB(db, pool_size=read_workers + 1)
+        self.sync = db
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+    
+    async def _read(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, partial(func, *args, **kwargs))
+    
+    async def _write(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, partial(func, *args, **kwargs))
+    
+    async def close(self):
+        """Drain pending work and close the underlying database.
+        
+        The executors are drained in a worker thread so the event loop keeps
+        running while queued queries finish.
+        """
+        await asyncio.to_thread(self._writer.shutdown, wait=True)
+        await asyncio.to_thread(self._readers.shutdown, wait=True)
+        await asyncio.to_thread(self.sync.close)
+    
+    # Writes
+    
+    async def save_study_session(self, progress_data: Dict[str, Any]) -> bool:
+        return await self._write(self.sync.save_study_session, progress_data)
+    
+    async def save_study_sessions_bulk(self, sessions: Iterable[Dict[str, Any]],
+                                       chunk_size: int = 1000) -> Dict[str, Any]:
+        return await self._write(self.sync.save_study_sessions_bulk, sessions, chunk_size)
+    
+    async def save_account_session(self, account: str, progress_data: Dict[str, Any] = None,
+                                   duration: float = None, error: str = None) -> bool:
+        return await self._write(self.sync.save_account_session, account, progress_data, duration, error)
+    
+    async def save_notification(self, notification_type: str, message: str,
+                                date: str = None) -> bool:
+        return await self._write(self.sync.save_notification, notification_type, message, date)
+    
+    async def prune_notifications(self, keep_days: int = 90, archive: bool = True) -> int:
+        return await self._write(self.sync.prune_notifications, keep_days, archive)
+    
+    async def set_user_setting(self, key: str, value: str) -> bool:
+        return await self._write(self.sync.set_user_setting, key, value)
+    
+    async def rebuild_streaks(self) -> int:
+        return await self._write(self.sync.rebuild_streaks)
+    
+    async def rebuild_rollups(self) -> bool:
+        return await self._write(self.sync.rebuild_rollups)
+    
+    async def save_page_snapshot(self, html: str, date: str = None, url: str = None) -> Optional[str]:
+        return await self._write(self.sync.save_page_snapshot, html, date, url)
+    
+    async def migrate_raw_snapshots(self, chunk_size: int = 500) -> Dict[str, int]:
+        return await self._write(self.sync.migrate_raw_snapshots, chunk_size)
+    
+    # Reads
+    
+    async def get_study_session(self, date: str = None,
+                                columns: Optional[Iterable[str]] = None) -> Optional[SessionRow]:
+        return await self._read(self.sync.get_study_session, date, columns)
+    
+    async def get_recent_sessions(self, days: int = 7,
+                                  columns: Optional[Iterable[str]] = None) -> List[SessionRow]:
+        return await self._read(self.sync.get_recent_sessions, days, columns)
+    
+    async def get_weekly_stats(self) -> Dict[str, Any]:
+        return await self._read(self.sync.get_weekly_stats)
+    
+    async def get_stats(self, start: str, end: str = None, granularity: str = "day") -> Dict[str, Any]:
+        return await self._read(self.sync.get_stats, start, end, granularity)
+    
+    async def get_account_sessions(self, date: str = None) -> List[Dict[str, Any]]:
+        return await self._read(self.sync.get_account_sessions, date)
+    
+    async def get_todays_notifications(self) -> List[Dict[str, Any]]:
+        return await self._read(self.sync.get_todays_notifications)
+    
+    async def count_notifications(self, notification_type: str, date: str = None,
+                                  since: str = None, until: str = None) -> int:
+        return await self._read(self.sync.count_notifications, notification_type, date, since, until)
+    
+    async def has_notification(self, notification_type: str, date: str = None,
+                               since: str = None, until: str = None) -> bool:
+        return await self._read(self.sync.has_notification, notification_type, date, since, until)
+    
+    async def get_user_setting(self, key: str, default: str = None) -> Optional[str]:
+        return await self._read(self.sync.get_user_setting, key, default)
+    
+    async def has_studied_today(self) -> bool:
+        return await self._read(self.sync.has_studied_today)
+    
+    async def get_current_streak(self) -> int:
+        return await self._read(self.sync.get_current_streak)
+    
+    async def get_streak_info(self) -> Dict[str, Any]:
+        return await self._read(self.sync.get_streak_info)
+    
+    async def get_longest_streak(self, start: str, end: str) -> int:
+        return await self._read(self.sync.get_longest_streak, start, end)
+    
+    def cache_stats(self) -> Dict[str, int]:
+        return self.sync.cache_stats()
+
+
+def iter_export_file(path: str, file_format: str = None) -> Iterator[Dict[str, Any]]:
+    """Lazily read study sessions from a JSON, JSON Lines or CSV export.
+    
+    Accepts both scraped progress dicts and rows exported from
+    ``study_sessions`` (``study_minutes`` is mapped to ``study_time_minutes``).
+    """
+    import csv
+    
+    path = Path(path)
+    file_format = (file_format or path.suffix.lstrip(".")).lower()
+    
+    def normalize(record: Dict[str, Any]) -> Dict[str, Any]:
+        if "study_time_minutes" not in record and "study_minutes" in record:
+            record["study_time_minutes"] = record.pop("study_minutes")
+        return record
+    
+    if file_format == "csv":
+        int_fields = ("study_time_minutes", "streak_days", "total_points")
+        with open(path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                record = normalize({k: v for k, v in record.items() if v not in (None, "")})
+                for field in int_fields:
+                    if field in record:
+                        record[field] = int(float(record[field]))
+                if "logged_in" in record:
+                    record["logged_in"] = str(record["logged_in"]).strip().lower() in ("1", "true", "yes")
+                if "lessons_completed" in record:
+                    lessons = record["lessons_completed"]
+                    record["lessons_completed"] = json.loads(lessons) if lessons.startswith("[") \
+                        else [lesson.strip() for lesson in lessons.split(";") if lesson.strip()]
+                yield record
+    
+    elif file_format in ("jsonl", "ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield normalize(json.loads(line))
+    
+    elif file_format == "json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for record in (data if isinstance(data, list) else data.get("sessions", [])):
+            yield normalize(record)
+    
+    else:
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line maintenance entry point for the study progress database."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Study progress database maintenance")
+    parser.add_argument("--db", default="./synthesis_data.db", help="Path to the SQLite database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    subparsers.add_parser("rebuild-streaks", help="Recompute the materialized streak table")
+    subparsers.add_parser("rebuild-rollups", help="Recompute the day/week/month/year rollups")
+    
+    migrate_parser = subparsers.add_parser(
+        "migrate-snapshots", help="Move inline raw_data into the compressed snapshot store"
+    )
+    migrate_parser.add_argument("--vacuum", action="store_true",
+                                help="Reclaim freed pages after migrating")
+    
+    prune_parser = subparsers.add_parser("prune-notifications", help="Archive old notifications")
+    prune_parser.add_argument("--keep-days", type=int, default=90,
+                              help="Keep notifications from the last N days")
+    prune_parser.add_argument("--no-archive", action="store_true",
+                              help="Delete instead of moving to notifications_archive")
+    
+    import_parser = subparsers.add_parser("import", help="Bulk import a JSON/JSONL/CSV history export")
+    import_parser.add_argument("path", help="Export file to import")
+    import_parser.add_argument("--format", choices=["json", "jsonl", "csv"],
+                               help="File format (defaults to the file extension)")
+    import_parser.add_argument("--chunk-size", type=int, default=1000,
+                               help="Rows per transaction")
+    
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    
+    db = StudyProgressDB(args.db)
+    try:
+        if args.command == "rebuild-streaks":
+            runs = db.rebuild_streaks()
+            info = db.get_streak_info()
+            print(f"Rebuilt {runs} streaks; current {info['current_streak']} days, "
+                  f"longest {info['longest_streak']} days")
+        
+        elif args.command == "rebuild-rollups":
+            db.rebuild_rollups()
+            print("Rebuilt study rollups")
+        
+        elif args.command == "migrate-snapshots":
+            result = db.migrate_raw_snapshots()
+            if args.vacuum:
+                db.vacuum()
+            print(f"Migrated {result['sessions']} sessions: {result['bytes_before']} bytes of "
+                  f"raw_data now stored in {result['bytes_after']} compressed bytes")
+        
+        elif args.command == "prune-notifications":
+            pruned = db.prune_notifications(args.keep_days, archive=not args.no_archive)
+            print(f"Pruned {pruned} notifications")
+        
+        elif args.command == "import":
+            result = db.save_study_sessions_bulk(
+                iter_export_file(args.path, args.format),
+                chunk_size=args.chunk_size
+            )
+            if result["error"]:
+                print(f"Import stopped after {result['rows']} sessions: {result['error']}", file=sys.stderr)
+                return 1
+            print(f"Imported {result['rows']} sessions in {result['seconds']}s "
+                  f"({result['rows_per_second']} rows/s)")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
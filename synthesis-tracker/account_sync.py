@@ -0,0 +1,79 @@
+"""
+Concurrent progress sync for households with several Synthesis accounts.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Callable, Awaitable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# async (account) -> (progress_data, None) on success or (None, error message)
+ScrapeFunc = Callable[[Dict[str, str]], Awaitable[Tuple[Optional[Dict[str, Any]], Optional[str]]]]
+
+
+class AccountSyncOrchestrator:
+    """Scrape several accounts at once, each in its own browser context.
+    
+    At most ``max_concurrency`` accounts run together and each has
+    ``deadline_seconds`` to finish; a slow or failing account does not hold up
+    the rest. Every account's result is stored with
+    ``save_account_session``, so a full refresh takes about as long as the
+    slowest account rather than the sum of all of them.
+    """
+    
+    def __init__(self, scrape: ScrapeFunc, db, max_concurrency: int = 3,
+                 deadline_seconds: float = 120):
+        self.scrape = scrape
+        self.db = db
+        self.max_concurrency = max(1, max_concurrency)
+        self.deadline_seconds = deadline_seconds
+    
+    async def sync_all(self, accounts: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Sync every account and summarize the run."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        started = time.perf_counter()
+        
+        results = await asyncio.gather(*(self._sync_account(account, semaphore) for account in accounts))
+        
+        elapsed = time.perf_counter() - started
+        logger.info(f"Synced {len(results)} accounts in {elapsed:.1f}s")
+        
+        return {
+            "accounts": results,
+            "succeeded": sum(1 for result in results if result["success"]),
+            "failed": sum(1 for result in results if not result["success"]),
+            "seconds": round(elapsed, 2),
+            "sequential_seconds": round(sum(result["seconds"] for result in results), 2)
+        }
+    
+    async def _sync_account(self, account: Dict[str, str], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        name = account["name"]
+        
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                progress_data, error = await asyncio.wait_for(self.scrape(account), self.deadline_seconds)
+            except asyncio.TimeoutError:
+                progress_data, error = None, f"Timed out after {self.deadline_seconds}s"
+            except Exception as e:
+                logger.error(f"Error syncing account {name}: {e}")
+                progress_data, error = None, str(e)
+            duration = time.perf_counter() - started
+        
+        if error:
+            logger.warning(f"Sync failed for account {name}: {error}")
+        
+        await self.db.save_account_session(name, progress_data, duration, error)
+        
+        result = {"account": name, "success": error is None, "seconds": round(duration, 2)}
+        if error:
+            result["error"] = error
+        else:
+            result.update({
+                "study_minutes": progress_data.get("study_time_minutes", 0),
+                "lessons_completed": len(progress_data.get("lessons_completed", [])),
+                "streak_days": progress_data.get("streak_days", 0)
+            })
+        return result
@@ -0,0 +1,183 @@
+"""
+Process-wide Chromium manager that keeps one warm browser for scraping.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+try:
+    import psutil
+except ImportError:  # Memory-based recycling is disabled without psutil
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserManager:
+    """Keep a single Chromium instance warm and hand out isolated contexts.
+    
+    Each scrape gets a fresh ``BrowserContext`` (its own cookies and storage)
+    from the shared browser instead of launching Chromium itself. The browser
+    is recycled after ``max_uses`` contexts or when the browser processes
+    exceed ``max_memory_mb``; a retired browser is closed once its last
+    context is released.
+    """
+    
+    LAUNCH_ARGS = ['--no-sandbox', '--disable-dev-shm-usage']
+    
+    def __init__(self, headless: bool = True, max_uses: int = 20,
+                 max_memory_mb: Optional[int] = None):
+        self.headless = headless
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._uses = 0
+        self._active: Dict[Browser, int] = {}
+        self._owners: Dict[BrowserContext, Browser] = {}
+        self._lock = asyncio.Lock()
+        self._warm_task: Optional[asyncio.Task] = None
+        
+        self.stats = {"launches": 0, "contexts": 0, "recycles": 0}
+    
+    async def start(self):
+        """Launch the browser if it is not already running."""
+        async with self._lock:
+            await self._ensure_browser()
+    
+    def prewarm(self):
+        """Start launching the browser in the background."""
+        if self._warm_task is None or self._warm_task.done():
+            self._warm_task = asyncio.create_task(self._prewarm())
+    
+    async def _prewarm(self):
+        try:
+            await self.start()
+            logger.info("Browser pre-warmed")
+        except Exception as e:
+            logger.warning(f"Browser pre-warm failed, will retry on first use: {e}")
+    
+    async def _ensure_browser(self):
+        """Start Playwright and Chromium as needed. Caller holds the lock."""
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        
+        if self._browser is None or not self._browser.is_connected():
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=self.LAUNCH_ARGS
+            )
+            self._uses = 0
+            self.stats["launches"] += 1
+            logger.info("Browser launched")
+    
+    def _memory_mb(self) -> Optional[float]:
+        """Resident memory of all child processes (Playwright driver and Chromium)."""
+        if psutil is None:
+            return None
+        
+        try:
+            children = psutil.Process().children(recursive=True)
+            return sum(child.memory_info().rss for child in children) / (1024 * 1024)
+        except psutil.Error:
+            return None
+    
+    def _needs_recycle(self) -> bool:
+        if self._uses >= self.max_uses:
+            return True
+        
+        if self.max_memory_mb:
+            memory = self._memory_mb()
+            if memory is not None and memory > self.max_memory_mb:
+                logger.info(f"Browser memory {memory:.0f} MB exceeds {self.max_memory_mb} MB")
+                return True
+        
+        return False
+    
+    async def _retire_current(self):
+        """Stop handing out the current browser. Caller holds the lock."""
+        browser, self._browser = self._browser, None
+        self.stats["recycles"] += 1
+        logger.info(f"Recycling browser after {self._uses} uses")
+        
+        if not self._active.get(browser):
+            self._active.pop(browser, None)
+            await self._close_browser(browser)
+    
+    async def _close_browser(self, browser: Browser):
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.error(f"Error closing browser: {e}")
+    
+    async def acquire_context(self, **context_options: Any) -> BrowserContext:
+        """Create a fresh, isolated context on the warm browser."""
+        async with self._lock:
+            if self._browser is not None and self._needs_recycle():
+                await self._retire_current()
+            await self._ensure_browser()
+            
+            browser = self._browser
+            self._uses += 1
+            self._active[browser] = self._active.get(browser, 0) + 1
+        
+        try:
+            context = await browser.new_context(**context_options)
+        except Exception:
+            await self._release_browser(browser)
+            raise
+        
+        self._owners[context] = browser
+        self.stats["contexts"] += 1
+        return context
+    
+    async def release_context(self, context: BrowserContext):
+        """Close a context obtained from :meth:`acquire_context`."""
+        browser = self._owners.pop(context, None)
+        
+        try:
+            await context.close()
+        except Exception as e:
+            logger.error(f"Error closing browser context: {e}")
+        
+        if browser is not None:
+            await self._release_browser(browser)
+    
+    async def _release_browser(self, browser: Browser):
+        async with self._lock:
+            self._active[browser] = self._active.get(browser, 1) - 1
+            if browser is not self._browser and self._active[browser] <= 0:
+                self._active.pop(browser, None)
+                await self._close_browser(browser)
+    
+    @asynccontextmanager
+    async def context(self, **context_options: Any):
+        """Async context manager around acquire_context/release_context."""
+        context = await self.acquire_context(**context_options)
+        try:
+            yield context
+        finally:
+            await self.release_context(context)
+    
+    async def close(self):
+        """Close every browser and stop Playwright."""
+        if self._warm_task and not self._warm_task.done():
+            self._warm_task.cancel()
+        
+        async with self._lock:
+            browsers = set(self._active) | ({self._browser} if self._browser else set())
+            for browser in browsers:
+                await self._close_browser(browser)
+            self._active.clear()
+            self._owners.clear()
+            self._browser = None
+            
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        
+        logger.info("Browser manager closed")
@@ -3,7 +3,7 @@ Configuration for Synthesis Tracker MCP server.
 """
 
 import os
-from typing import Optional
+from typing import Optional, List, Dict
 
 
 class SynthesisConfig:
@@ -16,25 +16,76 @@ class SynthesisConfig:
         self.email_username = os.getenv("EMAIL_USERNAME", "")
         self.email_password = os.getenv("EMAIL_PASSWORD", "")
         self.email_use_ssl = os.getenv("EMAIL_USE_SSL", "true").lower() == "true"
+        # Wait this long for a login code, using IMAP IDLE when the server supports it
+        self.login_code_timeout = int(os.getenv("LOGIN_CODE_TIMEOUT", "120"))
+        self.email_idle_enabled = os.getenv("EMAIL_IDLE_ENABLED", "true").lower() == "true"
+        # The IMAP connection is kept open between checks: per-command timeout, NOOP check
+        # after EMAIL_KEEPALIVE_SECONDS idle, reconnect after EMAIL_MAX_IDLE_SECONDS idle
+        self.email_timeout = int(os.getenv("EMAIL_TIMEOUT", "30"))
+        self.email_keepalive_seconds = int(os.getenv("EMAIL_KEEPALIVE_SECONDS", "60"))
+        self.email_max_idle_seconds = int(os.getenv("EMAIL_MAX_IDLE_SECONDS", "900"))
         
         # Synthesis.com settings
         self.synthesis_email = os.getenv("SYNTHESIS_EMAIL", "")
         self.synthesis_url = os.getenv("SYNTHESIS_URL", "https://synthesis.com")
         
+        # Several children: SYNTHESIS_ACCOUNTS=name:email,name:email (the first is the primary account)
+        self.accounts = self._parse_accounts(os.getenv("SYNTHESIS_ACCOUNTS", ""), self.synthesis_email)
+        self.sync_max_concurrency = int(os.getenv("SYNC_MAX_CONCURRENCY", "3"))
+        self.account_sync_deadline_seconds = int(os.getenv("ACCOUNT_SYNC_DEADLINE_SECONDS", "120"))
+        
+        # Saved browser session (encrypted with a Fernet key) to skip email-code logins
+        self.session_state_path = os.getenv("SESSION_STATE_PATH", "./synthesis_session.enc")
+        self.session_encryption_key = os.getenv("SESSION_ENCRYPTION_KEY", "")
+        
         # Database settings
         self.database_path = os.getenv("DATABASE_PATH", "./synthesis_data.db")
         
         # Notification settings
         self.notification_enabled = os.getenv("NOTIFICATION_ENABLED", "true").lower() == "true"
         self.notification_times = os.getenv("NOTIFICATION_TIMES", "09:00,15:00,19:00")
+        self.notification_retention_days = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
         
         # Browser automation settings
         self.headless_browser = os.getenv("HEADLESS_BROWSER", "true").lower() == "true"
         self.browser_timeout = int(os.getenv("BROWSER_TIMEOUT", "30"))
+        self.extraction_deadline_ms = int(os.getenv("EXTRACTION_DEADLINE_MS", "5000"))
+        self.capture_api_responses = os.getenv("CAPTURE_API_RESPONSES", "true").lower() == "true"
+        self.archive_page_snapshots = os.getenv("ARCHIVE_PAGE_SNAPSHOTS", "true").lower() == "true"
+        self.selector_explore_every = int(os.getenv("SELECTOR_EXPLORE_EVERY", "10"))
+        self.http_fast_path_enabled = os.getenv("HTTP_FAST_PATH_ENABLED", "true").lower() == "true"
+        self.browser_max_uses = int(os.getenv("BROWSER_MAX_USES", "20"))
+        self.browser_max_memory_mb = int(os.getenv("BROWSER_MAX_MEMORY_MB", "800"))
+        
+        # Network blocking while scraping (comma-separated lists)
+        self.resource_blocking_enabled = os.getenv("RESOURCE_BLOCKING_ENABLED", "true").lower() == "true"
+        self.blocked_resource_types = self._split(os.getenv("BLOCKED_RESOURCE_TYPES", "image,media,font"))
+        self.blocked_domains = self._split(os.getenv("BLOCKED_DOMAINS", ""))
+        self.allowed_domains = self._split(os.getenv("ALLOWED_DOMAINS", ""))
         
         # Study tracking settings
         self.minimum_study_minutes = int(os.getenv("MINIMUM_STUDY_MINUTES", "15"))
         self.study_goal_minutes = int(os.getenv("STUDY_GOAL_MINUTES", "30"))
+    
+    @staticmethod
+    def _split(value: str) -> List[str]:
+        return [item.strip() for item in value.split(",") if item.strip()]
+    
+    @classmethod
+    def _parse_accounts(cls, value: str, default_email: str) -> List[Dict[str, str]]:
+        accounts = []
+        for item in cls._split(value):
+            name, _, email = item.partition(":")
+            if email:
+                accounts.append({"name": name.strip(), "email": email.strip()})
+        return accounts or [{"name": "default", "email": default_email}]
+    
+    def session_state_path_for(self, account_name: str) -> str:
+        """Saved-session file for an account; the primary account keeps SESSION_STATE_PATH."""
+        if account_name == self.accounts[0]["name"]:
+            return self.session_state_path
+        root, ext = os.path.splitext(self.session_state_path)
+        return f"{root}_{account_name}{ext}"
 
 
 # Global config instance
@@ -0,0 +1,299 @@
+"""
+Browser-independent extraction of study progress fields.
+
+The selector table and the text parsers are shared by the live browser path
+(``SynthesisClient``, which gathers candidate texts in the page) and by
+``HtmlExtractor``, which gathers them from saved HTML with a fast parser.
+"""
+
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # Offline extraction is unavailable without selectolax
+    LexborHTMLParser = None
+
+from parsing import parse_duration, parse_count
+
+logger = logging.getLogger(__name__)
+
+# Selector candidates per progress field, in priority order. Entries of the
+# form text=/.../ are regular expressions matched against visible text.
+FIELD_SELECTORS = {
+    "study_time": [
+        'text=/\\d+\\s*(minutes?|mins?|hours?)/',
+        '[data-testid*="time"]',
+        '.study-time',
+        '.time-spent',
+        '[class*="duration"]'
+    ],
+    "lessons": [
+        '.lesson-item',
+        '.completed-lesson',
+        '[data-testid*="lesson"]',
+        '.lesson-title'
+    ],
+    "last_activity": [
+        'text=/last\\s+(active|seen|login)/',
+        '[data-testid*="activity"]',
+        '.last-activity',
+        '.activity-time'
+    ],
+    "streak": [
+        'text=/\\d+\\s*day\\s*streak/',
+        '[data-testid*="streak"]',
+        '.streak',
+        '.consecutive-days'
+    ],
+    "points": [
+        'text=/\\d+\\s*(points?|pts?)/',
+        '[data-testid*="points"]',
+        '.points',
+        '.score',
+        '.total-score'
+    ]
+}
+
+# progress_data key filled by each extracted field
+PROGRESS_FIELDS = {
+    "study_time": "study_time_minutes",
+    "lessons": "lessons_completed",
+    "last_activity": "last_activity",
+    "streak": "streak_days",
+    "points": "total_points"
+}
+
+
+def new_progress_data(date: str = None) -> Dict[str, Any]:
+    """Progress dict with every field at its 'nothing found' default."""
+    return {
+        "date": date or datetime.now().isoformat(),
+        "logged_in": True,
+        "study_time_minutes": 0,
+        "lessons_completed": [],
+        "last_activity": None,
+        "streak_days": 0,
+        "total_points": 0
+    }
+
+
+def extract_study_time(candidates: List[List[str]]) -> Optional[int]:
+    """Extract today's study time in minutes."""
+    try:
+        for texts in candidates:
+            if not texts:
+                continue
+            
+            # Parse time from text
+            minutes = parse_time_to_minutes(texts[0])
+            if minutes is not None:
+                return minutes
+        
+        return None
+    
+    except Exception as e:
+        logger.error(f"Error extracting study time: {e}")
+        return None
+
+
+def parse_time_to_minutes(time_text: str) -> Optional[int]:
+    """Parse time text into minutes (0 is a real reading, None means no duration)."""
+    return parse_duration(time_text)
+
+
+def extract_lessons(candidates: List[List[str]]) -> List[str]:
+    """Extract completed lessons."""
+    for texts in candidates:
+        if texts:
+            return texts[:5]  # Return up to 5 recent lessons
+    
+    return []
+
+
+def extract_last_activity(candidates: List[List[str]]) -> Optional[str]:
+    """Extract last activity timestamp."""
+    for texts in candidates:
+        if texts:
+            return texts[0]
+    
+    return None
+
+
+def extract_streak(candidates: List[List[str]]) -> Optional[int]:
+    """Extract streak days."""
+    try:
+        for texts in candidates:
+            if not texts:
+                continue
+            
+            # Extract number from streak text
+            count = parse_count(texts[0])
+            if count is not None:
+                return count
+        
+        return None
+    
+    except Exception as e:
+        logger.error(f"Error extracting streak: {e}")
+        return None
+
+
+def extract_points(candidates: List[List[str]]) -> Optional[int]:
+    """Extract total points or score."""
+    try:
+        for texts in candidates:
+            if not texts:
+                continue
+            
+            # Extract number from points text
+            count = parse_count(texts[0])
+            if count is not None:
+                return count
+        
+        return None
+    
+    except Exception as e:
+        logger.error(f"Error extracting points: {e}")
+        return None
+
+
+FIELD_PARSERS = {
+    "study_time": extract_study_time,
+    "lessons": extract_lessons,
+    "last_activity": extract_last_activity,
+    "streak": extract_streak,
+    "points": extract_points
+}
+
+
+def parse_candidates(field: str, selectors: List[str],
+                     candidates: List[List[str]]) -> Tuple[Any, Optional[str]]:
+    """Return ``(value, selector)`` for the first candidate whose text parses."""
+    parser = FIELD_PARSERS[field]
+    for selector, texts in zip(selectors, candidates):
+        if texts:
+            value = parser([texts])
+            if value is not None:
+                return value, selector
+    return None, None
+
+
+class HtmlExtractor:
+    """Extract progress fields from saved page HTML, without a browser.
+    
+    Mirrors the in-page extraction script: CSS selectors return the text of
+    each matching element, ``text=/re/`` selectors return the text of every
+    element whose own text matches. Uses selectolax's Lexbor parser.
+    """
+    
+    SKIP_TAGS = {"script", "style", "noscript", "template"}
+    
+    def __init__(self, field_selectors: Dict[str, List[str]] = None, max_texts: int = 20):
+        if LexborHTMLParser is None:
+            raise RuntimeError("Offline extraction requires the selectolax package")
+        
+        self.field_selectors = field_selectors or FIELD_SELECTORS
+        self.max_texts = max_texts
+        self._compiled = {
+            field: [self._compile(selector) for selector in selectors]
+            for field, selectors in self.field_selectors.items()
+        }
+    
+    @staticmethod
+    def _compile(selector: str):
+        match = re.match(r'^text=/(.*)/([a-z]*)$', selector)
+        if not match:
+            return selector
+        flags = re.IGNORECASE if "i" in match.group(2) else 0
+        return re.compile(match.group(1), flags)
+    
+    @staticmethod
+    def _text(node) -> str:
+        return " ".join(node.text(separator=" ").split())
+    
+    def _by_text(self, root, regex) -> List[str]:
+        texts = []
+        for node in root.traverse(include_text=True):
+            if node.tag != "-text" or node.parent is None or node.parent.tag in self.SKIP_TAGS:
+                continue
+            if regex.search(node.text_content or ""):
+                texts.append(self._text(node.parent))
+                if len(texts) >= self.max_texts:
+                    break
+        return texts
+    
+    def _probe(self, root, candidate) -> List[str]:
+        try:
+            if isinstance(candidate, str):
+                texts = [self._text(node) for node in root.css(candidate)]
+            else:
+                texts = self._by_text(root, candidate)
+        except Exception as e:
+            logger.debug(f"Selector failed: {e}")
+            return []
+        return [text for text in texts if text][:self.max_texts]
+    
+    def candidates(self, html: str) -> Dict[str, List[List[str]]]:
+        """Texts matched by each selector candidate, per field (like the in-page script)."""
+        tree = LexborHTMLParser(html)
+        root = tree.body or tree.root
+        if root is None:
+            return {field: [[] for _ in compiled] for field, compiled in self._compiled.items()}
+        
+        return {
+            field: [self._probe(root, candidate) for candidate in compiled]
+            for field, compiled in self._compiled.items()
+        }
+    
+    def extract(self, html: str, date: str = None) -> Dict[str, Any]:
+        """Build a progress dict from page HTML."""
+        progress_data = new_progress_data(date)
+        candidates = self.candidates(html)
+        
+        for field, selectors in self.field_selectors.items():
+            value, _ = parse_candidates(field, selectors, candidates.get(field, []))
+            if value is not None:
+                progress_data[PROGRESS_FIELDS[field]] = value
+        
+        progress_data["source"] = "html"
+        return progress_data
+
+
+def main(argv: List[str] = None) -> int:
+    """Extract progress from saved HTML files, optionally timing the extractor."""
+    parser = argparse.ArgumentParser(description="Extract Synthesis progress from saved dashboard HTML")
+    parser.add_argument("paths", nargs="+", help="HTML files to extract")
+    parser.add_argument("--bench", type=int, default=0, metavar="N",
+                        help="Run the extraction N times per file and report pages per second")
+    args = parser.parse_args(argv)
+    
+    extractor = HtmlExtractor()
+    pages = []
+    for path in args.paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    
+    for path, html in zip(args.paths, pages):
+        print(f"{path}: {json.dumps(extractor.extract(html))}")
+    
+    if args.bench:
+        started = time.perf_counter()
+        for _ in range(args.bench):
+            for html in pages:
+                extractor.extract(html)
+        elapsed = time.perf_counter() - started
+        total = args.bench * len(pages)
+        print(f"{total} extractions in {elapsed:.3f}s ({total / elapsed:.0f} pages/s)")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Browserless progress checks against the Synthesis dashboard's JSON endpoints.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Optional, Dict, Any, List
+
+import httpx
+
+from synthesis_client import SynthesisClient
+from extraction import new_progress_data
+
+logger = logging.getLogger(__name__)
+
+
+class HttpProgressClient:
+    """Fetch study progress over plain HTTP with the authenticated cookies.
+    
+    The endpoints are learned from a browser scrape whose ``REQUIRED_FIELDS``
+    came from captured API responses (see ``SynthesisClient.api_sources``). Later checks
+    request just those endpoints on a pooled ``httpx.AsyncClient``. ``None``
+    is returned when the session is rejected or the response no longer
+    provides the learned fields; the caller then falls back to Playwright.
+    """
+    
+    SETTINGS_KEY = "synthesis_api_endpoints"
+    # Fields the API must have supplied before its endpoints are learned; logged_in
+    # is established by the session being accepted (401/403 fall back)
+    REQUIRED_FIELDS = ("study_time_minutes",)
+    
+    def __init__(self, base_url: str, session_store=None, timeout: float = 10.0,
+                 max_connections: int = 4):
+        self.base_url = base_url.rstrip("/")
+        self.session_store = session_store
+        self.timeout = timeout
+        self.max_connections = max_connections
+        
+        self.endpoints: List[str] = []
+        self.fields: List[str] = []
+        self._client: Optional[httpx.AsyncClient] = None
+        self._has_cookies = False
+        
+        self.stats = {"hits": 0, "fallbacks": 0, "requests": 0, "bytes": 0}
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                follow_redirects=False,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                headers={"Accept": "application/json"}
+            )
+        return self._client
+    
+    @property
+    def ready(self) -> bool:
+        return bool(self.endpoints)
+    
+    def load_state(self, raw: Optional[str]):
+        """Restore learned endpoints from the JSON stored in user settings."""
+        try:
+            state = json.loads(raw) if raw else {}
+            self.endpoints = list(state.get("endpoints", []))
+            self.fields = list(state.get("fields", []))
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid saved API endpoints: {e}")
+            self.endpoints, self.fields = [], []
+    
+    def dump_state(self) -> str:
+        return json.dumps({"endpoints": self.endpoints, "fields": self.fields})
+    
+    def learn(self, sources: Dict[str, str], cookies: List[Dict[str, Any]]) -> bool:
+        """Remember the endpoints behind a browser scrape. Returns True if they changed."""
+        self.set_cookies(cookies)
+        
+        endpoints = sorted(set(sources.values()))
+        fields = sorted(sources)
+        changed = (endpoints, fields) != (self.endpoints, self.fields)
+        self.endpoints, self.fields = endpoints, fields
+        return changed
+    
+    def forget(self) -> bool:
+        """Drop learned endpoints. Returns True if any were known."""
+        changed = bool(self.endpoints)
+        self.endpoints, self.fields = [], []
+        return changed
+    
+    def set_cookies(self, cookies: List[Dict[str, Any]]):
+        """Replace the cookie jar with Playwright-style cookie dicts."""
+        jar = self._get_client().cookies
+        jar.clear()
+        for cookie in cookies:
+            jar.set(cookie["name"], cookie["value"],
+                    domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+        self._has_cookies = bool(cookies)
+    
+    def _load_saved_cookies(self) -> bool:
+        state = self.session_store.load() if self.session_store else None
+        if state and state.get("cookies"):
+            self.set_cookies(state["cookies"])
+        return self._has_cookies
+    
+    def _fallback(self, reason: str) -> None:
+        logger.info(f"HTTP progress check unavailable ({reason}) - using the browser")
+        self.stats["fallbacks"] += 1
+        return None
+    
+    async def fetch_progress(self) -> Optional[Dict[str, Any]]:
+        """Fetch progress without a browser, or None if the browser is needed."""
+        if not self.endpoints:
+            return None
+        if not self._has_cookies and not self._load_saved_cookies():
+            return self._fallback("no saved session")
+        
+        client = self._get_client()
+        try:
+            responses = await asyncio.gather(*(client.get(url) for url in self.endpoints))
+        except httpx.HTTPError as e:
+            return self._fallback(f"request failed: {e}")
+        
+        payloads = []
+        for response in responses:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += len(response.content)
+            
+            if response.status_code in (401, 403) or response.is_redirect:
+                self._has_cookies = False
+                client.cookies.clear()
+                return self._fallback("session rejected")
+            
+            if response.status_code != 200 or "json" not in response.headers.get("content-type", ""):
+                return self._fallback(f"unexpected response {response.status_code} from {response.url}")
+            
+            try:
+                payloads.append((str(response.url), response.json()))
+            except ValueError:
+                return self._fallback(f"invalid JSON from {response.url}")
+        
+        found, _ = SynthesisClient.map_api_payloads(payloads)
+        missing = set(self.fields) - set(found)
+        if missing:
+            return self._fallback(f"API shape changed, missing {sorted(missing)}")
+        
+        self.stats["hits"] += 1
+        progress_data = new_progress_data()
+        progress_data.update(found)
+        progress_data["source"] = "http"
+        return progress_data
+    
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
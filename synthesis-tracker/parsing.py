@@ -0,0 +1,210 @@
+"""
+Precompiled parsers for the text scraped from the Synthesis dashboard.
+
+Durations ("1h 20m", "85 mins", "1:20"), counts ("1,250 pts", "12 day
+streak", "3.4k") and relative timestamps ("2 hours ago", "yesterday").
+Run ``python parsing.py`` to check the bundled corpus and measure parses per
+second.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Callable
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parsing_corpus.json")
+
+_DURATION_UNIT_SECONDS = {"h": 3600, "m": 60, "s": 1}
+
+_DURATION_RE = re.compile(
+    r"(?P<value>\d+(?:\.\d+)?)\s*"
+    r"(?P<unit>h(?:ours?|rs?)?|m(?:in(?:ute)?s?)?|s(?:ec(?:ond)?s?)?)\b"
+    r"(?!\s*ago)",
+    re.IGNORECASE
+)
+# "1:20" is a duration; "12:30 PM", "at 9:15" and "since 08:00" are times of day
+_CLOCK_RE = re.compile(
+    r"(?<!\bat )(?<!\bsince )"
+    r"\b(?P<hours>\d{1,2}):(?P<minutes>[0-5]\d)(?::(?P<seconds>[0-5]\d))?\b"
+    r"(?![:\d]|\s*[ap]\.?m\b)",
+    re.IGNORECASE
+)
+_AGO_RE = re.compile(r"\bago\b", re.IGNORECASE)
+
+_COUNT_NUMBER = r"(?<![\d.,])(?P<number>\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*(?P<suffix>[km])?"
+_COUNT_RE = re.compile(_COUNT_NUMBER + r"(?![a-z])", re.IGNORECASE)
+# A count attached to its unit ("560 pts", "12 day streak") beats any other number in the text
+_UNIT_COUNT_RE = re.compile(_COUNT_NUMBER + r"\s*(?:pts?|points?|xp|days?)\b", re.IGNORECASE)
+
+_RELATIVE_UNIT_SECONDS = {
+    "second": 1, "sec": 1, "s": 1,
+    "minute": 60, "min": 60, "m": 60,
+    "hour": 3600, "hr": 3600, "h": 3600,
+    "day": 86400, "d": 86400,
+    "week": 604800, "w": 604800,
+    "month": 2592000,
+    "year": 31536000
+}
+_RELATIVE_RE = re.compile(
+    r"\b(?P<value>\d+|an?|one)\s*"
+    r"(?P<unit>seconds?|secs?|minutes?|mins?|hours?|hrs?|days?|weeks?|months?|years?|[smhdw])\s+ago\b",
+    re.IGNORECASE
+)
+_RELATIVE_WORDS = {
+    "just now": 0,
+    "moments ago": 0,
+    "a moment ago": 0,
+    "now": 0,
+    "today": 0,
+    "yesterday": 86400
+}
+_RELATIVE_WORDS_RE = re.compile(
+    r"\b(?P<word>" + "|".join(sorted((re.escape(word) for word in _RELATIVE_WORDS), key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+
+
+def parse_duration(text: str) -> Optional[int]:
+    """Total minutes in a duration like "1h 20m", "85 mins" or "1:20".
+    
+    Amounts followed by "ago" are timestamps, not durations, and are ignored.
+    Returns None when no duration is found.
+    """
+    if not text:
+        return None
+    
+    seconds = 0.0
+    found = False
+    
+    for match in _DURATION_RE.finditer(text):
+        unit = match.group("unit")[0].lower()
+        seconds += float(match.group("value")) * _DURATION_UNIT_SECONDS[unit]
+        found = True
+    
+    if not found and not _AGO_RE.search(text):
+        clock = _CLOCK_RE.search(text)
+        if clock:
+            seconds = (int(clock.group("hours")) * 3600 + int(clock.group("minutes")) * 60 +
+                       int(clock.group("seconds") or 0))
+            found = True
+    
+    return int(round(seconds / 60)) if found else None
+
+
+def parse_count(text: str) -> Optional[int]:
+    """Count in text like "1,250 pts", "12 day streak" or "3.4k".
+    
+    The number next to a unit (points, XP, days) wins; otherwise the first
+    number in the text is used.
+    """
+    if not text:
+        return None
+    
+    match = _UNIT_COUNT_RE.search(text) or _COUNT_RE.search(text)
+    if not match:
+        return None
+    
+    number = float(match.group("number").replace(",", ""))
+    suffix = (match.group("suffix") or "").lower()
+    if suffix == "k":
+        number *= 1_000
+    elif suffix == "m":
+        number *= 1_000_000
+    return int(round(number))
+
+
+def parse_relative_time(text: str, now: datetime = None) -> Optional[datetime]:
+    """Absolute time for phrases like "2 hours ago", "an hour ago" or "yesterday"."""
+    if not text:
+        return None
+    
+    now = now or datetime.now()
+    
+    match = _RELATIVE_RE.search(text)
+    if match:
+        value = match.group("value").lower()
+        amount = int(value) if value.isdigit() else 1
+        unit = match.group("unit").lower()
+        unit_seconds = _RELATIVE_UNIT_SECONDS.get(unit) or _RELATIVE_UNIT_SECONDS.get(unit.rstrip("s"))
+        return now - timedelta(seconds=amount * unit_seconds)
+    
+    word = _RELATIVE_WORDS_RE.search(text)
+    if word:
+        return now - timedelta(seconds=_RELATIVE_WORDS[word.group("word").lower()])
+    
+    return None
+
+
+def _relative_seconds(text: str) -> Optional[int]:
+    now = datetime(2024, 1, 15, 12, 0, 0)
+    parsed = parse_relative_time(text, now)
+    return None if parsed is None else int((now - parsed).total_seconds())
+
+
+# Corpus section -> parser returning the value recorded in the corpus
+CORPUS_PARSERS: Dict[str, Callable[[str], Any]] = {
+    "durations": parse_duration,
+    "counts": parse_count,
+    "relative_times": _relative_seconds
+}
+
+
+def load_corpus(path: str = CORPUS_PATH) -> Dict[str, List[List[Any]]]:
+    """Load ``{section: [[text, expected], ...]}`` pairs."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_corpus(corpus: Dict[str, List[List[Any]]]) -> List[str]:
+    """Describe every corpus entry the parsers get wrong."""
+    failures = []
+    for section, cases in corpus.items():
+        parser = CORPUS_PARSERS[section]
+        for text, expected in cases:
+            actual = parser(text)
+            if actual != expected:
+                failures.append(f"{section}: {text!r} -> {actual!r}, expected {expected!r}")
+    return failures
+
+
+def benchmark(corpus: Dict[str, List[List[Any]]], iterations: int = 1000) -> Dict[str, float]:
+    """Parses per second for each corpus section."""
+    results = {}
+    for section, cases in corpus.items():
+        parser = CORPUS_PARSERS[section]
+        texts = [text for text, _ in cases]
+        
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for text in texts:
+                parser(text)
+        elapsed = time.perf_counter() - started
+        
+        results[section] = round(iterations * len(texts) / elapsed) if elapsed > 0 else 0.0
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check and benchmark the dashboard text parsers")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Corpus JSON file")
+    parser.add_argument("--iterations", type=int, default=1000, help="Passes over the corpus per section")
+    args = parser.parse_args(argv)
+    
+    corpus = load_corpus(args.corpus)
+    
+    failures = check_corpus(corpus)
+    for failure in failures:
+        print(f"MISMATCH {failure}")
+    
+    for section, rate in benchmark(corpus, args.iterations).items():
+        print(f"{section}: {len(corpus[section])} strings, {rate:,.0f} parses/s")
+    
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Network route interception that skips resources the scraper does not need.
+"""
+
+import logging
+from typing import Dict, Any, Iterable, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceBlocker:
+    """Abort non-essential requests (images, fonts, media, trackers) during scraping.
+    
+    A request is allowed if its host is on the allow list; otherwise it is
+    aborted if its host is on the deny list or its Playwright resource type is
+    blocked. Aborted requests are never downloaded, so bytes saved are
+    estimated from typical sizes per resource type.
+    """
+    
+    DEFAULT_BLOCKED_TYPES = ("image", "media", "font")
+    
+    DEFAULT_DENY_DOMAINS = (
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "googlesyndication.com",
+        "facebook.net",
+        "connect.facebook.net",
+        "hotjar.com",
+        "segment.io",
+        "segment.com",
+        "mixpanel.com",
+        "amplitude.com",
+        "fullstory.com",
+        "intercom.io",
+        "clarity.ms",
+        "sentry.io",
+        "hs-scripts.com",
+    )
+    
+    # Rough transfer sizes used to estimate savings for aborted requests
+    TYPICAL_BYTES = {
+        "image": 40_000,
+        "media": 500_000,
+        "font": 30_000,
+        "script": 60_000,
+        "stylesheet": 20_000,
+        "xhr": 2_000,
+        "fetch": 2_000,
+    }
+    DEFAULT_TYPICAL_BYTES = 5_000
+    
+    def __init__(self, blocked_types: Optional[Iterable[str]] = None,
+                 deny_domains: Optional[Iterable[str]] = None,
+                 allow_domains: Optional[Iterable[str]] = None):
+        self.blocked_types = set(self.DEFAULT_BLOCKED_TYPES if blocked_types is None else blocked_types)
+        self.deny_domains = tuple(self.DEFAULT_DENY_DOMAINS) + tuple(deny_domains or ())
+        self.allow_domains = tuple(allow_domains or ())
+        
+        self.allowed_requests = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self.blocked_domains: Dict[str, int] = {}
+    
+    @staticmethod
+    def _matches(host: str, domains: Iterable[str]) -> bool:
+        return any(host == domain or host.endswith("." + domain) for domain in domains)
+    
+    def should_block(self, url: str, resource_type: str) -> bool:
+        """Decide whether a request should be aborted."""
+        host = (urlparse(url).hostname or "").lower()
+        
+        if self.allow_domains and self._matches(host, self.allow_domains):
+            return False
+        if self._matches(host, self.deny_domains):
+            return True
+        return resource_type in self.blocked_types
+    
+    async def handle(self, route, request):
+        """Playwright route handler; install with ``context.route("**/*", blocker.handle)``."""
+        if self.should_block(request.url, request.resource_type):
+            resource_type = request.resource_type
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+            host = urlparse(request.url).hostname or ""
+            self.blocked_domains[host] = self.blocked_domains.get(host, 0) + 1
+            logger.debug(f"Blocked {resource_type} request: {request.url}")
+            await route.abort("blockedbyclient")
+        else:
+            self.allowed_requests += 1
+            await route.continue_()
+    
+    def report(self) -> Dict[str, Any]:
+        """Summarize what was blocked during this run."""
+        blocked = sum(self.blocked_by_type.values())
+        estimated = sum(
+            count * self.TYPICAL_BYTES.get(resource_type, self.DEFAULT_TYPICAL_BYTES)
+            for resource_type, count in self.blocked_by_type.items()
+        )
+        top_domains = sorted(self.blocked_domains.items(), key=lambda item: item[1], reverse=True)[:5]
+        
+        return {
+            "allowed_requests": self.allowed_requests,
+            "blocked_requests": blocked,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "top_blocked_domains": dict(top_domains),
+            "estimated_bytes_saved": estimated
+        }
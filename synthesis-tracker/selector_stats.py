@@ -0,0 +1,66 @@
+"""
+Selector hit statistics so the scraper tries the selectors that worked last time first.
+"""
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorStats:
+    """Count which selector matched for each field across runs.
+    
+    ``order`` puts the most successful selectors first; ties keep the default
+    priority. Every ``explore_every``-th run is an exploration run: the
+    default order is used, every candidate is probed, and the counts are
+    halved so a selector that starts matching after a redesign can take over.
+    """
+    
+    SETTINGS_KEY = "selector_stats"
+    
+    def __init__(self, hits: Optional[Dict[str, Dict[str, int]]] = None, runs: int = 0,
+                 explore_every: int = 10):
+        self.hits: Dict[str, Dict[str, int]] = hits or {}
+        self.runs = runs
+        self.explore_every = explore_every
+        self.exploring = False
+    
+    @classmethod
+    def from_json(cls, raw: Optional[str], explore_every: int = 10) -> "SelectorStats":
+        """Load stats saved with :meth:`to_json`; invalid data starts fresh."""
+        try:
+            state = json.loads(raw) if raw else {}
+            return cls(state.get("hits", {}), state.get("runs", 0), explore_every)
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid selector stats: {e}")
+            return cls(explore_every=explore_every)
+    
+    def to_json(self) -> str:
+        return json.dumps({"hits": self.hits, "runs": self.runs})
+    
+    def begin_run(self) -> bool:
+        """Start a scrape; returns True if this run should explore."""
+        self.runs += 1
+        self.exploring = not self.hits or (self.explore_every > 0 and self.runs % self.explore_every == 0)
+        
+        if self.exploring and self.hits:
+            for field_hits in self.hits.values():
+                for selector in field_hits:
+                    field_hits[selector] //= 2
+        
+        return self.exploring
+    
+    def order(self, field: str, selectors: List[str]) -> List[str]:
+        """Selectors for a field, best first (default order while exploring)."""
+        if self.exploring:
+            return list(selectors)
+        
+        field_hits = self.hits.get(field, {})
+        return sorted(selectors, key=lambda selector: -field_hits.get(selector, 0))
+    
+    def record(self, field: str, selector: str):
+        """Count a successful match."""
+        field_hits = self.hits.setdefault(field, {})
+        field_hits[selector] = field_hits.get(selector, 0) + 1
@@ -4,7 +4,7 @@ MCP server for Synthesis.com study tracking integration.
 
 import asyncio
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from mcp.types import Tool, TextContent
@@ -15,9 +15,15 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shared.mcp_base import MCPBaseServer, create_tool
-from shared.email_utils import SynthesisEmailMonitor
-from shared.storage_utils import StudyProgressDB
+from shared.email_utils import SynthesisEmailMonitor, AsyncSynthesisEmailMonitor
+from shared.storage_utils import AsyncStudyProgressDB
 from synthesis_client import SynthesisClient
+from browser_manager import BrowserManager
+from session_store import SessionStore
+from resource_blocker import ResourceBlocker
+from http_progress import HttpProgressClient
+from selector_stats import SelectorStats
+from account_sync import AccountSyncOrchestrator
 from config import config
 
 # Setup logging
@@ -32,15 +38,49 @@ class SynthesisTrackerServer(MCPBaseServer):
         super().__init__("synthesis-tracker", "1.0.0")
         
         # Initialize components
-        self.email_monitor = SynthesisEmailMonitor(
+        self.email_monitor = AsyncSynthesisEmailMonitor(SynthesisEmailMonitor(
             server=config.email_server,
             port=config.email_port,
             username=config.email_username,
             password=config.email_password,
-            use_ssl=config.email_use_ssl
+            use_ssl=config.email_use_ssl,
+            timeout=config.email_timeout,
+            keepalive_interval=config.email_keepalive_seconds,
+            max_idle=config.email_max_idle_seconds
+        ))
+        
+        self.db = AsyncStudyProgressDB(config.database_path)
+        
+        self.browser_manager = BrowserManager(
+            headless=config.headless_browser,
+            max_uses=config.browser_max_uses,
+            max_memory_mb=config.browser_max_memory_mb
+        )
+        
+        self.session_store = SessionStore(
+            config.session_state_path,
+            encryption_key=config.session_encryption_key
         )
         
-        self.db = StudyProgressDB(config.database_path)
+        # Browserless progress checks once the dashboard's API endpoints are known
+        self.http_progress = None
+        self._http_state_loaded = False
+        if config.http_fast_path_enabled:
+            self.http_progress = HttpProgressClient(config.synthesis_url, session_store=self.session_store)
+        
+        # Which selectors matched on earlier scrapes (loaded from user settings on first use)
+        self.selector_stats: Optional[SelectorStats] = None
+        
+        # One saved session per account; the email mailbox is shared, so lookups are serialized
+        self.session_stores = {config.accounts[0]["name"]: self.session_store}
+        self._email_lock = asyncio.Lock()
+        self._email_state_loaded = False
+        self.account_sync = AccountSyncOrchestrator(
+            self._scrape_account,
+            self.db,
+            max_concurrency=config.sync_max_concurrency,
+            deadline_seconds=config.account_sync_deadline_seconds
+        )
         
         logger.info("Synthesis Tracker MCP server initialized")
     
@@ -67,6 +107,26 @@ class SynthesisTrackerServer(MCPBaseServer):
                 description="Get weekly study summary and statistics",
                 parameters={}
             ),
+            create_tool(
+                name="get_monthly_summary",
+                description="Get study summary and weekly breakdown for a month",
+                parameters={
+                    "month": {
+                        "type": "string",
+                        "description": "Month to summarize (YYYY-MM), defaults to the current month"
+                    }
+                }
+            ),
+            create_tool(
+                name="get_yearly_summary",
+                description="Get study summary and monthly breakdown for a year",
+                parameters={
+                    "year": {
+                        "type": "string",
+                        "description": "Year to summarize (YYYY), defaults to the current year"
+                    }
+                }
+            ),
             create_tool(
                 name="send_study_reminder",
                 description="Send a study reminder if user hasn't studied today",
@@ -86,6 +146,11 @@ class SynthesisTrackerServer(MCPBaseServer):
                 name="force_update_progress",
                 description="Force update study progress by logging into Synthesis.com",
                 parameters={}
+            ),
+            create_tool(
+                name="sync_all_accounts",
+                description="Update study progress for every configured Synthesis account at once",
+                parameters={}
             )
         ]
     
@@ -102,6 +167,14 @@ class SynthesisTrackerServer(MCPBaseServer):
             elif name == "get_weekly_summary":
                 return await self._get_weekly_summary()
             
+            elif name == "get_monthly_summary":
+                month = arguments.get("month")
+                return await self._get_monthly_summary(month)
+            
+            elif name == "get_yearly_summary":
+                year = arguments.get("year")
+                return await self._get_yearly_summary(year)
+            
             elif name == "send_study_reminder":
                 custom_message = arguments.get("custom_message")
                 return await self._send_study_reminder(custom_message)
@@ -112,6 +185,9 @@ class SynthesisTrackerServer(MCPBaseServer):
             elif name == "force_update_progress":
                 return await self._force_update_progress()
             
+            elif name == "sync_all_accounts":
+                return await self._sync_all_accounts()
+            
             else:
                 return f"Unknown tool: {name}"
                 
@@ -123,9 +199,13 @@ class SynthesisTrackerServer(MCPBaseServer):
         """Check if user logged into Synthesis today."""
         try:
             today = datetime.now().strftime("%Y-%m-%d")
-            session = self.db.get_study_session(today)
-            
-            has_studied = self.db.has_studied_today()
+            session, has_studied, streak = await asyncio.gather(
+                self.db.get_study_session(
+                    today, columns=("logged_in", "study_minutes", "updated_at")
+                ),
+                self.db.has_studied_today(),
+                self.db.get_current_streak()
+            )
             
             if session:
                 return {
@@ -133,7 +213,7 @@ class SynthesisTrackerServer(MCPBaseServer):
                     "study_minutes": session.get("study_minutes", 0),
                     "has_studied": has_studied,
                     "last_check": session.get("updated_at"),
-                    "streak": self.db.get_current_streak()
+                    "streak": streak
                 }
             else:
                 return {
@@ -141,7 +221,7 @@ class SynthesisTrackerServer(MCPBaseServer):
                     "study_minutes": 0,
                     "has_studied": False,
                     "last_check": None,
-                    "streak": self.db.get_current_streak()
+                    "streak": streak
                 }
                 
         except Exception as e:
@@ -154,7 +234,7 @@ class SynthesisTrackerServer(MCPBaseServer):
             if not date:
                 date = datetime.now().strftime("%Y-%m-%d")
             
-            session = self.db.get_study_session(date)
+            session = await self.db.get_study_session(date)
             
             if session:
                 return {
@@ -184,8 +264,10 @@ class SynthesisTrackerServer(MCPBaseServer):
     async def _get_weekly_summary(self) -> Dict[str, Any]:
         """Get weekly study summary."""
         try:
-            stats = self.db.get_weekly_stats()
-            current_streak = self.db.get_current_streak()
+            stats, current_streak = await asyncio.gather(
+                self.db.get_weekly_stats(),
+                self.db.get_current_streak()
+            )
             
             # Calculate additional metrics
             goal_minutes = config.study_goal_minutes * 7  # Weekly goal
@@ -206,6 +288,78 @@ class SynthesisTrackerServer(MCPBaseServer):
             logger.error(f"Error getting weekly summary: {e}")
             return {"error": str(e)}
     
+    async def _get_monthly_summary(self, month: str = None) -> Dict[str, Any]:
+        """Get monthly study summary from the rollup tables."""
+        try:
+            month_start = datetime.strptime(month or datetime.now().strftime("%Y-%m"), "%Y-%m")
+            next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            month_end = next_month - timedelta(days=1)
+            
+            stats = await self.db.get_stats(
+                month_start.strftime("%Y-%m-%d"), month_end.strftime("%Y-%m-%d"), "week"
+            )
+            totals = stats["totals"]
+            
+            goal_minutes = config.study_goal_minutes * month_end.day
+            goal_progress = (totals["total_minutes"] / goal_minutes * 100) if goal_minutes > 0 else 0
+            
+            return {
+                "month": month_start.strftime("%Y-%m"),
+                "days_studied": totals["days_studied"],
+                "days_logged_in": totals["days_logged_in"],
+                "total_minutes": totals["total_minutes"],
+                "average_session": totals["avg_minutes"],
+                "total_points": totals["total_points"],
+                "monthly_goal_minutes": goal_minutes,
+                "goal_progress_percent": min(100, round(goal_progress, 1)),
+                "weekly_breakdown": [
+                    {
+                        "week_start": period["period_start"],
+                        "days_studied": period["days_studied"],
+                        "total_minutes": period["total_minutes"]
+                    }
+                    for period in stats["periods"]
+                ]
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting monthly summary: {e}")
+            return {"error": str(e)}
+    
+    async def _get_yearly_summary(self, year: str = None) -> Dict[str, Any]:
+        """Get yearly study summary from the rollup tables."""
+        try:
+            year = int(year or datetime.now().year)
+            
+            stats, longest_streak = await asyncio.gather(
+                self.db.get_stats(f"{year:04d}-01-01", f"{year:04d}-12-31", "month"),
+                self.db.get_longest_streak(f"{year:04d}-01-01", f"{year:04d}-12-31")
+            )
+            totals = stats["totals"]
+            
+            return {
+                "year": year,
+                "days_studied": totals["days_studied"],
+                "days_logged_in": totals["days_logged_in"],
+                "total_minutes": totals["total_minutes"],
+                "total_hours": round(totals["total_minutes"] / 60, 1),
+                "average_session": totals["avg_minutes"],
+                "total_points": totals["total_points"],
+                "longest_streak": longest_streak,
+                "monthly_breakdown": [
+                    {
+                        "month": period["period_start"][:7],
+                        "days_studied": period["days_studied"],
+                        "total_minutes": period["total_minutes"]
+                    }
+                    for period in stats["periods"]
+                ]
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting yearly summary: {e}")
+            return {"error": str(e)}
+    
     def _generate_recommendations(self, stats: Dict[str, Any], streak: int) -> List[str]:
         """Generate personalized recommendations."""
         recommendations = []
@@ -232,7 +386,7 @@ class SynthesisTrackerServer(MCPBaseServer):
     async def _send_study_reminder(self, custom_message: str = None) -> Dict[str, Any]:
         """Send study reminder if needed."""
         try:
-            has_studied = self.db.has_studied_today()
+            has_studied = await self.db.has_studied_today()
             
             if has_studied:
                 return {
@@ -241,8 +395,7 @@ class SynthesisTrackerServer(MCPBaseServer):
                 }
             
             # Check if we've already sent reminders today
-            today_notifications = self.db.get_todays_notifications()
-            reminder_count = len([n for n in today_notifications if n["notification_type"] == "reminder"])
+            reminder_count = await self.db.count_notifications("reminder")
             
             if reminder_count >= 3:
                 return {
@@ -251,7 +404,7 @@ class SynthesisTrackerServer(MCPBaseServer):
                 }
             
             # Generate reminder message
-            streak = self.db.get_current_streak()
+            streak = await self.db.get_current_streak()
             
             if custom_message:
                 message = custom_message
@@ -273,7 +426,7 @@ class SynthesisTrackerServer(MCPBaseServer):
                     message = "Evening study session? " + messages[2]
             
             # Save notification
-            self.db.save_notification("reminder", message)
+            await self.db.save_notification("reminder", message)
             
             return {
                 "reminder_sent": True,
@@ -289,11 +442,15 @@ class SynthesisTrackerServer(MCPBaseServer):
     async def _get_current_streak(self) -> Dict[str, Any]:
         """Get current study streak."""
         try:
-            streak = self.db.get_current_streak()
-            recent_sessions = self.db.get_recent_sessions(7)
+            streak_info, recent_sessions = await asyncio.gather(
+                self.db.get_streak_info(),
+                self.db.get_recent_sessions(7, columns=("date", "logged_in", "study_minutes"))
+            )
             
             return {
-                "current_streak": streak,
+                "current_streak": streak_info["current_streak"],
+                "streak_start": streak_info["current_streak_start"],
+                "longest_streak": streak_info["longest_streak"],
                 "recent_activity": [
                     {
                         "date": s["date"],
@@ -313,51 +470,246 @@ class SynthesisTrackerServer(MCPBaseServer):
         try:
             logger.info("Starting forced progress update...")
             
-            # Get login code from email
-            login_code = self.email_monitor.get_latest_login_code()
+            # Try the saved session against the JSON endpoints before launching a page
+            progress_data = await self._fetch_progress_http()
+            resource_blocker = None
             
-            if not login_code:
-                return {
-                    "success": False,
-                    "message": "No login code found in email. Please ensure email forwarding is setup correctly."
-                }
-            
-            # Login and scrape data
-            async with SynthesisClient(headless=config.headless_browser) as client:
-                login_success = await client.login(config.synthesis_email, login_code)
-                
-                if not login_success:
-                    return {
-                        "success": False,
-                        "message": "Failed to login to Synthesis.com"
-                    }
-                
-                # Get progress data
-                progress_data = await client.get_study_progress()
-                
-                # Save to database
-                self.db.save_study_session(progress_data)
-                
-                # Clean up email
-                self.email_monitor.cleanup_old_codes()
-                
-                return {
-                    "success": True,
-                    "message": "Successfully updated progress from Synthesis.com",
-                    "data": {
-                        "study_minutes": progress_data.get("study_time_minutes", 0),
-                        "lessons_completed": len(progress_data.get("lessons_completed", [])),
-                        "last_activity": progress_data.get("last_activity"),
-                        "streak_days": progress_data.get("streak_days", 0)
-                    }
-                }
+            if progress_data is None:
+                # Fresh blocker per run so the network report covers this update only
+                if config.resource_blocking_enabled:
+                    resource_blocker = ResourceBlocker(
+                        blocked_types=config.blocked_resource_types,
+                        deny_domains=config.blocked_domains,
+                        allow_domains=config.allowed_domains
+                    )
                 
+                progress_data, error = await self._scrape_progress(resource_blocker)
+                if error:
+                    return {"success": False, "message": error}
+            
+            # Save to database
+            await self.db.save_study_session(progress_data)
+            
+            # Clean up email (only the browser path can have requested a code)
+            if progress_data.get("source") != "http":
+                await self._email_call(self.email_monitor.cleanup_old_codes)
+            
+            return {
+                "success": True,
+                "message": "Successfully updated progress from Synthesis.com",
+                "data": {
+                    "study_minutes": progress_data.get("study_time_minutes", 0),
+                    "lessons_completed": len(progress_data.get("lessons_completed", [])),
+                    "last_activity": progress_data.get("last_activity"),
+                    "streak_days": progress_data.get("streak_days", 0)
+                },
+                "source": progress_data.get("source"),
+                "network": resource_blocker.report() if resource_blocker else None
+            }
+            
         except Exception as e:
             logger.error(f"Error in forced update: {e}")
             return {
                 "success": False,
                 "error": str(e)
             }
+    
+    async def _fetch_progress_http(self) -> Optional[Dict[str, Any]]:
+        """Browserless progress check, or None when the browser is needed."""
+        if not self.http_progress:
+            return None
+        
+        if not self._http_state_loaded:
+            self.http_progress.load_state(await self.db.get_user_setting(HttpProgressClient.SETTINGS_KEY))
+            self._http_state_loaded = True
+        
+        return await self.http_progress.fetch_progress()
+    
+    async def _sync_all_accounts(self) -> Dict[str, Any]:
+        """Scrape every configured account concurrently."""
+        try:
+            logger.info(f"Syncing {len(config.accounts)} Synthesis accounts...")
+            summary = await self.account_sync.sync_all(config.accounts)
+            
+            await self._email_call(self.email_monitor.cleanup_old_codes)
+            
+            return {
+                "success": summary["failed"] == 0,
+                "message": f"Updated {summary['succeeded']} of {len(config.accounts)} accounts "
+                           f"in {summary['seconds']}s",
+                **summary
+            }
+            
+        except Exception as e:
+            logger.error(f"Error syncing accounts: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def _scrape_account(self, account: Dict[str, str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Scrape one account for the multi-account sync."""
+        resource_blocker = None
+        if config.resource_blocking_enabled:
+            resource_blocker = ResourceBlocker(
+                blocked_types=config.blocked_resource_types,
+                deny_domains=config.blocked_domains,
+                allow_domains=config.allowed_domains
+            )
+        
+        progress_data, error = await self._scrape_progress(resource_blocker, account)
+        
+        # The primary account also feeds the single-account tools and streaks
+        if progress_data is not None and account["name"] == config.accounts[0]["name"]:
+            await self.db.save_study_session(progress_data)
+        
+        return progress_data, error
+    
+    def _session_store_for(self, account: Dict[str, str]) -> SessionStore:
+        if account["name"] not in self.session_stores:
+            self.session_stores[account["name"]] = SessionStore(
+                config.session_state_path_for(account["name"]),
+                encryption_key=config.session_encryption_key
+            )
+        return self.session_stores[account["name"]]
+    
+    async def _get_login_code(self, recipient: str = None) -> Optional[str]:
+        """Look up a login code without blocking other accounts' scrapes."""
+        return await self._email_call(self.email_monitor.get_latest_login_code, recipient)
+    
+    async def _email_call(self, method, *args):
+        """Run a mailbox operation, persisting the sync state it advances."""
+        async with self._email_lock:
+            if not self._email_state_loaded:
+                self.email_monitor.load_state(await self.db.get_user_setting(AsyncSynthesisEmailMonitor.SETTINGS_KEY))
+                self._email_state_loaded = True
+            
+            result = await method(*args)
+            
+            if self.email_monitor.state_changed:
+                await self.db.set_user_setting(AsyncSynthesisEmailMonitor.SETTINGS_KEY, self.email_monitor.dump_state())
+                self.email_monitor.state_changed = False
+            return result
+    
+    async def _login(self, client: SynthesisClient, email: str, recipient: str = None) -> Optional[str]:
+        """Log in, picking up the emailed code the moment it arrives.
+        
+        The mailbox watcher is started before the login form requests the
+        code, so only the new email counts. When the mailbox cannot be
+        watched, the latest code is looked up once instead. Returns an error
+        message, or None once logged in.
+        """
+        watcher = self.email_monitor.watch_login_code(
+            recipient, timeout=config.login_code_timeout, use_idle=config.email_idle_enabled
+        )
+        watching = await watcher.start()
+        received = []
+        
+        async def wait_for_code() -> Optional[str]:
+            if watching:
+                code = await watcher.wait()
+            else:
+                code = await self._get_login_code(recipient)
+            received.append(code)
+            return code
+        
+        code = wait_for_code()
+        try:
+            logged_in = await client.login(email, code)
+        finally:
+            code.close()
+            watcher.stop()
+        
+        if received and not received[0]:
+            return "No login code found in email. Please ensure email forwarding is setup correctly."
+        if not logged_in:
+            return "Failed to login to Synthesis.com"
+        return None
+    
+    async def _scrape_progress(self, resource_blocker,
+                               account: Dict[str, str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Log in with the browser if needed and scrape the dashboard.
+        
+        Without ``account`` the primary (first configured) account is used;
+        its email, saved session and code recipient always go together.
+        Returns ``(progress_data, None)`` on success or ``(None, message)``.
+        """
+        account = account or config.accounts[0]
+        email = account["email"]
+        session_store = self._session_store_for(account)
+        # Only filter codes by recipient when several accounts share the mailbox
+        recipient = email if len(config.accounts) > 1 else None
+        
+        if self.selector_stats is None:
+            self.selector_stats = SelectorStats.from_json(
+                await self.db.get_user_setting(SelectorStats.SETTINGS_KEY),
+                explore_every=config.selector_explore_every
+            )
+        
+        async with SynthesisClient(headless=config.headless_browser,
+                                   browser_manager=self.browser_manager,
+                                   session_store=session_store,
+                                   base_url=config.synthesis_url,
+                                   extraction_deadline=config.extraction_deadline_ms,
+                                   resource_blocker=resource_blocker,
+                                   capture_api=config.capture_api_responses,
+                                   selector_stats=self.selector_stats,
+                                   archive_html=config.archive_page_snapshots) as client:
+            # Reuse the saved session; only fall back to the email-code login when it expired
+            if not await client.restore_session():
+                login_error = await self._login(client, email, recipient)
+                
+                if login_error:
+                    return None, login_error
+            
+            # Get progress data
+            progress_data = await client.get_study_progress()
+            await self.db.set_user_setting(SelectorStats.SETTINGS_KEY, self.selector_stats.to_json())
+            
+            if session_store is self.session_store:
+                if client.page_html:
+                    await self.db.save_page_snapshot(client.page_html, progress_data.get("date"), client.page.url)
+                if self.http_progress:
+                    await self._learn_http_endpoints(client, progress_data)
+            
+            return progress_data, None
+    
+    async def _learn_http_endpoints(self, client: SynthesisClient, progress_data: Dict[str, Any]):
+        """Enable the HTTP path only when the API supplied the required fields."""
+        api_fields = set(progress_data.get("api_fields", []))
+        if client.api_sources and api_fields.issuperset(HttpProgressClient.REQUIRED_FIELDS):
+            changed = self.http_progress.learn(client.api_sources, await client.context.cookies())
+        else:
+            changed = self.http_progress.forget()
+        
+        if changed:
+            await self.db.set_user_setting(HttpProgressClient.SETTINGS_KEY, self.http_progress.dump_state())
+    
+    async def _prune_notifications_daily(self):
+        """Archive notifications older than the retention window, once a day."""
+        while True:
+            try:
+                pruned = await self.db.prune_notifications(config.notification_retention_days)
+                if pruned:
+                    logger.info(f"Archived {pruned} notifications older than {config.notification_retention_days} days")
+            except Exception as e:
+                logger.error(f"Error pruning notifications: {e}")
+            
+            await asyncio.sleep(24 * 3600)
+    
+    async def run(self):
+        """Pre-warm the browser in the background, then serve MCP requests."""
+        self.browser_manager.prewarm()
+        prune_task = asyncio.create_task(self._prune_notifications_daily())
+        try:
+            await super().run()
+        finally:
+            prune_task.cancel()
+            await self.browser_manager.close()
+            await self.email_monitor.disconnect()
+            if self.http_progress:
+                await self.http_progress.close()
+            await self.db.close()
 
 
 async def main():
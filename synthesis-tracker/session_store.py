@@ -0,0 +1,90 @@
+"""
+Encrypted on-disk storage for authenticated Synthesis browser sessions.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # Session persistence is disabled without cryptography
+    Fernet = None
+    InvalidToken = Exception
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """Persist Playwright ``storage_state`` (cookies and local storage) encrypted.
+    
+    The state is encrypted with a Fernet key (generate one with
+    ``Fernet.generate_key()``). Without a key, or without the cryptography
+    package, nothing is written and every login uses the email-code flow.
+    """
+    
+    def __init__(self, path: str, encryption_key: str = None):
+        self.path = Path(path)
+        self._fernet = None
+        
+        if not encryption_key:
+            logger.info("No session encryption key configured - session reuse disabled")
+        elif Fernet is None:
+            logger.warning("cryptography is not installed - session reuse disabled")
+        else:
+            try:
+                self._fernet = Fernet(encryption_key)
+            except ValueError as e:
+                logger.warning(f"Invalid session encryption key ({e}) - session reuse disabled")
+    
+    @property
+    def enabled(self) -> bool:
+        return self._fernet is not None
+    
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Return the saved storage state, or None if missing or unreadable."""
+        if not self.enabled or not self.path.exists():
+            return None
+        
+        try:
+            token = self.path.read_bytes()
+            return json.loads(self._fernet.decrypt(token))
+        except InvalidToken:
+            logger.warning("Saved session could not be decrypted - ignoring it")
+            return None
+        except Exception as e:
+            logger.error(f"Error loading saved session: {e}")
+            return None
+    
+    def save(self, state: Dict[str, Any]) -> bool:
+        """Encrypt and atomically write the storage state (owner read/write only)."""
+        if not self.enabled:
+            return False
+        
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            token = self._fernet.encrypt(json.dumps(state).encode("utf-8"))
+            
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(token)
+            os.replace(tmp_path, self.path)
+            
+            logger.info("Saved authenticated session")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error saving session: {e}")
+            return False
+    
+    def clear(self):
+        """Forget the saved session."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error clearing saved session: {e}")
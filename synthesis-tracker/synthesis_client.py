@@ -4,9 +4,13 @@ Synthesis.com web automation client for login and progress tracking.
 
 import asyncio
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Union, Awaitable
 from datetime import datetime, timedelta
-from playwright.async_api import async_playwright, Browser, Page, TimeoutError
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Response, TimeoutError
+
+from selector_stats import SelectorStats
+from extraction import FIELD_SELECTORS, PROGRESS_FIELDS, HtmlExtractor, new_progress_data, parse_candidates
 
 logger = logging.getLogger(__name__)
 
@@ -14,11 +18,115 @@ logger = logging.getLogger(__name__)
 class SynthesisClient:
     """Web automation client for Synthesis.com."""
     
-    def __init__(self, headless: bool = True, timeout: int = 30000):
+    # Selector candidates per progress field (shared with the offline extractor)
+    FIELD_SELECTORS = FIELD_SELECTORS
+    
+    # Elements that only appear once logged in
+    LOGIN_INDICATORS = [
+        'text=Dashboard',
+        'text=Progress',
+        'text=Lessons',
+        'text=Study',
+        '[data-testid="dashboard"]',
+        '.dashboard',
+        '#dashboard'
+    ]
+    
+    PROGRESS_FIELDS = PROGRESS_FIELDS
+    
+    # JSON keys (compared lower-case, without underscores or dashes) that carry
+    # each progress field in the dashboard's API responses
+    API_FIELD_KEYS = {
+        "study_time_minutes": ("studytimeminutes", "studyminutes", "minutestoday", "todayminutes",
+                               "timespentminutes", "minutesstudied"),
+        "study_time_seconds": ("studytimeseconds", "secondstoday", "timespentseconds", "timespent"),
+        "lessons_completed": ("lessonscompleted", "completedlessons", "recentlessons"),
+        "last_activity": ("lastactivity", "lastactivityat", "lastactive", "lastactiveat", "lastseenat"),
+        "streak_days": ("streakdays", "currentstreak", "streak", "daystreak"),
+        "total_points": ("totalpoints", "points", "score", "totalscore")
+    }
+    
+    # Runs in the page: probes the candidates for every field (all of them, or
+    # only up to the first match with firstHit), re-polling until the required
+    # fields are found or the deadline passes.
+    EXTRACTION_SCRIPT = """
+    async ({ fields, required, deadlineMs, maxTexts, firstHit }) => {
+        const compile = (selector) => {
+            const m = selector.match(/^text=\\/(.*)\\/([a-z]*)$/);
+            return m ? { regex: new RegExp(m[1], m[2]) } : { css: selector };
+        };
+        const clean = (texts) => texts.map(t => (t || '').trim()).filter(Boolean).slice(0, maxTexts);
+        const byText = (regex) => {
+            const root = document.body || document.documentElement;
+            const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+            const texts = [];
+            let node;
+            while ((node = walker.nextNode()) && texts.length < maxTexts) {
+                if (node.parentElement && regex.test(node.textContent)) {
+                    texts.push(node.parentElement.innerText);
+                }
+            }
+            return texts;
+        };
+        const probe = (candidate) => {
+            try {
+                if (candidate.regex) return clean(byText(candidate.regex));
+                return clean(Array.from(document.querySelectorAll(candidate.css), el => el.innerText));
+            } catch (e) {
+                return [];
+            }
+        };
+        
+        const probeField = (candidates) => {
+            if (!firstHit) return candidates.map(probe);
+            // Stop at the first candidate that matches; later ones are reported empty
+            const results = candidates.map(() => []);
+            for (let i = 0; i < candidates.length; i++) {
+                results[i] = probe(candidates[i]);
+                if (results[i].length) break;
+            }
+            return results;
+        };
+        
+        const compiled = Object.entries(fields).map(([field, selectors]) => [field, selectors.map(compile)]);
+        const started = performance.now();
+        while (true) {
+            const results = {};
+            for (const [field, candidates] of compiled) {
+                results[field] = probeField(candidates);
+            }
+            const complete = required.every(field => (results[field] || []).some(texts => texts.length));
+            if (complete || performance.now() - started >= deadlineMs) return results;
+            await new Promise(resolve => setTimeout(resolve, 100));
+        }
+    }
+    """
+    
+    def __init__(self, headless: bool = True, timeout: int = 30000, browser_manager=None,
+                 session_store=None, base_url: str = "https://synthesis.com",
+                 extraction_deadline: int = 5000, resource_blocker=None,
+                 capture_api: bool = True, selector_stats: Optional[SelectorStats] = None,
+                 archive_html: bool = False):
         self.headless = headless
         self.timeout = timeout
+        self.extraction_deadline = extraction_deadline
+        self.browser_manager = browser_manager
+        self.session_store = session_store
+        self.resource_blocker = resource_blocker
+        self.capture_api = capture_api
+        self.archive_html = archive_html
+        self.page_html: Optional[str] = None
+        self.selector_stats = selector_stats or SelectorStats()
+        self.selector_stats.begin_run()
+        self.base_url = base_url.rstrip("/")
+        self._api_host = urlparse(self.base_url).hostname or ""
+        self._api_payloads: List[Tuple[str, Any]] = []
+        self._pending_reads: List[asyncio.Task] = []
+        self.api_sources: Dict[str, str] = {}
         self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        self.session_restored = False
         
     async def __aenter__(self):
         """Async context manager entry."""
@@ -32,12 +140,30 @@ class SynthesisClient:
     async def start(self):
         """Start browser session."""
         try:
-            self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(
-                headless=self.headless,
-                args=['--no-sandbox', '--disable-dev-shm-usage']
-            )
-            self.page = await self.browser.new_page()
+            # Restore cookies/local storage from a previous authenticated session
+            storage_state = self.session_store.load() if self.session_store else None
+            self.session_restored = storage_state is not None
+            
+            if self.browser_manager:
+                # Isolated context on the shared, already-warm browser
+                self.context = await self.browser_manager.acquire_context(storage_state=storage_state)
+            else:
+                self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(
+                    headless=self.headless,
+                    args=['--no-sandbox', '--disable-dev-shm-usage']
+                )
+                self.context = await self.browser.new_context(storage_state=storage_state)
+            
+            # Skip images, fonts, media and trackers before any navigation
+            if self.resource_blocker:
+                await self.context.route("**/*", self.resource_blocker.handle)
+            
+            self.page = await self.context.new_page()
+            
+            # Record the dashboard's own JSON API responses as pages load
+            if self.capture_api:
+                self.page.on("response", self._on_response)
             
             # Set longer timeout for elements
             self.page.set_default_timeout(self.timeout)
@@ -53,21 +179,181 @@ class SynthesisClient:
         try:
             if self.page:
                 await self.page.close()
+            if self.context and self.browser_manager:
+                await self.browser_manager.release_context(self.context)
+                self.context = None
             if self.browser:
                 await self.browser.close()
             if hasattr(self, 'playwright'):
                 await self.playwright.stop()
+            if self.resource_blocker:
+                report = self.resource_blocker.report()
+                logger.info(f"Blocked {report['blocked_requests']} requests "
+                            f"(~{report['estimated_bytes_saved'] / 1024:.0f} KB saved)")
             logger.info("Browser session stopped")
         except Exception as e:
             logger.error(f"Error stopping browser: {e}")
     
-    async def login(self, email: str, verification_code: str) -> bool:
-        """Login to Synthesis.com using email and verification code."""
+    def _on_response(self, response: Response):
+        """Queue a read of same-site XHR/fetch JSON responses."""
+        try:
+            if response.request.resource_type not in ("xhr", "fetch"):
+                return
+            if "json" not in response.headers.get("content-type", ""):
+                return
+            
+            host = urlparse(response.url).hostname or ""
+            if host != self._api_host and not host.endswith("." + self._api_host):
+                return
+            
+            self._pending_reads.append(asyncio.create_task(self._read_response(response)))
+        except Exception as e:
+            logger.debug(f"Ignoring response {response.url}: {e}")
+    
+    async def _read_response(self, response: Response):
+        try:
+            self._api_payloads.append((response.url, await response.json()))
+        except Exception as e:
+            logger.debug(f"Could not read JSON from {response.url}: {e}")
+    
+    async def _collect_api_progress(self) -> Dict[str, Any]:
+        """Map captured API payloads onto progress fields (missing fields are omitted)."""
+        if self._pending_reads:
+            await asyncio.wait(self._pending_reads, timeout=self.extraction_deadline / 1000)
+            self._pending_reads = []
+        
+        found, self.api_sources = self.map_api_payloads(self._api_payloads)
+        return found
+    
+    @classmethod
+    def map_api_payloads(cls, payloads: List[Tuple[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Map ``(url, json)`` payloads onto progress fields.
+        
+        Returns the fields found and the URL each one came from. Later
+        payloads win, so refreshed data beats the initial page load.
+        """
+        found: Dict[str, Any] = {}
+        sources: Dict[str, str] = {}
+        
+        for url, payload in reversed(payloads):
+            for field, value in cls._find_api_fields(payload).items():
+                if field not in found:
+                    found[field] = value
+                    sources[field] = url
+        
+        if "study_time_seconds" in found:
+            seconds = found.pop("study_time_seconds")
+            url = sources.pop("study_time_seconds")
+            if "study_time_minutes" not in found:
+                found["study_time_minutes"] = seconds // 60
+                sources["study_time_minutes"] = url
+        
+        return found, sources
+    
+    @classmethod
+    def _find_api_fields(cls, payload: Any, depth: int = 0) -> Dict[str, Any]:
+        """Walk a JSON payload breadth-first, returning the first value per known key."""
+        found: Dict[str, Any] = {}
+        if depth > 6:
+            return found
+        
+        lookup = {alias: field for field, aliases in cls.API_FIELD_KEYS.items() for alias in aliases}
+        nested = []
+        
+        if isinstance(payload, dict):
+            for key, value in payload.items():
+                field = lookup.get(str(key).replace("_", "").replace("-", "").lower())
+                normalized = cls._normalize_api_value(field, value) if field else None
+                if normalized is not None:
+                    found.setdefault(field, normalized)
+                elif isinstance(value, (dict, list)):
+                    nested.append(value)
+        elif isinstance(payload, list):
+            nested.extend(item for item in payload if isinstance(item, (dict, list)))
+        
+        for value in nested:
+            for field, item in cls._find_api_fields(value, depth + 1).items():
+                found.setdefault(field, item)
+        
+        return found
+    
+    @staticmethod
+    def _normalize_api_value(field: str, value: Any) -> Any:
+        """Coerce a raw JSON value to the progress_data type, or None if it does not fit."""
+        if field == "lessons_completed":
+            if not isinstance(value, list):
+                return None
+            titles = []
+            for item in value:
+                if isinstance(item, dict):
+                    item = item.get("title") or item.get("name")
+                if isinstance(item, str) and item.strip():
+                    titles.append(item.strip())
+            return titles[:5] if titles else None
+        
+        if field == "last_activity":
+            return value if isinstance(value, str) and value else None
+        
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, (int, float)):
+            return int(value)
+        if isinstance(value, dict):
+            # e.g. {"streak": {"current": 4, "longest": 9}}
+            for key in ("current", "value", "total", "count"):
+                if isinstance(value.get(key), (int, float)) and not isinstance(value.get(key), bool):
+                    return int(value[key])
+        return None
+    
+    async def restore_session(self) -> bool:
+        """Check whether the restored session is still authenticated.
+        
+        Loads the dashboard once; an expired session is redirected to the
+        login page, in which case the saved state is discarded.
+        """
+        if not self.session_restored:
+            return False
+        
+        try:
+            await self.page.goto(f"{self.base_url}/dashboard", wait_until="domcontentloaded")
+            
+            if "/login" not in self.page.url and await self._check_login_success():
+                logger.info("Reusing saved Synthesis session")
+                return True
+            
+        except Exception as e:
+            logger.warning(f"Could not validate saved session: {e}")
+        
+        logger.info("Saved Synthesis session has expired")
+        self.session_restored = False
+        await self.context.clear_cookies()
+        if self.session_store:
+            self.session_store.clear()
+        return False
+    
+    async def save_session(self) -> bool:
+        """Persist the current authenticated cookies and storage."""
+        if not self.session_store or not self.session_store.enabled:
+            return False
+        
+        try:
+            state = await self.context.storage_state()
+            return self.session_store.save(state)
+        except Exception as e:
+            logger.error(f"Error capturing session state: {e}")
+            return False
+    
+    async def login(self, email: str, verification_code: Union[str, Awaitable[Optional[str]]]) -> bool:
+        """Login to Synthesis.com using email and verification code.
+        
+        ``verification_code`` may be awaitable (e.g. a mailbox watcher); it is
+        awaited once the code has been requested.
+        """
         try:
             logger.info("Starting Synthesis login process")
             
             # Navigate to login page
-            await self.page.goto("https://synthesis.com/login")
+            await self.page.goto(f"{self.base_url}/login")
             await self.page.wait_for_load_state("networkidle")
             
             # Enter email
@@ -78,6 +364,12 @@ class SynthesisClient:
             submit_button = await self.page.wait_for_selector('button[type="submit"], button:has-text("Continue")', timeout=5000)
             await submit_button.click()
             
+            if not isinstance(verification_code, str):
+                verification_code = await verification_code
+                if not verification_code:
+                    logger.error("No verification code received")
+                    return False
+            
             # Wait for verification code input
             code_input = await self.page.wait_for_selector('input[placeholder*="code"], input[type="text"]', timeout=10000)
             await code_input.fill(verification_code)
@@ -94,6 +386,7 @@ class SynthesisClient:
             
             if login_success:
                 logger.info("Successfully logged into Synthesis")
+                await self.save_session()
                 return True
             else:
                 logger.error("Login appeared to fail - not on expected page")
@@ -109,20 +402,11 @@ class SynthesisClient:
     async def _check_login_success(self) -> bool:
         """Check if login was successful by looking for dashboard elements."""
         try:
-            # Look for common elements that indicate successful login
-            success_indicators = [
-                'text=Dashboard',
-                'text=Progress',
-                'text=Lessons',
-                'text=Study',
-                '[data-testid="dashboard"]',
-                '.dashboard',
-                '#dashboard'
-            ]
-            
-            for indicator in success_indicators:
+            # Look for common elements that indicate successful login, last winner first
+            for indicator in self.selector_stats.order("login", self.LOGIN_INDICATORS):
                 try:
                     await self.page.wait_for_selector(indicator, timeout=3000)
+                    self.selector_stats.record("login", indicator)
                     return True
                 except TimeoutError:
                     continue
@@ -154,40 +438,30 @@ class SynthesisClient:
                 except TimeoutError:
                     logger.warning("Could not find dashboard link, staying on current page")
             
-            progress_data = {
-                "date": datetime.now().isoformat(),
-                "logged_in": True,
-                "study_time_minutes": 0,
-                "lessons_completed": [],
-                "last_activity": None,
-                "streak_days": 0,
-                "total_points": 0
-            }
-            
-            # Extract study time information
-            study_time = await self._extract_study_time()
-            if study_time:
-                progress_data["study_time_minutes"] = study_time
+            progress_data = new_progress_data()
             
-            # Extract completed lessons
-            lessons = await self._extract_lessons()
-            if lessons:
-                progress_data["lessons_completed"] = lessons
+            # Prefer the values the dashboard fetched from its own API
+            api_data = await self._collect_api_progress() if self.capture_api else {}
+            progress_data.update(api_data)
             
-            # Extract last activity
-            last_activity = await self._extract_last_activity()
-            if last_activity:
-                progress_data["last_activity"] = last_activity
+            missing = [field for field, key in self.PROGRESS_FIELDS.items() if key not in api_data]
+            if api_data:
+                progress_data["source"] = "api+dom" if missing else "api"
+                progress_data["api_fields"] = sorted(api_data)
+            else:
+                progress_data["source"] = "dom"
             
-            # Extract streak information
-            streak = await self._extract_streak()
-            if streak:
-                progress_data["streak_days"] = streak
+            if missing:
+                # Fall back to the DOM, probing the selectors in a single in-page round trip
+                for field, value in (await self._extract_dom_fields(missing)).items():
+                    progress_data[self.PROGRESS_FIELDS[field]] = value
             
-            # Extract points/score
-            points = await self._extract_points()
-            if points:
-                progress_data["total_points"] = points
+            # Keep the rendered page so the extraction can be replayed after extractor fixes
+            if self.archive_html:
+                try:
+                    self.page_html = await self.page.content()
+                except Exception as e:
+                    logger.warning(f"Could not capture page HTML: {e}")
             
             logger.info(f"Extracted progress data: {progress_data}")
             return progress_data
@@ -196,171 +470,70 @@ class SynthesisClient:
             logger.error(f"Error extracting study progress: {e}")
             return {"date": datetime.now().isoformat(), "logged_in": True, "error": str(e)}
     
-    async def _extract_study_time(self) -> Optional[int]:
-        """Extract today's study time in minutes."""
-        try:
-            # Common selectors for study time
-            time_selectors = [
-                'text=/\\d+\\s*(minutes?|mins?|hours?)/',
-                '[data-testid*="time"]',
-                '.study-time',
-                '.time-spent',
-                '[class*="duration"]'
-            ]
-            
-            for selector in time_selectors:
-                try:
-                    element = await self.page.wait_for_selector(selector, timeout=2000)
-                    text = await element.inner_text()
-                    
-                    # Parse time from text
-                    minutes = self._parse_time_to_minutes(text)
-                    if minutes is not None:
-                        return minutes
-                except TimeoutError:
-                    continue
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error extracting study time: {e}")
-            return None
-    
-    def _parse_time_to_minutes(self, time_text: str) -> Optional[int]:
-        """Parse time text into minutes."""
-        import re
+    async def _extract_dom_fields(self, fields: List[str]) -> Dict[str, Any]:
+        """Parse the given fields from the page, trying the best selectors first.
         
-        # Extract numbers and time units
-        hours_match = re.search(r'(\\d+)\\s*(?:hours?|hrs?)', time_text, re.IGNORECASE)
-        minutes_match = re.search(r'(\\d+)\\s*(?:minutes?|mins?)', time_text, re.IGNORECASE)
+        Outside exploration runs each field stops at its first matching
+        selector; fields whose match could not be parsed are re-probed once
+        with every candidate.
+        """
+        ordered = {field: self.selector_stats.order(field, self.FIELD_SELECTORS[field]) for field in fields}
+        first_hit = not self.selector_stats.exploring
         
-        total_minutes = 0
+        candidates = await self._extract_fields(
+            ordered,
+            required=[field for field in fields if field != "lessons"],
+            first_hit=first_hit
+        )
         
-        if hours_match:
-            total_minutes += int(hours_match.group(1)) * 60
+        found: Dict[str, Any] = {}
+        retry = []
+        for field in fields:
+            field_candidates = candidates.get(field, [])
+            value, selector = parse_candidates(field, ordered[field], field_candidates)
+            if value is not None:
+                found[field] = value
+                self.selector_stats.record(field, selector)
+            elif first_hit and any(field_candidates):
+                retry.append(field)
         
-        if minutes_match:
-            total_minutes += int(minutes_match.group(1))
+        if retry:
+            # A matching selector gave unparseable text; probe the rest once, without waiting
+            candidates = await self._extract_fields(
+                {field: ordered[field] for field in retry}, required=[], first_hit=False, deadline=0
+            )
+            for field in retry:
+                value, selector = parse_candidates(field, ordered[field], candidates.get(field, []))
+                if value is not None:
+                    found[field] = value
+                    self.selector_stats.record(field, selector)
         
-        return total_minutes if total_minutes > 0 else None
-    
-    async def _extract_lessons(self) -> List[str]:
-        """Extract completed lessons."""
-        try:
-            lessons = []
-            
-            # Look for lesson lists or completed items
-            lesson_selectors = [
-                '.lesson-item',
-                '.completed-lesson',
-                '[data-testid*="lesson"]',
-                '.lesson-title'
-            ]
-            
-            for selector in lesson_selectors:
-                try:
-                    elements = await self.page.query_selector_all(selector)
-                    for element in elements:
-                        text = await element.inner_text()
-                        if text and text.strip():
-                            lessons.append(text.strip())
-                    
-                    if lessons:
-                        break
-                except Exception:
-                    continue
-            
-            return lessons[:5]  # Return up to 5 recent lessons
-            
-        except Exception as e:
-            logger.error(f"Error extracting lessons: {e}")
-            return []
+        return found
     
-    async def _extract_last_activity(self) -> Optional[str]:
-        """Extract last activity timestamp."""
+    async def _extract_fields(self, fields: Dict[str, List[str]] = None, required: List[str] = None,
+                              first_hit: bool = False, deadline: int = None) -> Dict[str, List[List[str]]]:
+        """Evaluate all field selectors in the page at once.
+        
+        Returns, for each field, the trimmed texts matched by each selector
+        candidate (in the order given, FIELD_SELECTORS by default). The page is
+        re-probed until every required field has a match or ``deadline`` ms
+        (``extraction_deadline`` by default) have passed.
+        """
         try:
-            # Look for "last seen" or activity timestamps
-            activity_selectors = [
-                'text=/last\\s+(active|seen|login)/',
-                '[data-testid*="activity"]',
-                '.last-activity',
-                '.activity-time'
-            ]
-            
-            for selector in activity_selectors:
-                try:
-                    element = await self.page.wait_for_selector(selector, timeout=2000)
-                    text = await element.inner_text()
-                    return text.strip()
-                except TimeoutError:
-                    continue
-            
-            return None
-            
+            return await self.page.evaluate(self.EXTRACTION_SCRIPT, {
+                "fields": self.FIELD_SELECTORS if fields is None else fields,
+                "required": ["study_time", "last_activity", "streak", "points"] if required is None else required,
+                "deadlineMs": self.extraction_deadline if deadline is None else deadline,
+                "maxTexts": 20,
+                "firstHit": first_hit
+            })
         except Exception as e:
-            logger.error(f"Error extracting last activity: {e}")
-            return None
+            logger.error(f"Error evaluating extraction script: {e}")
+            return {}
     
-    async def _extract_streak(self) -> Optional[int]:
-        """Extract streak days."""
-        try:
-            # Look for streak information
-            streak_selectors = [
-                'text=/\\d+\\s*day\\s*streak/',
-                '[data-testid*="streak"]',
-                '.streak',
-                '.consecutive-days'
-            ]
-            
-            for selector in streak_selectors:
-                try:
-                    element = await self.page.wait_for_selector(selector, timeout=2000)
-                    text = await element.inner_text()
-                    
-                    # Extract number from streak text
-                    import re
-                    match = re.search(r'(\\d+)', text)
-                    if match:
-                        return int(match.group(1))
-                except TimeoutError:
-                    continue
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error extracting streak: {e}")
-            return None
-    
-    async def _extract_points(self) -> Optional[int]:
-        """Extract total points or score."""
-        try:
-            # Look for points/score information
-            points_selectors = [
-                'text=/\\d+\\s*(points?|pts?)/',
-                '[data-testid*="points"]',
-                '.points',
-                '.score',
-                '.total-score'
-            ]
-            
-            for selector in points_selectors:
-                try:
-                    element = await self.page.wait_for_selector(selector, timeout=2000)
-                    text = await element.inner_text()
-                    
-                    # Extract number from points text
-                    import re
-                    match = re.search(r'(\\d+)', text)
-                    if match:
-                        return int(match.group(1))
-                except TimeoutError:
-                    continue
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error extracting points: {e}")
-            return None
+    async def extract_from_html(self) -> Dict[str, Any]:
+        """Run the offline extractor over the current page's HTML."""
+        return HtmlExtractor().extract(await self.page.content())
     
     async def take_screenshot(self, path: str = None) -> str:
         """Take a screenshot for debugging."""
@@ -4,6 +4,7 @@ Tests for Synthesis Tracker MCP server.
 
 import pytest
 import asyncio
+import json
 from unittest.mock import Mock, patch, AsyncMock
 from datetime import datetime
 
@@ -12,8 +13,32 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from synthesis_tracker.server import SynthesisTrackerServer
-from shared.storage_utils import StudyProgressDB
-from shared.email_utils import SynthesisEmailMonitor
+from synthesis_tracker.browser_manager import BrowserManager
+from synthesis_tracker.session_store import SessionStore
+from synthesis_tracker.resource_blocker import ResourceBlocker
+from synthesis_tracker.http_progress import HttpProgressClient
+from synthesis_tracker.selector_stats import SelectorStats
+from synthesis_tracker.account_sync import AccountSyncOrchestrator
+from synthesis_tracker.extraction import HtmlExtractor, FIELD_SELECTORS, parse_candidates
+from synthesis_tracker.parsing import (
+    parse_duration, parse_count, parse_relative_time, load_corpus, check_corpus
+)
+from synthesis_tracker.replay import replay_snapshots
+from synthesis_tracker.synthesis_client import SynthesisClient
+from shared.storage_utils import StudyProgressDB, AsyncStudyProgressDB, decode_snapshot, main as storage_main
+from shared.email_utils import SynthesisEmailMonitor, AsyncSynthesisEmailMonitor
+
+
+def frozen_today(day: str):
+    """Pin the storage clock so streak recency is judged against ``day``."""
+    now = datetime.strptime(day, "%Y-%m-%d").replace(hour=12)
+    
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+    
+    return patch('shared.storage_utils.datetime', FrozenDatetime)
 
 
 class TestSynthesisTrackerServer:
@@ -33,6 +58,9 @@ class TestSynthesisTrackerServer:
             mock_config.headless_browser = True
             mock_config.study_goal_minutes = 30
             mock_config.minimum_study_minutes = 15
+            mock_config.accounts = [{"name": "default", "email": "student@example.com"}]
+            mock_config.sync_max_concurrency = 3
+            mock_config.account_sync_deadline_seconds = 120
             
             return SynthesisTrackerServer()
     
@@ -41,16 +69,19 @@ class TestSynthesisTrackerServer:
         """Test that tools are properly defined."""
         tools = await server.get_tools()
         
-        assert len(tools) == 6
+        assert len(tools) == 9
         tool_names = [tool.name for tool in tools]
         
         expected_tools = [
             "check_synthesis_login",
             "get_study_progress", 
             "get_weekly_summary",
+            "get_monthly_summary",
+            "get_yearly_summary",
             "send_study_reminder",
             "get_current_streak",
-            "force_update_progress"
+            "force_update_progress",
+            "sync_all_accounts"
         ]
         
         for expected_tool in expected_tools:
@@ -95,6 +126,58 @@ class TestSynthesisTrackerServer:
         assert "current_streak" in result
         assert "recent_activity" in result
         assert isinstance(result["recent_activity"], list)
+    
+    @pytest.mark.asyncio
+    async def test_http_endpoints_learned_only_with_required_fields(self, server):
+        """Test that a partial API field set disables the HTTP fast path."""
+        server.http_progress = Mock(learn=Mock(return_value=True), forget=Mock(return_value=True),
+                                    dump_state=Mock(return_value="{}"))
+        client = Mock(api_sources={"total_points": "https://synthesis.com/api/me"})
+        client.context.cookies = AsyncMock(return_value=[])
+        
+        await server._learn_http_endpoints(client, {"source": "api+dom", "api_fields": ["total_points"],
+                                                    "study_time_minutes": 0})
+        server.http_progress.forget.assert_called_once()
+        server.http_progress.learn.assert_not_called()
+        
+        client.api_sources["study_time_minutes"] = "https://synthesis.com/api/progress"
+        await server._learn_http_endpoints(client, {"source": "api+dom",
+                                                    "api_fields": ["study_time_minutes", "total_points"]})
+        server.http_progress.learn.assert_called_once_with(client.api_sources, [])
+    
+    @pytest.mark.asyncio
+    async def test_default_scrape_uses_primary_account(self, server):
+        """Test that a scrape without an account logs in as the first account with its own session."""
+        accounts = [{"name": "kid1", "email": "kid1@example.com"}, {"name": "kid2", "email": "kid2@example.com"}]
+        client = AsyncMock()
+        client.restore_session = AsyncMock(return_value=False)
+        client.__aenter__.return_value = client
+        server.selector_stats = SelectorStats()
+        server._login = AsyncMock(return_value="login failed")
+        
+        with patch('synthesis_tracker.server.config') as mock_config, \
+             patch('synthesis_tracker.server.SynthesisClient', return_value=client) as client_cls:
+            mock_config.accounts = accounts
+            mock_config.synthesis_email = ""
+            server.session_stores = {"kid1": server.session_store}
+            
+            assert await server._scrape_progress(None) == (None, "login failed")
+        
+        server._login.assert_awaited_once_with(client, "kid1@example.com", "kid1@example.com")
+        assert client_cls.call_args.kwargs["session_store"] is server.session_store
+    
+    @pytest.mark.asyncio
+    async def test_notification_retention_runs_with_server(self, server):
+        """The daily prune task archives notifications past the configured retention."""
+        server.db.prune_notifications = AsyncMock(return_value=2)
+        
+        with patch('synthesis_tracker.server.config') as mock_config, \
+             patch('synthesis_tracker.server.asyncio.sleep', AsyncMock(side_effect=asyncio.CancelledError)):
+            mock_config.notification_retention_days = 30
+            with pytest.raises(asyncio.CancelledError):
+                await server._prune_notifications_daily()
+        
+        server.db.prune_notifications.assert_awaited_once_with(30)
 
 
 class TestStudyProgressDB:
@@ -138,9 +221,58 @@ class TestStudyProgressDB:
                 "study_time_minutes": 30
             })
         
-        streak = db.get_current_streak()
+        with frozen_today("2024-01-20"):
+            streak = db.get_current_streak()
         assert streak == 5
     
+    def test_stale_streak_is_not_current(self, db):
+        """Test that a run which ended before yesterday is no longer current."""
+        for day in ["2024-01-01", "2024-01-02", "2024-01-03"]:
+            db.save_study_session({"date": day, "logged_in": True, "study_time_minutes": 20})
+        
+        with frozen_today("2024-01-04"):
+            assert db.get_current_streak() == 3
+        
+        with frozen_today("2024-04-01"):
+            info = db.get_streak_info()
+        assert info["current_streak"] == 0
+        assert info["current_streak_start"] is None
+        assert info["longest_streak"] == 3
+    
+    def test_streak_table_merges_and_splits(self, db):
+        """Test incremental streak maintenance and rebuild."""
+        with frozen_today("2024-01-07"):
+            for day in ["2024-01-01", "2024-01-02", "2024-01-04", "2024-01-05", "2024-01-06"]:
+                db.save_study_session({"date": day, "logged_in": True, "study_time_minutes": 20})
+            
+            info = db.get_streak_info()
+            assert info["current_streak"] == 3
+            assert info["current_streak_start"] == "2024-01-04"
+            
+            # Filling the gap joins both runs
+            db.save_study_session({"date": "2024-01-03", "logged_in": True, "study_time_minutes": 20})
+            info = db.get_streak_info()
+            assert info["current_streak"] == 6
+            assert info["longest_streak"] == 6
+            
+            # A day without study splits the run again
+            db.save_study_session({"date": "2024-01-05", "logged_in": True, "study_time_minutes": 0})
+            info = db.get_streak_info()
+            assert info["current_streak"] == 1
+            assert info["longest_streak"] == 4
+            
+            assert db.rebuild_streaks() == 2
+            assert db.get_streak_info() == info
+        
+    
+    def test_streak_broken_by_latest_session(self, db):
+        """Test that a newer non-study day resets the current streak."""
+        db.save_study_session({"date": "2024-01-01", "logged_in": True, "study_time_minutes": 20})
+        db.save_study_session({"date": "2024-01-02", "logged_in": False})
+        
+        assert db.get_current_streak() == 0
+        assert db.get_streak_info()["longest_streak"] == 1
+    
     def test_weekly_stats(self, db):
         """Test weekly statistics calculation."""
         # Add study sessions for a week
@@ -152,10 +284,631 @@ class TestStudyProgressDB:
                 "study_time_minutes": 30 if i < 5 else 0  # 5 study days
             })
         
-        stats = db.get_weekly_stats()
-        assert stats["days_logged_in"] == 5
+        with frozen_today("2024-01-21"):
+            stats = db.get_weekly_stats()
+        assert stats["week_start"] == "2024-01-14"
+        assert stats["days_logged_in"] == 7  # logged in every day, studied on 5
         assert stats["total_minutes"] == 150
-        assert stats["avg_minutes"] == 30
+        assert stats["avg_minutes"] == 21.4
+        assert [day["study_minutes"] for day in stats["daily_breakdown"]] == [0, 0, 30, 30, 30, 30, 30]
+    
+    def test_longest_streak_within_range(self, db):
+        """Test that runs crossing the range edges only count the days inside it."""
+        days = [f"2023-12-{day}" for day in range(20, 32)] + ["2024-01-01", "2024-01-02",
+                                                               "2024-03-10", "2024-03-11", "2024-03-12"]
+        for day in days:
+            db.save_study_session({"date": day, "logged_in": True, "study_time_minutes": 20})
+        
+        assert db.get_streak_info()["longest_streak"] == 14
+        assert db.get_longest_streak("2024-01-01", "2024-12-31") == 3
+        assert db.get_longest_streak("2023-01-01", "2023-12-31") == 12
+        assert db.get_longest_streak("2022-01-01", "2022-12-31") == 0
+    
+    def test_stats_from_rollups(self, db):
+        """Test arbitrary-range statistics answered from rollup tables."""
+        for day in range(1, 32):
+            db.save_study_session({
+                "date": f"2024-01-{day:02d}",
+                "logged_in": day % 7 != 0,
+                "study_time_minutes": 20
+            })
+        db.save_study_session({"date": "2024-02-01", "logged_in": True, "study_time_minutes": 45})
+        
+        stats = db.get_stats("2024-01-10", "2024-02-01", "month")
+        assert stats["totals"]["days_logged_in"] == 20
+        assert stats["totals"]["total_minutes"] == 19 * 20 + 45
+        assert [p["period_start"] for p in stats["periods"]] == ["2024-01-01", "2024-02-01"]
+        
+        weeks = db.get_stats("2024-01-01", "2024-01-31", "week")
+        assert sum(p["total_minutes"] for p in weeks["periods"]) == 27 * 20
+        
+        # Rewriting a day adjusts every rollup level
+        db.save_study_session({"date": "2024-01-15", "logged_in": True, "study_time_minutes": 80})
+        year = db.get_stats("2024-01-01", "2024-12-31", "year")
+        assert year["totals"]["total_minutes"] == 26 * 20 + 80 + 45
+    
+    def test_bulk_save_sessions(self, db):
+        """Test chunked bulk ingestion with upserts."""
+        db.save_study_session({"date": "2024-01-01", "logged_in": False})
+        created_at = db.get_study_session("2024-01-01")["created_at"]
+        
+        sessions = (
+            {"date": f"2024-01-{day:02d}", "logged_in": True, "study_time_minutes": day}
+            for day in range(1, 11)
+        )
+        result = db.save_study_sessions_bulk(sessions, chunk_size=3)
+        
+        assert result["rows"] == 10
+        assert "rows_per_second" in result
+        
+        session = db.get_study_session("2024-01-01")
+        assert session["study_minutes"] == 1
+        assert session["created_at"] == created_at
+        with frozen_today("2024-01-10"):
+            assert db.get_current_streak() == 10
+    
+    def test_bulk_save_reports_partial_import(self, db, tmp_path):
+        """Test that a failing row keeps earlier chunks consistent and is reported."""
+        def sessions():
+            yield {"date": "2024-01-01", "logged_in": True, "study_time_minutes": 20}
+            yield {"date": "2024-01-02", "logged_in": True, "study_time_minutes": 25}
+            raise ValueError("bad row")
+        
+        result = db.save_study_sessions_bulk(sessions(), chunk_size=1)
+        
+        assert result["rows"] == 2
+        assert "bad row" in result["error"]
+        assert db.get_streak_info()["longest_streak"] == 2
+        assert db.get_stats("2024-01-01", "2024-01-31", "month")["totals"]["total_minutes"] == 45
+        
+        export = tmp_path / "history.csv"
+        export.write_text("date,study_minutes\n2024-02-01,lots\n")
+        assert storage_main(["--db", str(tmp_path / "cli.db"), "import", str(export)]) == 1
+    
+    def test_projected_lazy_session_rows(self, db):
+        """Test column projection and lazily decoded JSON fields."""
+        db.save_study_session({
+            "date": "2024-01-15",
+            "logged_in": True,
+            "study_time_minutes": 30,
+            "lessons_completed": ["Fractions"]
+        })
+        
+        session = db.get_study_session("2024-01-15", columns=("date", "logged_in", "study_minutes"))
+        assert session.keys() == ["date", "logged_in", "study_minutes"]
+        assert session["logged_in"] is True
+        assert session.get("raw_data") is None
+        
+        full = db.get_recent_sessions(10000)[0]
+        assert full["lessons_completed"] == ["Fractions"]
+        assert full["raw_data"]["study_time_minutes"] == 30
+        
+        with pytest.raises(ValueError):
+            db.get_study_session("2024-01-15", columns=("date; DROP TABLE study_sessions",))
+    
+    def test_raw_data_snapshots_are_deduplicated(self, db):
+        """Test compressed snapshot storage and migration of inline raw_data."""
+        payload = {"logged_in": True, "study_time_minutes": 20, "lessons_completed": []}
+        db.save_study_session({**payload, "date": "2024-01-01"})
+        db.save_study_session({**payload, "date": "2024-01-01"})
+        
+        with db._pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM raw_snapshots").fetchone()[0] == 1
+            
+            # Simulate a row written before snapshots existed
+            conn.execute("""
+                INSERT INTO study_sessions (date, logged_in, study_minutes, raw_data, created_at, updated_at)
+                VALUES ('2023-12-31', 1, 10, '{"legacy": true}', '', '')
+            """)
+        
+        assert db.get_study_session("2023-12-31")["raw_data"] == {"legacy": True}
+        
+        result = db.migrate_raw_snapshots()
+        assert result["sessions"] == 1
+        assert db.get_study_session("2023-12-31")["raw_data"] == {"legacy": True}
+        assert db.get_study_session("2024-01-01")["raw_data"]["study_time_minutes"] == 20
+    
+    def test_snapshots_shared_across_scrape_times(self, db):
+        """Test that identical content scraped at different times shares one snapshot."""
+        payload = {"logged_in": True, "study_time_minutes": 20, "lessons_completed": ["Fractions"]}
+        db.save_study_session({**payload, "date": "2024-01-01T09:00:12.345678"})
+        db.save_study_session({**payload, "date": "2024-01-01T19:30:01.000001", "scraped_at": "19:30"})
+        db.save_study_session({**payload, "date": "2024-01-02T08:15:00.000000"})
+        
+        with db._pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM raw_snapshots").fetchone()[0] == 1
+            assert conn.execute("SELECT COUNT(DISTINCT raw_data_hash) FROM study_sessions").fetchone()[0] == 1
+        
+        assert db.get_study_session("2024-01-02")["raw_data"]["lessons_completed"] == ["Fractions"]
+    
+    def test_notification_counts_and_retention(self, db):
+        """Test indexed notification counting and the retention job."""
+        db.save_notification("reminder", "Time to study")
+        db.save_notification("reminder", "Still time to study")
+        db.save_notification("achievement", "New streak")
+        db.save_notification("reminder", "Old reminder", date="2020-01-01")
+        
+        assert db.count_notifications("reminder") == 2
+        assert db.has_notification("achievement")
+        assert not db.has_notification("reminder", since="9999-01-01T00:00:00")
+        
+        assert db.prune_notifications(keep_days=30) == 1
+        assert db.count_notifications("reminder", date="2020-01-01") == 0
+        with db._pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM notifications_archive").fetchone()[0] == 1
+    
+    def test_page_snapshots_latest_per_day(self, db):
+        """Test that archived pages are deduplicated and the latest per day is replayed."""
+        first = db.save_page_snapshot("<p>morning</p>", "2024-01-15")
+        db.save_page_snapshot("<p>evening</p>", "2024-01-15")
+        assert db.save_page_snapshot("<p>morning</p>", "2024-01-16") == first
+        
+        snapshots = db.get_page_snapshots()
+        assert [date for date, _ in snapshots] == ["2024-01-15", "2024-01-16"]
+        assert decode_snapshot(snapshots[0][1]) == "<p>evening</p>"
+        
+        with db._pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM page_snapshots").fetchone()[0] == 2
+    
+    def test_replay_corrects_sessions_from_snapshots(self, db):
+        """Test that replay re-extracts DOM-scraped days and leaves API days alone."""
+        pytest.importorskip("selectolax")
+        page = '<ul><li class="lesson-item">Fractions</li></ul><p class="activity-time">Yesterday</p>'
+        db.save_study_session({"date": "2024-01-15", "logged_in": True, "source": "dom"})
+        db.save_study_session({"date": "2024-01-16", "logged_in": True, "source": "api"})
+        db.save_study_session({"date": "2024-01-17", "logged_in": True, "source": "api+dom",
+                               "api_fields": ["total_points"], "total_points": 900, "streak_days": 7})
+        for date in ("2024-01-15", "2024-01-16", "2024-01-17"):
+            db.save_page_snapshot(page, date)
+        
+        result = replay_snapshots(db, workers=1)
+        
+        assert result["snapshots"] == 3
+        assert result["rows"] == 2
+        assert result["skipped"] == 1
+        assert db.get_study_session("2024-01-15")["lessons_completed"] == ["Fractions"]
+        assert db.get_study_session("2024-01-16")["lessons_completed"] == []
+        
+        mixed = db.get_study_session("2024-01-17")
+        assert mixed["total_points"] == 900  # from the API, kept
+        assert mixed["streak_days"] == 0  # the DOM value the page does not support is corrected
+    
+    def test_derived_values_are_cached_until_written(self, db):
+        """Test the write-invalidated cache, including writes from other connections."""
+        today = datetime.now().strftime("%Y-%m-%d")
+        
+        assert db.has_studied_today() is False
+        assert db.has_studied_today() is False
+        assert db.cache_stats()["hits"] >= 1
+        
+        db.save_study_session({"date": today, "logged_in": True, "study_time_minutes": 20})
+        assert db.has_studied_today() is True
+        
+        # A write from a separate connection (e.g. another process) is picked up
+        import sqlite3
+        with sqlite3.connect(db.db_path) as other:
+            other.execute("UPDATE study_sessions SET study_minutes = 0 WHERE date = ?", (today,))
+        assert db.has_studied_today() is False
+    
+    def test_cache_invalidated_per_table(self, db):
+        """Test that settings writes keep cached values and cached rows are not shared."""
+        today = datetime.now().strftime("%Y-%m-%d")
+        db.save_study_session({"date": today, "logged_in": True, "study_time_minutes": 20,
+                               "lessons_completed": ["Fractions"]})
+        db.get_streak_info()
+        
+        db.set_user_setting("email_sync_state", "{}")
+        hits = db.cache_stats()["hits"]
+        db.get_streak_info()
+        assert db.cache_stats()["hits"] == hits + 1
+        
+        row = db.get_study_session(today)
+        row["lessons_completed"].append("Tampered")
+        assert db.get_study_session(today)["lessons_completed"] == ["Fractions"]
+        
+        db.save_study_session({"date": today, "logged_in": True, "study_time_minutes": 0})
+        assert db.has_studied_today() is False
+    
+    def test_connections_are_pooled(self, db):
+        """Test that queries reuse long-lived WAL connections."""
+        db.save_study_session({"date": "2024-01-15", "logged_in": True, "study_time_minutes": 10})
+        db.get_study_session("2024-01-15")
+        db.has_studied_today()
+        
+        assert len(db._pool._all) == 1
+        with db._pool.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+class TestAsyncStudyProgressDB:
+    """Test the asyncio storage facade."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_reads_and_serialized_writes(self):
+        """Test that concurrent writes and reads all complete consistently."""
+        db = AsyncStudyProgressDB(":memory:")
+        
+        writes = [
+            db.save_study_session({"date": f"2024-01-{day:02d}", "logged_in": True, "study_time_minutes": 10})
+            for day in range(1, 8)
+        ]
+        assert all(await asyncio.gather(*writes))
+        
+        with frozen_today("2024-01-07"):
+            session, streak = await asyncio.gather(
+                db.get_study_session("2024-01-07"),
+                db.get_current_streak()
+            )
+        assert session["study_minutes"] == 10
+        assert streak == 7
+        
+        await db.close()
+    
+    @pytest.mark.asyncio
+    async def test_close_drains_without_blocking_loop(self):
+        """Test that close() waits for queued writes while the loop keeps running."""
+        import time
+        db = AsyncStudyProgressDB(":memory:")
+        save = db.sync.save_study_session
+        
+        def slow_save(progress_data):
+            time.sleep(0.2)
+            return save(progress_data)
+        
+        db.sync.save_study_session = slow_save
+        pending = asyncio.ensure_future(
+            db.save_study_session({"date": "2024-01-15", "logged_in": True, "study_time_minutes": 10})
+        )
+        await asyncio.sleep(0)
+        
+        ticks = 0
+        closing = asyncio.ensure_future(db.close())
+        while not closing.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        
+        assert await pending is True
+        assert ticks >= 5
+
+
+class TestAccountSyncOrchestrator:
+    """Test concurrent multi-account syncing."""
+    
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency_and_deadlines(self):
+        """Test the concurrency limit, per-account deadline and stored rows."""
+        db = AsyncStudyProgressDB(":memory:")
+        running = {"now": 0, "peak": 0}
+        
+        async def scrape(account):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            try:
+                await asyncio.sleep(1 if account["name"] == "slow" else 0.05)
+                return {"study_time_minutes": 20, "logged_in": True}, None
+            finally:
+                running["now"] -= 1
+        
+        accounts = [{"name": name, "email": f"{name}@example.com"} for name in ("ann", "ben", "cat", "slow")]
+        orchestrator = AccountSyncOrchestrator(scrape, db, max_concurrency=2, deadline_seconds=0.3)
+        
+        summary = await orchestrator.sync_all(accounts)
+        
+        assert running["peak"] == 2
+        assert summary["succeeded"] == 3
+        assert summary["failed"] == 1
+        
+        rows = {row["account"]: row for row in await db.get_account_sessions()}
+        assert rows["ann"]["success"] and rows["ann"]["study_minutes"] == 20
+        assert not rows["slow"]["success"]
+        assert "Timed out" in rows["slow"]["error"]
+        
+        await db.close()
+
+
+class TestBrowserManager:
+    """Test the shared browser pool."""
+    
+    @pytest.fixture
+    def playwright(self):
+        """Patch Playwright with mocks that hand out fresh browsers."""
+        with patch('synthesis_tracker.browser_manager.async_playwright') as mock_async_playwright:
+            playwright = AsyncMock()
+            mock_async_playwright.return_value.start = AsyncMock(return_value=playwright)
+            
+            def launch(**kwargs):
+                browser = AsyncMock()
+                browser.is_connected = Mock(return_value=True)
+                return browser
+            
+            playwright.chromium.launch = AsyncMock(side_effect=launch)
+            yield playwright
+    
+    @pytest.mark.asyncio
+    async def test_reuses_browser_and_recycles(self, playwright):
+        """Test that contexts share one browser until max_uses is reached."""
+        manager = BrowserManager(max_uses=2)
+        
+        async with manager.context():
+            pass
+        async with manager.context():
+            pass
+        assert manager.stats["launches"] == 1
+        
+        async with manager.context():
+            pass
+        assert manager.stats["launches"] == 2
+        assert manager.stats["recycles"] == 1
+        
+        await manager.close()
+
+
+class TestSessionStore:
+    """Test encrypted session persistence."""
+    
+    def test_round_trip_is_encrypted(self, tmp_path):
+        """Test that saved state is encrypted on disk and restored intact."""
+        fernet = pytest.importorskip("cryptography.fernet")
+        key = fernet.Fernet.generate_key().decode()
+        state = {"cookies": [{"name": "session", "value": "secret-token"}], "origins": []}
+        
+        store = SessionStore(str(tmp_path / "session.enc"), encryption_key=key)
+        assert store.save(state) is True
+        assert b"secret-token" not in (tmp_path / "session.enc").read_bytes()
+        assert store.load() == state
+        
+        other_key = fernet.Fernet.generate_key().decode()
+        assert SessionStore(str(tmp_path / "session.enc"), encryption_key=other_key).load() is None
+    
+    def test_disabled_without_key(self, tmp_path):
+        """Test that nothing is persisted without an encryption key."""
+        store = SessionStore(str(tmp_path / "session.enc"))
+        assert store.enabled is False
+        assert store.save({"cookies": []}) is False
+        assert store.load() is None
+    
+    def test_disabled_with_malformed_key(self, tmp_path):
+        """Test that a bad encryption key disables reuse instead of raising."""
+        pytest.importorskip("cryptography.fernet")
+        store = SessionStore(str(tmp_path / "session.enc"), encryption_key="not-a-fernet-key")
+        assert store.enabled is False
+        assert store.save({"cookies": []}) is False
+
+
+class TestSynthesisClient:
+    """Test progress extraction without a real browser."""
+    
+    @pytest.mark.asyncio
+    async def test_progress_extracted_in_single_evaluate(self):
+        """Test that all fields come from one page.evaluate round trip."""
+        client = SynthesisClient(extraction_deadline=1000, archive_html=True)
+        client.page = AsyncMock()
+        client.page.url = "https://synthesis.com/dashboard"
+        client.page.content = AsyncMock(return_value="<html>rendered</html>")
+        client.page.evaluate = AsyncMock(return_value={
+            "study_time": [[], [], [], [], []],
+            "lessons": [[], ["Fractions", "Decimals"], [], []],
+            "last_activity": [["Last active 2 hours ago"], [], [], []],
+            "streak": [[], [], [], []],
+            "points": [[], [], [], [], []]
+        })
+        
+        progress = await client.get_study_progress()
+        
+        client.page.evaluate.assert_awaited_once()
+        assert client.page.evaluate.call_args[0][1]["deadlineMs"] == 1000
+        assert progress["lessons_completed"] == ["Fractions", "Decimals"]
+        assert progress["last_activity"] == "Last active 2 hours ago"
+        
+        # The archived page is the one the extraction actually saw
+        calls = [name for name, _, _ in client.page.mock_calls]
+        assert calls.index("content") > calls.index("evaluate")
+        assert client.page_html == "<html>rendered</html>"
+    
+    @pytest.mark.asyncio
+    async def test_progress_from_captured_api_responses(self):
+        """Test that captured JSON fills the fields and the DOM only covers the gaps."""
+        client = SynthesisClient()
+        client.page = AsyncMock()
+        client.page.url = "https://synthesis.com/dashboard"
+        client._api_payloads = [
+            ("https://synthesis.com/api/me", {"user": {"streak": {"current": 4}, "totalPoints": 1250}}),
+            ("https://synthesis.com/api/progress", {"data": {
+                "study_time_seconds": 2700,
+                "completed_lessons": [{"title": "Fractions"}, {"title": "Decimals"}]
+            }})
+        ]
+        client.page.evaluate = AsyncMock(return_value={
+            "last_activity": [["Last active 2 hours ago"], [], [], []]
+        })
+        
+        progress = await client.get_study_progress()
+        
+        assert progress["study_time_minutes"] == 45
+        assert progress["lessons_completed"] == ["Fractions", "Decimals"]
+        assert progress["streak_days"] == 4
+        assert progress["total_points"] == 1250
+        assert progress["last_activity"] == "Last active 2 hours ago"
+        assert progress["source"] == "api+dom"
+        assert progress["api_fields"] == ["lessons_completed", "streak_days", "study_time_minutes", "total_points"]
+        assert client.page.evaluate.call_args[0][1]["required"] == ["last_activity"]
+        
+        # The DOM finding nothing does not make a partial API read complete
+        client.page.evaluate = AsyncMock(return_value={})
+        progress = await client.get_study_progress()
+        assert progress["source"] == "api+dom"
+    
+    @pytest.mark.asyncio
+    async def test_learned_selectors_are_probed_first(self):
+        """Test that recorded winners lead the order outside exploration runs."""
+        stats = SelectorStats(explore_every=10)
+        stats.record("last_activity", ".last-activity")
+        
+        client = SynthesisClient(capture_api=False, selector_stats=stats)
+        assert not stats.exploring
+        client.page = AsyncMock()
+        client.page.url = "https://synthesis.com/dashboard"
+        client.page.evaluate = AsyncMock(return_value={
+            "last_activity": [["Yesterday"], [], [], []]
+        })
+        
+        progress = await client.get_study_progress()
+        
+        args = client.page.evaluate.call_args[0][1]
+        assert args["firstHit"] is True
+        assert args["fields"]["last_activity"][0] == ".last-activity"
+        assert progress["last_activity"] == "Yesterday"
+        assert stats.hits["last_activity"][".last-activity"] == 2
+        
+        restored = SelectorStats.from_json(stats.to_json(), explore_every=2)
+        assert restored.begin_run() is True
+        assert restored.hits["last_activity"][".last-activity"] == 1
+
+
+class TestHtmlExtractor:
+    """Test offline extraction from saved dashboard HTML."""
+    
+    DASHBOARD_HTML = """
+    <html><head><script>var cached = "last active never";</script></head><body>
+      <ul><li class="lesson-item">Fractions</li><li class="lesson-item">Decimals</li></ul>
+      <p class="activity-time">Seen   yesterday</p>
+      <div data-testid="streak-counter">12 day streak</div>
+    </body></html>
+    """
+    
+    def test_candidates_mirror_selector_table(self):
+        """Test that every selector candidate is probed in FIELD_SELECTORS order."""
+        pytest.importorskip("selectolax")
+        candidates = HtmlExtractor().candidates(self.DASHBOARD_HTML)
+        
+        assert {field: len(texts) for field, texts in candidates.items()} == \
+            {field: len(selectors) for field, selectors in FIELD_SELECTORS.items()}
+        assert candidates["lessons"][0] == ["Fractions", "Decimals"]
+        assert candidates["last_activity"][0] == []  # script text is ignored
+        assert candidates["streak"][1] == ["12 day streak"]
+    
+    def test_extract_progress_from_html(self):
+        """Test that the shared parsers turn candidates into progress data."""
+        pytest.importorskip("selectolax")
+        progress = HtmlExtractor().extract(self.DASHBOARD_HTML, date="2024-03-01")
+        
+        assert progress["date"] == "2024-03-01"
+        assert progress["lessons_completed"] == ["Fractions", "Decimals"]
+        assert progress["last_activity"] == "Seen yesterday"
+        assert progress["streak_days"] == 12
+        assert progress["source"] == "html"
+    
+    def test_zero_reading_is_a_match(self):
+        """Test that "0 minutes" stops the selector chain instead of falling through."""
+        selectors = FIELD_SELECTORS["study_time"]
+        candidates = [["Today: 0 minutes"], [], [], [], ["15 min"]]
+        
+        assert parse_candidates("study_time", selectors, candidates) == (0, selectors[0])
+        assert parse_candidates("points", FIELD_SELECTORS["points"], [["0 pts"]]) == (0, FIELD_SELECTORS["points"][0])
+    
+    def test_zero_minute_day_from_html(self):
+        """Test that a zero-minute day is not overridden by a lesson card's duration."""
+        pytest.importorskip("selectolax")
+        html = """
+        <html><body>
+          <div class="study-time">Today: 0 minutes</div>
+          <li class="lesson-item">Fractions <span class="lesson-duration">15 min</span></li>
+        </body></html>
+        """
+        progress = HtmlExtractor().extract(html, date="2024-03-01")
+        
+        assert progress["study_time_minutes"] == 0
+
+
+class TestParsing:
+    """Test the precompiled text parsers against the bundled corpus."""
+    
+    def test_corpus_parses_as_recorded(self):
+        """Test that every corpus string parses to its recorded value."""
+        assert check_corpus(load_corpus()) == []
+    
+    def test_parsers(self):
+        """Test durations, counts and relative times in dashboard text."""
+        now = datetime(2024, 3, 1, 12, 0)
+        
+        assert parse_duration("1h 20m") == 80
+        assert parse_duration("Last active 2 hours ago") is None
+        assert parse_duration("Last active 12:30 PM") is None
+        assert parse_duration("Time spent: 1:20") == 80
+        assert parse_count("1,250 pts") == 1250
+        assert parse_relative_time("2 hours ago", now) == datetime(2024, 3, 1, 10, 0)
+        assert parse_relative_time("yesterday", now) == datetime(2024, 2, 29, 12, 0)
+
+
+class TestResourceBlocker:
+    """Test network blocking decisions and the per-run report."""
+    
+    def test_block_decisions(self):
+        """Test resource types, deny list and allow list precedence."""
+        blocker = ResourceBlocker(deny_domains=["ads.example"], allow_domains=["cdn.synthesis.com"])
+        
+        assert blocker.should_block("https://synthesis.com/logo.png", "image")
+        assert blocker.should_block("https://www.google-analytics.com/analytics.js", "script")
+        assert blocker.should_block("https://x.ads.example/pixel", "xhr")
+        assert not blocker.should_block("https://synthesis.com/dashboard", "document")
+        assert not blocker.should_block("https://synthesis.com/app.js", "script")
+        assert not blocker.should_block("https://cdn.synthesis.com/font.woff2", "font")
+    
+    @pytest.mark.asyncio
+    async def test_handle_reports_bytes_saved(self):
+        """Test that aborted requests are counted in the report."""
+        blocker = ResourceBlocker()
+        requests = [
+            ("https://synthesis.com/dashboard", "document"),
+            ("https://synthesis.com/hero.jpg", "image"),
+            ("https://fonts.example/inter.woff2", "font")
+        ]
+        
+        for url, resource_type in requests:
+            route = AsyncMock()
+            await blocker.handle(route, Mock(url=url, resource_type=resource_type))
+        
+        report = blocker.report()
+        assert report["allowed_requests"] == 1
+        assert report["blocked_by_type"] == {"image": 1, "font": 1}
+        assert report["estimated_bytes_saved"] == (ResourceBlocker.TYPICAL_BYTES["image"] +
+                                                   ResourceBlocker.TYPICAL_BYTES["font"])
+
+
+class TestHttpProgressClient:
+    """Test the browserless progress path."""
+    
+    @pytest.mark.asyncio
+    async def test_fetch_and_fallback(self):
+        """Test learned endpoints are fetched with cookies and rejections fall back."""
+        httpx = pytest.importorskip("httpx")
+        status = {"code": 200}
+        
+        def handler(request):
+            assert request.headers["cookie"] == "sid=abc"
+            if status["code"] != 200:
+                return httpx.Response(status["code"])
+            return httpx.Response(200, json={"data": {"minutesToday": 40, "currentStreak": 3}})
+        
+        client = HttpProgressClient("https://synthesis.com")
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        
+        assert await client.fetch_progress() is None
+        assert client.learn(
+            {"study_time_minutes": "https://synthesis.com/api/progress",
+             "streak_days": "https://synthesis.com/api/progress"},
+            [{"name": "sid", "value": "abc", "domain": "synthesis.com", "path": "/"}]
+        )
+        
+        progress = await client.fetch_progress()
+        assert progress["study_time_minutes"] == 40
+        assert progress["streak_days"] == 3
+        assert progress["source"] == "http"
+        
+        status["code"] = 401
+        assert await client.fetch_progress() is None
+        assert client.stats["fallbacks"] == 1
+        await client.close()
 
 
 class TestEmailMonitor:
@@ -188,6 +941,236 @@ class TestEmailMonitor:
         
         code = email_monitor.extract_synthesis_code(test_emails)
         assert code == "ABC123"  # Should get the most recent one
+    
+    def test_search_fetches_headers_then_bounded_bodies(self, email_monitor):
+        """Test that bodies are only fetched, truncated, for code-like subjects."""
+        connection = Mock()
+        connection.search.return_value = ("OK", [b"1 2"])
+        connection.fetch.side_effect = lambda message_set, spec: ("OK", [
+            (b"1 (BODY[HEADER.FIELDS (SUBJECT FROM DATE)] {40}", b"Subject: Weekly newsletter\r\n\r\n"), b")",
+            (b"2 (BODY[HEADER.FIELDS (SUBJECT FROM DATE)] {40}", b"Subject: Your verification code\r\n\r\n"), b")"
+        ] if "HEADER" in spec else [
+            (b"2 (BODY[TEXT]<0> {33}", b"Your verification code is: ABC123"), b")"
+        ])
+        email_monitor.connection = connection
+        
+        emails = email_monitor.search_emails(body_subject_pattern=email_monitor.CODE_SUBJECT_PATTERN)
+        
+        specs = [call.args for call in connection.fetch.call_args_list]
+        assert specs[0] == ("1,2", f"(BODY.PEEK[HEADER.FIELDS ({email_monitor.HEADER_FIELDS})])")
+        assert specs[1] == ("2", f"(BODY.PEEK[TEXT]<0.{email_monitor.MAX_BODY_BYTES}>)")
+        assert [(e["id"], e["body"]) for e in emails] == [("1", ""), ("2", "Your verification code is: ABC123")]
+    
+    def test_incremental_code_sync(self, email_monitor):
+        """Test that only new UIDs are fetched and the state survives a restart."""
+        from email.utils import format_datetime
+        recent = format_datetime(datetime.now().astimezone())
+        stale = "Mon, 15 Jan 2024 10:00:00 +0000"
+        mailbox = {"UIDVALIDITY": b"5", "UIDNEXT": b"13"}
+        headers = {
+            b"11": f"Subject: Your verification code\r\nTo: kid@example.com\r\nDate: {recent}\r\n\r\n".encode(),
+            b"12": f"Subject: verification reminder\r\nTo: other@example.com\r\nDate: {stale}\r\n\r\n".encode()
+        }
+        
+        def uid(command, *args):
+            if command == "SEARCH":
+                return "OK", [b"11 12"]
+            if command == "STORE":
+                return "OK", [None]
+            spec, wanted = args[1], args[0].encode().split(b",")
+            return "OK", [(b"1 (UID %s X {1}" % u, headers[u] if "HEADER" in spec else b"Your verification code is: ABC123")
+                          for u in wanted]
+        
+        connection = Mock()
+        connection.response.side_effect = lambda name: (name, [mailbox.get(name)])
+        connection.uid.side_effect = uid
+        email_monitor.connection = connection
+        
+        assert email_monitor.get_latest_login_code("kid@example.com") == "ABC123"
+        assert email_monitor.state_changed
+        assert [entry["uid"] for entry in email_monitor.code_cache] == [11]  # 12 is older than a day
+        
+        saved = email_monitor.dump_state()
+        assert "ABC123" not in saved and "kid@example.com" not in saved
+        
+        restarted = SynthesisEmailMonitor("test.server.com", 993, "u", "p")
+        restarted.load_state(saved)
+        restarted.connection = connection
+        connection.uid.reset_mock()
+        
+        assert restarted.get_latest_login_code("kid@example.com") is None  # codes are not persisted
+        assert [entry["uid"] for entry in restarted.code_cache] == [11]
+        assert connection.uid.call_count == 0  # nothing new: no SEARCH or FETCH
+        
+        mailbox["UIDVALIDITY"] = b"6"
+        headers[b"11"] = headers[b"11"].replace(recent.encode(), stale.encode())
+        restarted.sync_codes()
+        assert restarted.code_cache == []
+        assert restarted.folder_state["INBOX"] == {"uidvalidity": 6, "last_uid": 12}
+        
+        # State saved with plaintext codes is rewritten without them on the next save
+        legacy = SynthesisEmailMonitor("test.server.com", 993, "u", "p")
+        legacy.load_state(json.dumps({"folders": {}, "codes": [
+            {"uid": 3, "folder": "INBOX", "timestamp": 1.0, "to": "kid@example.com", "code": "XYZ789"}
+        ]}))
+        assert legacy.state_changed
+        assert "XYZ789" not in legacy.dump_state()
+    
+    def test_shared_connection_keepalive_and_reconnect(self, email_monitor):
+        """Test that one connection is reused, NOOP-checked when idle and reopened when dropped."""
+        import imaplib
+        opened = []
+        
+        def open_connection(*args, **kwargs):
+            connection = Mock()
+            connection.search.return_value = ("OK", [b""])
+            opened.append(connection)
+            return connection
+        
+        with patch("shared.email_utils.imaplib.IMAP4_SSL", side_effect=open_connection):
+            email_monitor.search_emails()
+            email_monitor.cleanup_old_codes()
+            assert len(opened) == 1
+            
+            email_monitor.imap.last_used -= email_monitor.imap.keepalive_interval
+            email_monitor.search_emails()
+            opened[0].noop.assert_called_once()
+            
+            opened[0].select.side_effect = imaplib.IMAP4.abort("socket error: EOF")
+            email_monitor.search_emails()  # retried once on a fresh connection
+            assert len(opened) == 2
+            assert opened[1].search.called
+            
+            email_monitor.imap.last_used -= email_monitor.imap.max_idle
+            email_monitor.search_emails()
+        
+        stats = email_monitor.connection_stats()
+        assert (stats["connects"], stats["reconnects"], stats["keepalives"]) == (3, 1, 1)
+        assert stats["reuses"] == 3
+    
+    def test_failed_connects_back_off(self, email_monitor):
+        """Test that a down server is not retried on every call."""
+        with patch("shared.email_utils.imaplib.IMAP4_SSL", side_effect=OSError("refused")) as imap:
+            assert email_monitor.search_emails() == []
+            assert email_monitor.search_emails() == []
+        
+        assert imap.call_count == 1
+        assert email_monitor.connection_stats()["failures"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_async_monitor_keeps_event_loop_free(self, email_monitor):
+        """Test that a slow mailbox lookup neither blocks the loop nor overlaps another."""
+        import threading
+        import time
+        threads = []
+        
+        def slow_lookup(recipient=None):
+            threads.append(threading.current_thread().name)
+            time.sleep(0.2)
+            return "ABC123"
+        
+        email_monitor.get_latest_login_code = slow_lookup
+        email_monitor.cleanup_old_codes = lambda: threads.append(threading.current_thread().name)
+        monitor = AsyncSynthesisEmailMonitor(email_monitor)
+        
+        ticks = 0
+        
+        async def other_tool():
+            nonlocal ticks
+            while not lookup.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+        
+        lookup = asyncio.ensure_future(monitor.get_latest_login_code("kid@example.com"))
+        await asyncio.gather(lookup, other_tool(), monitor.cleanup_old_codes())
+        
+        assert lookup.result() == "ABC123"
+        assert ticks >= 5
+        assert len(set(threads)) == 1 and threads[0].startswith("imap")
+        await monitor.disconnect()
+    
+    @pytest.mark.asyncio
+    async def test_async_monitor_disconnect_drains_without_blocking_loop(self, email_monitor):
+        """Test that disconnect() waits for queued mailbox work while the loop keeps running."""
+        import time
+        
+        def slow_lookup(recipient=None):
+            time.sleep(0.2)
+            return "ABC123"
+        
+        email_monitor.get_latest_login_code = slow_lookup
+        email_monitor.disconnect = Mock()
+        monitor = AsyncSynthesisEmailMonitor(email_monitor)
+        
+        closing = asyncio.ensure_future(monitor.disconnect())
+        await asyncio.sleep(0)
+        lookup = asyncio.ensure_future(monitor.get_latest_login_code("kid@example.com"))
+        await asyncio.sleep(0)
+        
+        ticks = 0
+        while not closing.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        
+        assert await lookup == "ABC123"
+        assert ticks >= 5
+        email_monitor.disconnect.assert_called_once()
+    
+    def test_idle_wakes_on_buffered_exists(self, email_monitor):
+        """Test that an EXISTS sent with the IDLE continuation is seen without waiting for select()."""
+        import socket
+        import time
+        ours, server = socket.socketpair()
+        ours.settimeout(5)
+        
+        connection = Mock(sock=ours, tagged_commands={})
+        connection.file = ours.makefile("rb")
+        connection.readline = connection.file.readline
+        connection._new_tag.return_value = b"A1"
+        connection.send.side_effect = lambda data: server.sendall(b"A1 OK IDLE terminated\r\n") \
+            if data == b"DONE\r\n" else None
+        
+        watcher = email_monitor.watch_login_code()
+        watcher.connection = connection
+        server.sendall(b"+ idling\r\n* 3 EXISTS\r\n")
+        
+        started = time.monotonic()
+        try:
+            assert watcher._idle(timeout=3) is True
+            assert time.monotonic() - started < 1
+            assert ours.gettimeout() == 5  # the blocking check leaves the socket as it was
+        finally:
+            connection.file.close()
+            ours.close()
+            server.close()
+    
+    def test_login_code_watcher_polls_for_new_mail(self, email_monitor):
+        """Test that the watcher ignores older codes and returns the one sent after start()."""
+        message = b"Subject: Synthesis verification code\r\nDate: Mon, 15 Jan 2024 10:00:00 +0000\r\n\r\n"
+        searches = [b"7", b"7", b"7 12"]  # UID 7 predates the watcher
+        
+        connection = Mock(capabilities=("IMAP4REV1",))
+        connection.response.return_value = ("UIDNEXT", [b"10"])
+        connection.uid.side_effect = lambda command, *args: (
+            ("OK", [searches.pop(0)]) if command == "SEARCH"
+            else ("OK", [(b"1 (UID 12 BODY[HEADER.FIELDS (SUBJECT)] {60}", message)]) if "HEADER" in args[1]
+            else ("OK", [(b"1 (UID 12 BODY[TEXT]<0> {30}", b"Your verification code is: NEW123")])
+        )
+        
+        def connect(monitor):
+            monitor.connection = connection
+            return True
+        
+        with patch.object(SynthesisEmailMonitor, "connect", autospec=True, side_effect=connect):
+            watcher = email_monitor.watch_login_code(recipient="kid@example.com", timeout=5)
+            watcher.min_poll = 0.01
+            assert watcher.start()
+        
+        assert watcher.mode == "poll"
+        assert watcher.wait() == "NEW123"
+        assert watcher.checks == 3
+        assert 'TO "kid@example.com"' in connection.uid.call_args_list[0].args
+        connection.logout.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -202,6 +1185,9 @@ async def test_integration_workflow():
         mock_config.email_use_ssl = True
         mock_config.synthesis_email = "student@example.com"
         mock_config.headless_browser = True
+        mock_config.accounts = [{"name": "default", "email": "student@example.com"}]
+        mock_config.sync_max_concurrency = 3
+        mock_config.account_sync_deadline_seconds = 120
         
         server = SynthesisTrackerServer()
         
@@ -211,7 +1197,7 @@ async def test_integration_workflow():
         assert status["logged_in_today"] is False
         
         # 2. Simulate adding study data
-        server.db.save_study_session({
+        await server.db.save_study_session({
             "date": datetime.now().strftime("%Y-%m-%d"),
             "logged_in": True,
             "study_time_minutes": 25,